@@ -0,0 +1,243 @@
+"""
+Benchmark suite for the ephemerality computation, the CLI and the REST API. Results are written as JSON, so runs of
+different releases can be compared. Run from the repository root with `python -m benchmark [-o results.json]`.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import timeit
+import argparse
+import platform
+import tempfile
+import warnings
+import datetime
+import threading
+import subprocess
+import http.client
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from _version import __version__
+from src import compute_ephemerality
+from benchmark.generators import GENERATORS, SHORT_LENGTHS, LONG_LENGTHS
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SUITES = ('core', 'cli', 'rest', 'startup')
+TYPES = ('all', 'left', 'middle', 'right', 'sorted')
+
+
+def init_argparse() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark ephemerality computation, CLI and REST API throughput and "
+                                                 "the start-up time of short invocations.")
+    parser.add_argument("-o", "--output", action="store",
+                        help="Path to the output json file. If not specified, results are printed to stdout.")
+    parser.add_argument("--suites", nargs='+', choices=SUITES, default=list(SUITES),
+                        help="Benchmark suites to run. Defaults to all of them.")
+    parser.add_argument("--max-length", type=int, default=10 ** 7,
+                        help="Longest vector length timed by the core suite. Defaults to 10^7.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of timing repetitions, the best one is reported. Defaults to 3.")
+    parser.add_argument("-t", "--threshold", type=float, default=0.8,
+                        help="Threshold value for ephemerality computations. Defaults to 0.8.")
+    parser.add_argument("--cli-lines", type=int, default=10000,
+                        help="Number of lines of the csv file used by the CLI suite. Defaults to 10000.")
+    parser.add_argument("--vector-length", type=int, default=100,
+                        help="Length of the vectors used by the CLI and REST suites. Defaults to 100.")
+    parser.add_argument("--rest-duration", type=float, default=5.,
+                        help="Seconds spent sending requests to each REST endpoint. Defaults to 5.")
+    parser.add_argument("--rest-clients", type=int, default=4,
+                        help="Number of concurrent REST clients. Defaults to 4.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic vectors. Defaults to 0.")
+    return parser
+
+
+def time_call(function, repeat: int) -> dict:
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {'number': number, 'best_seconds': min(times), 'mean_seconds': sum(times) / len(times)}
+
+
+def run_core_suite(args: argparse.Namespace) -> list[dict]:
+    rng = np.random.default_rng(args.seed)
+    results = list()
+    for length in (length for length in SHORT_LENGTHS + LONG_LENGTHS if length <= args.max_length):
+        for generator_name, generator in GENERATORS.items():
+            frequency_vector = generator(length, rng)
+            for types in TYPES:
+                timing = time_call(lambda: compute_ephemerality(frequency_vector, args.threshold, types),
+                                   args.repeat)
+                results.append({'suite': 'core', 'generator': generator_name, 'length': length, 'types': types,
+                                **timing})
+                print(f"core {generator_name:>8} {length:>9} {types:>7}: {timing['best_seconds']:.3e} s",
+                      file=sys.stderr)
+    return results
+
+
+def write_csv(path: Path, n_lines: int, length: int, rng: np.random.Generator):
+    generators = list(GENERATORS.values())
+    with open(path, 'w') as f:
+        for i in range(n_lines):
+            f.write(','.join(map(str, generators[i % len(generators)](length, rng).round(3))))
+            f.write('\n')
+
+
+def run_cli_suite(args: argparse.Namespace) -> list[dict]:
+    rng = np.random.default_rng(args.seed)
+    workers = os.cpu_count() or 1
+    configurations = {'default': [], 'stream': ['-s'], f'workers_{workers}': ['-w', str(workers)]}
+    results = list()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_path = Path(temp_dir) / 'input.csv'
+        output_path = Path(temp_dir) / 'output.json'
+        write_csv(input_path, args.cli_lines, args.vector_length, rng)
+        for name, options in configurations.items():
+            command = [sys.executable, str(REPO_ROOT / 'ephemerality.py'), '-i', str(input_path),
+                       '-o', str(output_path), '-t', str(args.threshold), *options]
+            times = list()
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                times.append(time.perf_counter() - start)
+            results.append({'suite': 'cli', 'configuration': name, 'lines': args.cli_lines,
+                            'length': args.vector_length, 'file_bytes': input_path.stat().st_size,
+                            'best_seconds': min(times), 'lines_per_second': args.cli_lines / min(times)})
+            print(f"cli {name:>10}: {args.cli_lines / min(times):.1f} lines/s", file=sys.stderr)
+    return results
+
+
+def run_startup_suite(args: argparse.Namespace) -> list[dict]:
+    from src.ephemerality_scalar import SMALL_VECTOR_MAX_LENGTH
+
+    short_vector = ','.join(['0', '1', '3', '0', '2'])
+    long_vector = ','.join(['1'] * (SMALL_VECTOR_MAX_LENGTH + 1))
+    cli = [sys.executable, str(REPO_ROOT / 'ephemerality.py')]
+    commands = {
+        'python': [sys.executable, '-c', 'pass'],
+        'import_src': [sys.executable, '-c', 'import src'],
+        'import_compute_ephemerality': [sys.executable, '-c', 'from src import compute_ephemerality'],
+        'cli_short_vector': [*cli, short_vector, '-t', str(args.threshold)],
+        'cli_long_vector': [*cli, long_vector, '-t', str(args.threshold)]
+    }
+    # Every invocation starts a new interpreter, so the reported times include the interpreter start-up, which is
+    # measured on its own by the 'python' command
+    results = list()
+    for name, command in commands.items():
+        times = list()
+        for _ in range(max(args.repeat, 10)):
+            start = time.perf_counter()
+            subprocess.run(command, check=True, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            times.append(time.perf_counter() - start)
+        results.append({'suite': 'startup', 'command': name, 'best_seconds': min(times),
+                        'mean_seconds': sum(times) / len(times)})
+        print(f"startup {name:>27}: {min(times) * 1e3:.1f} ms", file=sys.stderr)
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_server(port: int, timeout: float = 30.):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1.)
+            connection.request('GET', '/docs')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('REST server did not start in time!')
+
+
+def _send_requests(port: int, path: str, body: bytes, duration: float, counts: list, index: int):
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    headers = {'Content-Type': 'application/json'}
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        connection.request('POST', path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f'Request to {path} failed with status {response.status}!')
+        counts[index] += 1
+    connection.close()
+
+
+def run_rest_suite(args: argparse.Namespace) -> list[dict]:
+    rng = np.random.default_rng(args.seed)
+    vectors = [generator(args.vector_length, rng).tolist() for generator in GENERATORS.values()]
+    payloads = {
+        '/ephemerality/1.1/all': {'input_vector': vectors[0], 'threshold': args.threshold},
+        '/ephemerality/1.1/sorted': {'input_vector': vectors[1], 'threshold': args.threshold},
+        '/ephemerality/1.1/batch': {'input_vectors': vectors * 100, 'threshold': args.threshold}
+    }
+
+    port = _free_port()
+    server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'rest.api:app', '--port', str(port),
+                               '--log-level', 'warning'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL)
+    results = list()
+    try:
+        _wait_for_server(port)
+        for path, payload in payloads.items():
+            body = json.dumps(payload).encode()
+            counts = [0] * args.rest_clients
+            clients = [threading.Thread(target=_send_requests, args=(port, path, body, args.rest_duration, counts, i))
+                       for i in range(args.rest_clients)]
+            start = time.perf_counter()
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.perf_counter() - start
+            results.append({'suite': 'rest', 'endpoint': path, 'clients': args.rest_clients,
+                            'length': args.vector_length, 'requests': sum(counts),
+                            'requests_per_second': sum(counts) / elapsed})
+            print(f"rest {path}: {sum(counts) / elapsed:.1f} req/s", file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+def main():
+    args = init_argparse().parse_args()
+    suites = {'core': run_core_suite, 'cli': run_cli_suite, 'rest': run_rest_suite,
+              'startup': run_startup_suite}
+
+    results = list()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        for suite in args.suites:
+            results.extend(suites[suite](args))
+
+    report = {
+        'metadata': {
+            'version': __version__,
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'threshold': args.threshold
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w+') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+import numpy as np
+from typing import Callable
+
+
+def generate_sparse(length: int, rng: np.random.Generator, density: float = 0.01) -> np.ndarray:
+    """Mostly zero counts, with a few active bins"""
+    frequency_vector = np.zeros(length)
+    n_active = max(int(length * density), 1)
+    frequency_vector[rng.choice(length, size=n_active, replace=False)] = rng.integers(1, 100, n_active)
+    return frequency_vector
+
+
+def generate_peaked(length: int, rng: np.random.Generator, width: float = 0.01) -> np.ndarray:
+    """A single burst of activity around a random bin over low background noise"""
+    bins = np.arange(length)
+    peak = rng.integers(length)
+    scale = max(width * length, 1.)
+    return np.exp(-0.5 * ((bins - peak) / scale) ** 2) * 1000. + rng.random(length)
+
+
+def generate_uniform(length: int, rng: np.random.Generator) -> np.ndarray:
+    """Evenly spread activity"""
+    return rng.random(length) + 1.
+
+
+GENERATORS: dict[str, Callable[[int, np.random.Generator], np.ndarray]] = {
+    'sparse': generate_sparse,
+    'peaked': generate_peaked,
+    'uniform': generate_uniform
+}
+
+SHORT_LENGTHS = (10, 100, 1000)
+LONG_LENGTHS = (10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)
@@ -1,17 +1,75 @@
 from _version import __version__
 import sys
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, TextIO
+from src.ephemerality_scalar import SMALL_VECTOR_MAX_LENGTH, compute_ephemerality_small
+
+
+def parse_small_vector_arguments(arguments: list[str]) -> Optional[tuple[list[float], float]]:
+    """
+    Returns the frequency vector and the threshold if the command line only gives a dense frequency vector of up to
+    `SMALL_VECTOR_MAX_LENGTH` elements and optionally a threshold, or None if it needs the full argument parser.
+    """
+    tokens = list()
+    threshold = '0.8'
+    arguments = iter(arguments)
+    for argument in arguments:
+        if argument in ('-t', '--threshold'):
+            threshold = next(arguments, None)
+            if threshold is None:
+                return None
+        elif argument.startswith('--threshold='):
+            threshold = argument[len('--threshold='):]
+        elif argument.startswith('-'):
+            return None
+        else:
+            tokens.append(argument)
+
+    if len(tokens) == 1:
+        tokens = tokens[0].split(' ') if ' ' in tokens[0] else tokens[0].split(',')
+    if not tokens or len(tokens) > SMALL_VECTOR_MAX_LENGTH:
+        return None
+    try:
+        return [float(token) for token in tokens], float(threshold)
+    except ValueError:
+        return None
+
+
+# Short command line vectors are computed in pure Python before NumPy and the rest of the package are imported, as
+# importing them would take most of the run time
+if __name__ == '__main__':
+    small_vector_arguments = parse_small_vector_arguments(sys.argv[1:])
+    if small_vector_arguments is not None:
+        print(*compute_ephemerality_small(*small_vector_arguments))
+        sys.exit()
+
 import json
+import time
 import argparse
+import itertools
+import contextlib
+import collections
+import multiprocessing
 import numpy as np
-from src import compute_ephemerality
+from src import compute_ephemerality, profiler, warn_clamped
+from src.ephemerality_arrow import PARQUET_EXTENSIONS, ARROW_EXTENSIONS
+if TYPE_CHECKING:
+    from src.ephemerality_batch import EphemeralityBatch
 
 
 HELP_INFO = ""
 
+BINARY_EXTENSIONS = ('.npy', '.npz')
+CORE_TYPES = ('left', 'middle', 'right', 'sorted')
+EPHEMERALITY_RECORD_DTYPE = np.dtype([(field, dtype) for core_type in CORE_TYPES
+                                      for field, dtype in ((f'{core_type}_core', np.float64),
+                                                           (f'{core_type}_core_span', np.int64))])
+
 
 def init_argparse() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
-        usage="%(prog)s [FREQUENCY_VECTOR] [-h] [-v] [-i INPUT_FILE] [-o OUTPUT_FILE.json] [-t THRESHOLD]...",
+        usage="%(prog)s [FREQUENCY_VECTOR] [-h] [-v] [-i INPUT_FILE] [-o OUTPUT_FILE.json] [-t THRESHOLD] "
+              "[-w WORKERS] [-s] [--sparse] [--profile] [--clamp-warnings MODE] [--columns COLUMNS] "
+              "[--long-format [--n-bins N_BINS]]...",
         description="Calculate ephemerality for a given vector of frequencies."
     )
     parser.add_argument(
@@ -25,18 +83,69 @@ def init_argparse() -> argparse.ArgumentParser:
     parser.add_argument(
         "-i", "--input", action="store",
         help="Path to the input csv file. If not specified, will use the command line arguments "
-             "(delimited either by commas or spaces)."
+             "(delimited either by commas or spaces). Files ending with .npy are read as a memory-mapped "
+             "(n_vectors x n_bins) matrix, files ending with .npz are expected to contain a 'frequency_vectors' array "
+             "(a matrix, or all vectors concatenated) and optionally a 'lengths' array for ragged vectors. Parquet "
+             "(.parquet, .pq) and Arrow IPC (.arrow, .feather, .ipc) files are scanned --chunk-size rows at a time, "
+             "computing ephemerality of their list<float> columns into new columns of the output file, which must "
+             "also be a Parquet or Arrow IPC file."
     )
     parser.add_argument(
         "-o", "--output", action="store",
         help="Path to the output json file. If not specified, will output ephemerality values to stdout in the"
-             " following format separated by a space: \"EPH_ORIG EPH_ORIG_SPAN EPH_FILT EPH_FILT_SPAN EPH_SORT "
-             "EPH_SORT_SPAN\""
+             " following format separated by a space: \"EPH_LEFT EPH_MIDDLE EPH_RIGHT EPH_SORTED\". For .npy/.npz "
+             "input, a path ending with .npy writes a structured array with one field per core value and span."
     )
     parser.add_argument(
         "-t", "--threshold", action="store", default=0.8,
         help="Threshold value for ephemerality computations. Defaults to 0.8."
     )
+    parser.add_argument(
+        "-w", "--workers", action="store", type=int, default=1,
+        help="Number of worker processes used to compute ephemeralities of the input file lines. Defaults to 1 "
+             "(no multiprocessing)."
+    )
+    parser.add_argument(
+        "--chunk-size", action="store", type=int,
+        help="Number of input file lines sent to a worker process at once. Defaults to 10000."
+    )
+    parser.add_argument(
+        "-s", "--stream", action="store_true",
+        help="Process the input file in chunks with constant memory use: results of each chunk are printed and "
+             "written to the output file as newline-delimited JSON (one object per line) as soon as they are ready."
+    )
+    parser.add_argument(
+        "--sparse", action="store_true",
+        help="Frequency vectors are given in sparse form: the vector length followed by the nonzero bins as "
+             "INDEX:VALUE pairs, e.g. \"100000,17:3,4521:1\"."
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Measure the time spent parsing the input, computing the ephemeralities (broken down into input "
+             "preparation, each core and result construction) and serializing the results, and print a report to "
+             "stderr. Not supported with multiple workers."
+    )
+    parser.add_argument(
+        "--clamp-warnings", action="store", choices=('each', 'summary', 'none'), default='each',
+        help="How ephemerality values less than 0 that are rounded up are reported: a warning per vector and core "
+             "('each', default), a single summary warning per chunk of input lines ('summary') or not at all ('none')."
+    )
+    parser.add_argument(
+        "--columns", action="store",
+        help="Comma-separated list columns of a Parquet or Arrow input file to compute ephemerality of. Defaults to "
+             "all list columns."
+    )
+    parser.add_argument(
+        "--long-format", action="store_true",
+        help="The input csv file holds one TOPIC_ID,BIN_INDEX,COUNT row per nonzero bin, in any order, instead of one "
+             "vector per line. Ephemerality is computed for every topic at once and printed as \"TOPIC_ID EPH_LEFT "
+             "EPH_MIDDLE EPH_RIGHT EPH_SORTED\", or written to the output file with an additional topic_id key."
+    )
+    parser.add_argument(
+        "--n-bins", action="store", type=int,
+        help="Length of the topic vectors of long-format input. Defaults to the largest bin index of each topic plus "
+             "one."
+    )
     parser.add_argument(
         'frequencies',
         help='frequency vector (if the input file is not specified)',
@@ -45,45 +154,295 @@ def init_argparse() -> argparse.ArgumentParser:
     return parser
 
 
+def parse_sparse_vector(tokens: list[str]) -> tuple[int, np.ndarray, np.ndarray]:
+    pairs = [token.split(':') for token in tokens[1:] if token.strip()]
+    indices = np.array([index for index, _ in pairs], dtype=np.int64)
+    values = np.array([value for _, value in pairs], dtype=float)
+    return int(tokens[0]), indices, values
+
+
+def compute_line_ephemerality(tokens: list[str], threshold: float, sparse: bool = False,
+                              result_type: str = 'tuple') -> dict:
+    if profiler.enabled:
+        return _profile_line_ephemerality(tokens, threshold, sparse, result_type)
+    if sparse:
+        from src.ephemerality_sparse import compute_ephemerality_sparse
+        return compute_ephemerality_sparse(frequency_vector=parse_sparse_vector(tokens), threshold=threshold,
+                                           result_type=result_type)._asdict()
+    return compute_ephemerality(frequency_vector=np.array(tokens, dtype=float), threshold=threshold,
+                                result_type=result_type)._asdict()
+
+
+def _profile_line_ephemerality(tokens: list[str], threshold: float, sparse: bool, result_type: str) -> dict:
+    start = time.perf_counter()
+    frequency_vector = parse_sparse_vector(tokens) if sparse else np.array(tokens, dtype=float)
+    start = profiler.lap('parse', start)
+    if sparse:
+        from src.ephemerality_sparse import compute_ephemerality_sparse
+        ephemeralities = compute_ephemerality_sparse(frequency_vector=frequency_vector, threshold=threshold,
+                                                     result_type=result_type)
+    else:
+        ephemeralities = compute_ephemerality(frequency_vector=frequency_vector, threshold=threshold,
+                                              result_type=result_type)
+    start = profiler.lap('compute', start)
+    ephemerality_dict = ephemeralities._asdict()
+    profiler.lap('serialize', start)
+    return ephemerality_dict
+
+
+def compute_ephemerality_chunk(lines: Iterable[str], threshold: float, sparse: bool = False,
+                               clamp_warnings: str = 'each') -> list[dict]:
+    return compute_tokens_ephemeralities((line.strip().split(',') for line in lines if line.strip()), threshold, sparse,
+                                         clamp_warnings)
+
+
+def compute_tokens_ephemeralities(token_lists: Iterable[list[str]], threshold: float, sparse: bool = False,
+                                  clamp_warnings: str = 'each') -> list[dict]:
+    # Unless every rounded up value is warned about, the values are flagged and the flags counted for all vectors
+    result_type = 'tuple' if clamp_warnings == 'each' else 'flagged'
+    ephemerality_list = [compute_line_ephemerality(tokens, threshold, sparse, result_type) for tokens in token_lists]
+    if result_type == 'flagged':
+        clamped = [ephemeralities.pop('clamped') for ephemeralities in ephemerality_list]
+        if clamp_warnings == 'summary':
+            warn_clamped(clamped)
+    return ephemerality_list
+
+
+def read_line_chunks(input_file: TextIO, chunk_size: int) -> Iterator[list[str]]:
+    while True:
+        lines = list(itertools.islice(input_file, chunk_size))
+        if not lines:
+            return
+        yield lines
+
+
+def iter_ephemerality_chunks(input_path: str, threshold: float, workers: int = 1, chunk_size: int = 10000,
+                             sparse: bool = False, clamp_warnings: str = 'each') -> Iterator[list[dict]]:
+    with open(input_path, 'r') as input_file:
+        yield from _iter_ephemerality_chunks(input_file, threshold, workers, chunk_size, sparse, clamp_warnings)
+
+
+def _iter_ephemerality_chunks(input_file: TextIO, threshold: float, workers: int, chunk_size: int,
+                              sparse: bool, clamp_warnings: str) -> Iterator[list[dict]]:
+    chunks = read_line_chunks(input_file, chunk_size)
+    if workers == 1:
+        for lines in chunks:
+            yield compute_ephemerality_chunk(lines, threshold, sparse, clamp_warnings)
+        return
+
+    # Chunk results are yielded in submission order, so the output order matches the input order. The number of chunks
+    # in flight is bounded, so the input is never read far ahead of the output.
+    with multiprocessing.Pool(workers) as pool:
+        pending = collections.deque()
+        for lines in chunks:
+            pending.append(pool.apply_async(compute_ephemerality_chunk, (lines, threshold, sparse, clamp_warnings)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def load_frequency_vectors(input_path: str) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    if input_path.endswith('.npz'):
+        # Members of .npz archives cannot be memory-mapped and are loaded into memory
+        with np.load(input_path) as data:
+            frequency_vectors = data['frequency_vectors'] if 'frequency_vectors' in data else data[data.files[0]]
+            lengths = data['lengths'] if 'lengths' in data else None
+    else:
+        frequency_vectors = np.load(input_path, mmap_mode='r')
+        lengths = None
+
+    if frequency_vectors.ndim == 1 and lengths is None:
+        frequency_vectors = frequency_vectors[None, :]
+    return frequency_vectors, lengths
+
+
+def iter_ephemerality_batches(frequency_vectors: np.ndarray, lengths: Optional[np.ndarray], threshold: float,
+                              chunk_size: int = 10000, clamp_warnings: str = 'each') -> Iterator['EphemeralityBatch']:
+    from src.ephemerality_batch import compute_ephemerality_batch
+
+    n_vectors = len(lengths) if lengths is not None else frequency_vectors.shape[0]
+    offsets = np.concatenate(([0], np.cumsum(lengths))) if lengths is not None else None
+
+    # Only one chunk of rows of a memory-mapped input is read into memory at a time
+    for start in range(0, n_vectors, chunk_size):
+        end = min(start + chunk_size, n_vectors)
+        with profiler.section('parse'):
+            if lengths is not None and frequency_vectors.ndim == 1:
+                chunk = np.asarray(frequency_vectors[offsets[start]:offsets[end]])
+            else:
+                chunk = np.asarray(frequency_vectors[start:end])
+        with profiler.section('compute'):
+            batch = compute_ephemerality_batch(chunk, threshold=threshold,
+                                               lengths=lengths[start:end] if lengths is not None else None,
+                                               clamp_warnings=clamp_warnings)
+        yield batch
+
+
+def load_long_format(input_path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    with profiler.section('parse'):
+        table = np.loadtxt(input_path, delimiter=',', dtype=str, ndmin=2)
+        if table.shape[0] and table.shape[1] != 3:
+            raise ValueError('Long-format input rows must have exactly 3 columns: TOPIC_ID,BIN_INDEX,COUNT!')
+        table = table.reshape(-1, 3)
+        return np.char.strip(table[:, 0]), table[:, 1].astype(np.int64), table[:, 2].astype(float)
+
+
+def grouped_to_dicts(topics: np.ndarray, batch: 'EphemeralityBatch') -> list[dict]:
+    return [{'topic_id': topic, **ephemeralities}
+            for topic, ephemeralities in zip(topics.tolist(), batch_to_dicts(batch))]
+
+
+def batch_to_dicts(batch: 'EphemeralityBatch') -> list[dict]:
+    fields = [f'{core_type}_core' for core_type in CORE_TYPES]
+    with profiler.section('serialize'):
+        return [dict(zip(fields, values)) for values in zip(*(getattr(batch, field).tolist() for field in fields))]
+
+
+def batch_to_records(batch: 'EphemeralityBatch') -> np.ndarray:
+    with profiler.section('serialize'):
+        records = np.empty(len(batch.left_core), dtype=EPHEMERALITY_RECORD_DTYPE)
+        for field in EPHEMERALITY_RECORD_DTYPE.names:
+            records[field] = getattr(batch, field)
+    return records
+
+
+def write_npy_records(batches: Iterable['EphemeralityBatch'], output_path: str, n_vectors: int,
+                      print_results: bool = False):
+    records = np.lib.format.open_memmap(output_path, mode='w+', dtype=EPHEMERALITY_RECORD_DTYPE, shape=(n_vectors,))
+    start = 0
+    for batch in batches:
+        batch_records = batch_to_records(batch)
+        records[start:start + len(batch_records)] = batch_records
+        start += len(batch_records)
+        if print_results:
+            print_ephemeralities(batch_to_dicts(batch))
+    records.flush()
+
+
+def write_ndjson(ephemerality_list: list[dict], output_file: TextIO):
+    with profiler.section('serialize'):
+        for ephemeralities in ephemerality_list:
+            output_file.write(json.dumps(ephemeralities))
+            output_file.write('\n')
+
+
+def write_json(ephemerality_list: list[dict], output_path: str):
+    with profiler.section('serialize'), open(output_path, 'w+') as f:
+        json.dump(ephemerality_list, f, indent=2)
+
+
 def print_ephemeralities(ephemerality_list: list[dict]):
-    for ephemeralities in ephemerality_list:
-        print(f"{ephemeralities['ephemerality_original']} {ephemeralities['ephemerality_original_span']} "
-              f"{ephemeralities['ephemerality_filtered']} {ephemeralities['ephemerality_filtered_span']} "
-              f"{ephemeralities['ephemerality_sorted']} {ephemeralities['ephemerality_sorted_span']}")
+    with profiler.section('serialize'):
+        for ephemeralities in ephemerality_list:
+            topic = f"{ephemeralities['topic_id']} " if 'topic_id' in ephemeralities else ''
+            print(f"{topic}{ephemeralities['left_core']} {ephemeralities['middle_core']} "
+                  f"{ephemeralities['right_core']} {ephemeralities['sorted_core']}")
+
+
+def print_profile():
+    if profiler.enabled:
+        print(profiler.report(), file=sys.stderr)
 
 
 if __name__ == '__main__':
     parser = init_argparse()
     args = parser.parse_args()
 
+    if args.workers < 1:
+        sys.exit('Number of workers must be a positive integer!')
+    if args.chunk_size is not None and args.chunk_size < 1:
+        sys.exit('Chunk size must be a positive integer!')
+    if not args.input and (args.chunk_size is not None or args.stream):
+        sys.exit('Chunk size and streaming are only supported for input files!')
+    if args.workers > 1 and (not args.input or args.long_format
+                             or args.input.endswith(BINARY_EXTENSIONS + PARQUET_EXTENSIONS + ARROW_EXTENSIONS)):
+        sys.exit('Multiple workers are only supported for csv input files!')
+    if args.output and args.output.endswith('.npz'):
+        sys.exit('Output to .npz files is not supported, use .npy for binary output!')
+    if args.chunk_size is None:
+        args.chunk_size = 10000
+    if args.profile:
+        if args.workers > 1:
+            sys.exit('Profiling is only supported with a single worker!')
+        profiler.enable()
+
+    threshold = float(args.threshold)
     frequency_vectors = list()
+    ephemerality_list = list()
+
+    if args.long_format:
+        if not args.input or args.input.endswith(BINARY_EXTENSIONS + PARQUET_EXTENSIONS + ARROW_EXTENSIONS):
+            sys.exit('Long-format input is only supported for csv input files!')
+        if args.output and args.output.endswith('.npy'):
+            sys.exit('Output to .npy files is only supported for .npy/.npz input files!')
+        if args.n_bins is not None and args.n_bins < 1:
+            sys.exit('Number of bins must be a positive integer!')
+        from src.ephemerality_grouped import compute_ephemerality_grouped
+        topic_ids, bin_indices, counts = load_long_format(args.input)
+        with profiler.section('compute'):
+            topics, batch = compute_ephemerality_grouped(topic_ids, bin_indices, counts, n_bins=args.n_bins,
+                                                         threshold=threshold, clamp_warnings=args.clamp_warnings)
+        chunks = iter([grouped_to_dicts(topics, batch)])
+    elif args.input and args.input.endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS):
+        if not args.output or not args.output.endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS):
+            sys.exit('Parquet and Arrow input files require a Parquet or Arrow output file!')
+        from src.ephemerality_arrow import compute_ephemerality_dataset
+        compute_ephemerality_dataset(args.input, args.output, columns=args.columns.split(',') if args.columns else None,
+                                     threshold=threshold, batch_size=args.chunk_size,
+                                     clamp_warnings=args.clamp_warnings)
+        print_profile()
+        sys.exit()
+    elif args.input and args.input.endswith(BINARY_EXTENSIONS):
+        if args.sparse:
+            sys.exit('Sparse vectors are only supported for csv and command line input!')
+        binary_vectors, binary_lengths = load_frequency_vectors(args.input)
+        batches = iter_ephemerality_batches(binary_vectors, binary_lengths, threshold, args.chunk_size,
+                                            args.clamp_warnings)
+        if args.output and args.output.endswith('.npy'):
+            n_vectors = len(binary_lengths) if binary_lengths is not None else binary_vectors.shape[0]
+            write_npy_records(batches, args.output, n_vectors, print_results=args.print)
+            print_profile()
+            sys.exit()
+        chunks = (batch_to_dicts(batch) for batch in batches)
+    elif args.input:
+        if args.output and args.output.endswith('.npy'):
+            sys.exit('Output to .npy files is only supported for .npy/.npz input files!')
+        chunks = iter_ephemerality_chunks(args.input, threshold, args.workers, args.chunk_size, args.sparse,
+                                          args.clamp_warnings)
+
+    if args.input and args.stream:
+        output_context = open(args.output, 'w+') if args.output else contextlib.nullcontext()
+        with output_context as out:
+            for chunk_ephemeralities in chunks:
+                if args.output:
+                    write_ndjson(chunk_ephemeralities, out)
+                if not args.output or args.print:
+                    print_ephemeralities(chunk_ephemeralities)
+        print_profile()
+        sys.exit()
 
     if args.input:
-        with open(args.input, 'r') as f:
-            for line in f.readlines():
-                if line.strip():
-                    frequency_vectors.append(np.array(line.split(','), dtype=float))
+        for chunk_ephemeralities in chunks:
+            ephemerality_list.extend(chunk_ephemeralities)
     else:
         if len(args.frequencies) > 1:
-            frequency_vectors.append(np.array(args.frequencies, dtype=float))
+            frequency_vectors.append(args.frequencies)
         elif len(args.frequencies) == 1:
             if ' ' in args.frequencies[0]:
-                frequency_vectors.append(np.array(args.frequencies[0].split(' '), dtype=float))
+                frequency_vectors.append(args.frequencies[0].split(' '))
             else:
-                frequency_vectors.append(np.array(args.frequencies[0].split(','), dtype=float))
+                frequency_vectors.append(args.frequencies[0].split(','))
         else:
             sys.exit('No input provided!')
 
-    threshold = float(args.threshold)
-
-    ephemerality_list = list()
-    for frequency_vector in frequency_vectors:
-        ephemerality_list.append(compute_ephemerality(frequency_vector=frequency_vector, threshold=threshold).dict())
+    ephemerality_list.extend(compute_tokens_ephemeralities(frequency_vectors, threshold, args.sparse,
+                                                           args.clamp_warnings))
 
     if args.output:
-        with open(args.output, 'w+') as f:
-            json.dump(ephemerality_list, f, indent=2)
+        write_json(ephemerality_list, args.output)
         if args.print:
             print_ephemeralities(ephemerality_list)
     else:
         print_ephemeralities(ephemerality_list)
+    print_profile()
@@ -1,48 +1,283 @@
-from fastapi import FastAPI, status
+import os
+import time
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, Sequence, Union
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 import rest.api11 as api11
-from src import EphemeralitySet
+from rest.metrics import ServiceMetrics
+from src import EphemeralitySet, EphemeralityCache, FlaggedEphemeralityTuple, warn_clamped
 
 
+MAX_BATCH_SIZE = int(os.environ.get('EPHEMERALITY_MAX_BATCH_SIZE', 10000))
+# Inputs with at least this many frequencies in total are computed in worker processes, smaller ones in threads
+PROCESS_POOL_MIN_SIZE = int(os.environ.get('EPHEMERALITY_PROCESS_POOL_MIN_SIZE', 100000))
+THREAD_POOL_WORKERS = int(os.environ.get('EPHEMERALITY_THREAD_POOL_WORKERS', 4))
+PROCESS_POOL_WORKERS = int(os.environ.get('EPHEMERALITY_PROCESS_POOL_WORKERS', os.cpu_count() or 1))
+# Requests beyond these numbers of running and queued computations are rejected with 503 instead of queueing up
+MAX_PENDING_COMPUTATIONS = int(os.environ.get('EPHEMERALITY_MAX_PENDING_COMPUTATIONS', 64))
+MAX_PENDING_PROCESS_COMPUTATIONS = int(os.environ.get('EPHEMERALITY_MAX_PENDING_PROCESS_COMPUTATIONS',
+                                                      2 * PROCESS_POOL_WORKERS))
+# Results of repeated single-vector requests computed in the thread pool are cached when the cache size is positive,
+# optionally for TTL seconds
+CACHE_SIZE = int(os.environ.get('EPHEMERALITY_CACHE_SIZE', 0))
+CACHE_TTL = float(os.environ['EPHEMERALITY_CACHE_TTL']) if os.environ.get('EPHEMERALITY_CACHE_TTL') else None
+# Request latencies, vector lengths and rounded up values are only recorded and served at /metrics if this is set to 1
+METRICS_ENABLED = os.environ.get('EPHEMERALITY_METRICS', '0') == '1'
+
+_TYPES = ('all', 'left', 'middle', 'right', 'sorted')
+
 app = FastAPI()
 
+_thread_pool = ThreadPoolExecutor(max_workers=THREAD_POOL_WORKERS)
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pending_computations = {'thread': 0, 'process': 0}
+_cache = EphemeralityCache(max_entries=CACHE_SIZE, ttl=CACHE_TTL) if CACHE_SIZE > 0 else None
+_metrics = ServiceMetrics() if METRICS_ENABLED else None
+
 
 class InputData(BaseModel):
     input_vector: list[float]
     threshold: float
 
 
+class SparseInputData(BaseModel):
+    length: int
+    indices: list[int]
+    values: list[float]
+    threshold: float = 0.8
+    types: str = 'all'
+
+
+class BatchInputData(BaseModel):
+    input_vectors: list[list[float]]
+    threshold: Union[float, list[float]] = 0.8
+    types: str = 'all'
+
+
+class BatchOutputData(BaseModel):
+    left_core: Optional[list[float]] = None
+    left_core_span: Optional[list[int]] = None
+    middle_core: Optional[list[float]] = None
+    middle_core_span: Optional[list[int]] = None
+    right_core: Optional[list[float]] = None
+    right_core_span: Optional[list[int]] = None
+    sorted_core: Optional[list[float]] = None
+    sorted_core_span: Optional[list[int]] = None
+
+
+if _metrics is not None:
+    @app.middleware("http")
+    async def observe_request_latency(request: Request, call_next):
+        start = time.perf_counter()
+        # Unhandled exceptions propagate through `call_next` and become 500 responses
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            endpoint = request.scope.get('endpoint')
+            _metrics.observe_request(endpoint.__name__ if endpoint is not None else 'unmatched', status_code,
+                                     time.perf_counter() - start)
+
+
+def _observe_vector_lengths(endpoint: str, lengths: Sequence[int]):
+    # Labelled with the name of the route function, like the request latencies
+    if _metrics is not None:
+        _metrics.observe_vector_lengths(endpoint, lengths)
+
+
+def _report_clamped(clamped: Sequence[int]):
+    # Rounded up values are counted from the flags of the results rather than from the warnings, which the warning
+    # filters suppress when repeated and which worker processes do not report back. A single summary warning is logged.
+    if _metrics is not None:
+        _metrics.observe_clamped(clamped)
+    warn_clamped(clamped)
+
+
+def _split_clamped(ephemeralities: FlaggedEphemeralityTuple) -> tuple[EphemeralitySet, int]:
+    return EphemeralitySet.construct(left_core=ephemeralities.left_core,
+                                     middle_core=ephemeralities.middle_core,
+                                     right_core=ephemeralities.right_core,
+                                     sorted_core=ephemeralities.sorted_core), ephemeralities.clamped
+
+
+def _compute_flagged(computation: Callable, **kwargs) -> tuple[EphemeralitySet, int]:
+    return _split_clamped(computation(**kwargs, result_type='flagged'))
+
+
+def _check_batch_input(input_data: BatchInputData):
+    # Client errors are rejected before the computation, which would otherwise fail with a 500 or return no cores
+    if input_data.types not in _TYPES:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f'Unrecognized types: {input_data.types}!')
+    thresholds = input_data.threshold if isinstance(input_data.threshold, list) else [input_data.threshold]
+    if isinstance(input_data.threshold, list) and len(thresholds) != len(input_data.input_vectors):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail='Number of thresholds does not match the number of input vectors!')
+    if any(not 0. < threshold <= 1. for threshold in thresholds):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail='Threshold values must be within (0, 1] range!')
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    # Worker processes are only started once the first large input arrives
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS)
+    return _process_pool
+
+
+async def _run_computation(input_size: int, function: Callable, **kwargs):
+    """
+    Runs the computation outside the event loop, so one large input does not stall other requests. The counters are
+    only touched from the event loop thread and need no locking.
+    """
+    if input_size >= PROCESS_POOL_MIN_SIZE:
+        pool_type, max_pending = 'process', MAX_PENDING_PROCESS_COMPUTATIONS
+    else:
+        pool_type, max_pending = 'thread', MAX_PENDING_COMPUTATIONS
+    if _pending_computations[pool_type] >= max_pending:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail='Too many computations in progress, please retry later!')
+
+    executor: Executor = _get_process_pool() if pool_type == 'process' else _thread_pool
+    _pending_computations[pool_type] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(function, **kwargs))
+    finally:
+        _pending_computations[pool_type] -= 1
+
+
+def _compute_cached(computation: Callable, types: str, input_vector: list[float],
+                    threshold: float) -> tuple[EphemeralitySet, int]:
+    # Runs in the thread pool, as hashing a long vector into its key would block the event loop. Cached results were
+    # already reported as rounded up, so they are returned without flags.
+    key = _cache.key(input_vector, threshold, types)
+    ephemeralities = _cache.get(key)
+    if ephemeralities is not None:
+        return ephemeralities, 0
+    ephemeralities, clamped = _compute_flagged(computation, input_vector=input_vector, threshold=threshold)
+    _cache.put(key, ephemeralities)
+    return ephemeralities, clamped
+
+
+async def _compute_ephemeralities(input_data: InputData, function: Callable, types: str,
+                                  endpoint: str) -> EphemeralitySet:
+    _observe_vector_lengths(endpoint, (len(input_data.input_vector),))
+    input_size = len(input_data.input_vector)
+    # The cache lives in this process, so inputs computed in worker processes are not cached
+    if _cache is None or input_size >= PROCESS_POOL_MIN_SIZE:
+        ephemeralities, clamped = await _run_computation(input_size, _compute_flagged, computation=function,
+                                                         input_vector=input_data.input_vector,
+                                                         threshold=input_data.threshold)
+    else:
+        ephemeralities, clamped = await _run_computation(input_size, _compute_cached, computation=function,
+                                                         types=types, input_vector=input_data.input_vector,
+                                                         threshold=input_data.threshold)
+    _report_clamped((clamped,))
+    return ephemeralities
+
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    _thread_pool.shutdown(wait=False, cancel_futures=True)
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+@app.get("/ephemerality/cache", status_code=status.HTTP_200_OK)
+async def get_cache_stats() -> dict:
+    return {'enabled': False} if _cache is None else {'enabled': True, **_cache.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, status_code=status.HTTP_200_OK)
+async def get_metrics() -> PlainTextResponse:
+    if _metrics is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail='Metrics are disabled, set EPHEMERALITY_METRICS=1 to enable them!')
+    return PlainTextResponse(_metrics.render(), media_type='text/plain; version=0.0.4')
+
+
 @app.post("/ephemerality/{api_version}/all", status_code=status.HTTP_200_OK)
 async def get_all_ephemeralities(api_version: str, input_data: InputData) -> EphemeralitySet:
     if api_version == '1.1':
-        return api11.get_all_ephemeralities(input_vector=input_data.input_vector, threshold=input_data.threshold)
+        return await _compute_ephemeralities(input_data, api11.get_all_ephemeralities, 'all',
+                                             get_all_ephemeralities.__name__)
     else:
         raise ValueError(f'Unrecognized API version: {api_version}!')
 
 @app.post("/ephemerality/{api_version}/left", status_code=status.HTTP_200_OK)
 async def get_left_core_ephemeralities(api_version: str, input_data: InputData) -> EphemeralitySet:
     if api_version == '1.1':
-        return api11.get_left_core_ephemerality(input_vector=input_data['input_vector'], threshold=input_data['threshold'])
+        return await _compute_ephemeralities(input_data, api11.get_left_core_ephemerality, 'left',
+                                             get_left_core_ephemeralities.__name__)
     else:
         raise ValueError(f'Unrecognized API version: {api_version}!')
 
 @app.post("/ephemerality/{api_version}/middle", status_code=status.HTTP_200_OK)
 async def get_middle_core_ephemeralities(api_version: str, input_data: InputData) -> EphemeralitySet:
     if api_version == '1.1':
-        return api11.get_middle_core_ephemerality(input_vector=input_data['input_vector'], threshold=input_data['threshold'])
+        return await _compute_ephemeralities(input_data, api11.get_middle_core_ephemerality, 'middle',
+                                             get_middle_core_ephemeralities.__name__)
     else:
         raise ValueError(f'Unrecognized API version: {api_version}!')
 
 @app.post("/ephemerality/{api_version}/right", status_code=status.HTTP_200_OK)
 async def get_right_core_ephemeralities(api_version: str, input_data: InputData) -> EphemeralitySet:
     if api_version == '1.1':
-        return api11.get_right_core_ephemerality(input_vector=input_data['input_vector'], threshold=input_data['threshold'])
+        return await _compute_ephemeralities(input_data, api11.get_right_core_ephemerality, 'right',
+                                             get_right_core_ephemeralities.__name__)
     else:
         raise ValueError(f'Unrecognized API version: {api_version}!')
 
 @app.post("/ephemerality/{api_version}/sorted", status_code=status.HTTP_200_OK)
 async def get_sorted_core_ephemeralities(api_version: str, input_data: InputData) -> EphemeralitySet:
     if api_version == '1.1':
-        return api11.get_sorted_core_ephemerality(input_vector=input_data['input_vector'], threshold=input_data['threshold'])
+        return await _compute_ephemeralities(input_data, api11.get_sorted_core_ephemerality, 'sorted',
+                                             get_sorted_core_ephemeralities.__name__)
+    else:
+        raise ValueError(f'Unrecognized API version: {api_version}!')
+
+@app.post("/ephemerality/{api_version}/batch", response_model=BatchOutputData, status_code=status.HTTP_200_OK)
+async def get_batch_ephemeralities(api_version: str, input_data: BatchInputData) -> JSONResponse:
+    if len(input_data.input_vectors) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f'Batch size exceeds the maximum of {MAX_BATCH_SIZE} vectors!')
+    _check_batch_input(input_data)
+    if api_version == '1.1':
+        _observe_vector_lengths(get_batch_ephemeralities.__name__,
+                                [len(input_vector) for input_vector in input_data.input_vectors])
+        input_size = sum(len(input_vector) for input_vector in input_data.input_vectors)
+        batch = await _run_computation(input_size, api11.get_batch_ephemeralities,
+                                       input_vectors=input_data.input_vectors, threshold=input_data.threshold,
+                                       types=input_data.types, clamp_warnings='none', clamp_flags=True)
+        _report_clamped(batch.clamped)
+        # Columns are serialized as they are, skipping the per-element validation of the response model
+        return JSONResponse(content={field: values.tolist() for field, values in batch.dict().items()
+                                     if values is not None and field != 'clamped'})
     else:
-        raise ValueError(f'Unrecognized API version: {api_version}!')
\ No newline at end of file
+        raise ValueError(f'Unrecognized API version: {api_version}!')
+
+
+@app.post("/ephemerality/{api_version}/sparse", status_code=status.HTTP_200_OK)
+async def get_sparse_ephemeralities(api_version: str, input_data: SparseInputData) -> EphemeralitySet:
+    if api_version == '1.1':
+        _observe_vector_lengths(get_sparse_ephemeralities.__name__, (input_data.length,))
+        try:
+            ephemeralities, clamped = await _run_computation(len(input_data.values), _compute_flagged,
+                                                             computation=api11.get_sparse_ephemeralities,
+                                                             length=input_data.length, indices=input_data.indices,
+                                                             values=input_data.values,
+                                                             threshold=input_data.threshold, types=input_data.types)
+        except ValueError as error:
+            # Indices out of range, mismatched indices and values, negative values or an invalid threshold
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(error))
+        _report_clamped((clamped,))
+        return ephemeralities
+    else:
+        raise ValueError(f'Unrecognized API version: {api_version}!')
@@ -1,18 +1,49 @@
-from typing import Sequence
-from src import compute_ephemerality, EphemeralitySet
+import itertools
+from typing import Sequence, Union
+import numpy as np
+from src import compute_ephemerality, compute_ephemerality_batch, compute_ephemerality_sparse, EphemeralitySet, \
+    EphemeralityBatch, FlaggedEphemeralityTuple
 
 
-def get_all_ephemeralities(input_vector: Sequence[float], threshold: float) -> EphemeralitySet:
-    return compute_ephemerality(frequency_vector=input_vector, threshold=threshold, types='all')
+def get_all_ephemeralities(input_vector: Sequence[float], threshold: float,
+                           result_type: str = 'model') -> Union[EphemeralitySet, FlaggedEphemeralityTuple]:
+    return compute_ephemerality(frequency_vector=input_vector, threshold=threshold, types='all',
+                                result_type=result_type)
 
-def get_left_core_ephemerality(input_vector: Sequence[float], threshold: float) -> EphemeralitySet:
-    return compute_ephemerality(frequency_vector=input_vector, threshold=threshold, types='left')
+def get_left_core_ephemerality(input_vector: Sequence[float], threshold: float,
+                               result_type: str = 'model') -> Union[EphemeralitySet, FlaggedEphemeralityTuple]:
+    return compute_ephemerality(frequency_vector=input_vector, threshold=threshold, types='left',
+                                result_type=result_type)
 
-def get_middle_core_ephemerality(input_vector: Sequence[float], threshold: float) -> EphemeralitySet:
-    return compute_ephemerality(frequency_vector=input_vector, threshold=threshold, types='middle')
+def get_middle_core_ephemerality(input_vector: Sequence[float], threshold: float,
+                                 result_type: str = 'model') -> Union[EphemeralitySet, FlaggedEphemeralityTuple]:
+    return compute_ephemerality(frequency_vector=input_vector, threshold=threshold, types='middle',
+                                result_type=result_type)
 
-def get_right_core_ephemerality(input_vector: Sequence[float], threshold: float) -> EphemeralitySet:
-    return compute_ephemerality(frequency_vector=input_vector, threshold=threshold, types='right')
+def get_right_core_ephemerality(input_vector: Sequence[float], threshold: float,
+                                result_type: str = 'model') -> Union[EphemeralitySet, FlaggedEphemeralityTuple]:
+    return compute_ephemerality(frequency_vector=input_vector, threshold=threshold, types='right',
+                                result_type=result_type)
 
-def get_sorted_core_ephemerality(input_vector: Sequence[float], threshold: float) -> EphemeralitySet:
-    return compute_ephemerality(frequency_vector=input_vector, threshold=threshold, types='sorted')
\ No newline at end of file
+def get_sorted_core_ephemerality(input_vector: Sequence[float], threshold: float,
+                                 result_type: str = 'model') -> Union[EphemeralitySet, FlaggedEphemeralityTuple]:
+    return compute_ephemerality(frequency_vector=input_vector, threshold=threshold, types='sorted',
+                                result_type=result_type)
+
+
+def get_sparse_ephemeralities(length: int, indices: Sequence[int], values: Sequence[float], threshold: float,
+                              types: str = 'all',
+                              result_type: str = 'model') -> Union[EphemeralitySet, FlaggedEphemeralityTuple]:
+    return compute_ephemerality_sparse(frequency_vector=(length, indices, values), threshold=threshold, types=types,
+                                       result_type=result_type)
+
+
+def get_batch_ephemeralities(input_vectors: Sequence[Sequence[float]], threshold: Union[float, Sequence[float]],
+                             types: str = 'all', clamp_warnings: str = 'each',
+                             clamp_flags: bool = False) -> EphemeralityBatch:
+    # Vectors are copied straight into one flat buffer, so the whole request is computed in a single vectorized call
+    lengths = np.fromiter((len(input_vector) for input_vector in input_vectors), dtype=np.int64,
+                          count=len(input_vectors))
+    frequency_vectors = np.fromiter(itertools.chain.from_iterable(input_vectors), dtype=float, count=np.sum(lengths))
+    return compute_ephemerality_batch(frequency_vectors, threshold=threshold, types=types, lengths=lengths,
+                                      clamp_warnings=clamp_warnings, clamp_flags=clamp_flags)
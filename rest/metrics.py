@@ -0,0 +1,103 @@
+import bisect
+import threading
+from typing import Sequence
+
+from src import count_clamped
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5., 10.)
+VECTOR_LENGTH_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+def _render_labels(labels: Sequence[str], label_values: Sequence[str]) -> str:
+    return ','.join(f'{label}="{value}"' for label, value in zip(labels, label_values))
+
+
+class Histogram:
+    """Cumulative histogram per tuple of label values, rendered in the Prometheus text exposition format"""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, label_values: Sequence[str], value: float):
+        label_values = tuple(label_values)
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for label_values, (counts, total) in sorted(self._series.items()):
+            labels = _render_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+class Counter:
+    """Counter per tuple of label values, rendered in the Prometheus text exposition format"""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._series = {}
+
+    def inc(self, label_values: Sequence[str], amount: int = 1):
+        label_values = tuple(label_values)
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for label_values, count in sorted(self._series.items()):
+            lines.append(f'{self.name}{{{_render_labels(self.labels, label_values)}}} {count}')
+        return lines
+
+
+class ServiceMetrics:
+    """
+    Request latency histograms per endpoint and response status, vector length histograms per endpoint and counts of
+    the ephemerality values rounded up to 0 per core type. Observations may come from the event loop and from executor
+    threads, so all updates take a lock.
+    """
+
+    def __init__(self):
+        self.request_latency = Histogram('ephemerality_request_duration_seconds', 'Request latency in seconds.',
+                                         ('endpoint', 'status'), LATENCY_BUCKETS)
+        self.vector_length = Histogram('ephemerality_vector_length', 'Lengths of the frequency vectors.',
+                                       ('endpoint',), VECTOR_LENGTH_BUCKETS)
+        self.clamped = Counter('ephemerality_clamped_total', 'Ephemerality values less than 0 rounded up to 0.',
+                               ('core',))
+        self._lock = threading.Lock()
+
+    def observe_request(self, endpoint: str, status_code: int, seconds: float):
+        with self._lock:
+            self.request_latency.observe((endpoint, str(status_code)), seconds)
+
+    def observe_vector_lengths(self, endpoint: str, lengths: Sequence[int]):
+        with self._lock:
+            for length in lengths:
+                self.vector_length.observe((endpoint,), length)
+
+    def observe_clamped(self, clamped: Sequence[int]):
+        """Counts the rounded up values of the results with the given `clamped` bitmasks per core type"""
+        counts = count_clamped(clamped)
+        with self._lock:
+            for core_type, count in counts.items():
+                if count:
+                    self.clamped.inc((core_type,), count)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = self.request_latency.render() + self.vector_length.render() + self.clamped.render()
+        return '\n'.join(lines) + '\n'
@@ -1,3 +1,63 @@
-from src.ephemerality_computation import compute_ephemerality, EphemeralitySet
+import importlib
 
-__all__ = ['compute_ephemerality', 'EphemeralitySet']
+# Names are imported from their modules on first access (PEP 562), so that `import src` does not import NumPy or
+# pydantic and each entry point only pays for the modules it uses
+_EXPORTS = {
+    'compute_ephemerality': 'src.ephemerality_computation',
+    'EphemeralitySet': 'src.ephemerality_models',
+    'EphemeralityTuple': 'src.ephemerality_scalar',
+    'set_backend': 'src.ephemerality_computation',
+    'get_backend': 'src.ephemerality_computation',
+    'available_backends': 'src.ephemerality_computation',
+    'FlaggedEphemeralityTuple': 'src.ephemerality_computation',
+    'CLAMP_FLAGS': 'src.ephemerality_computation',
+    'count_clamped': 'src.ephemerality_computation',
+    'warn_clamped': 'src.ephemerality_computation',
+    'compute_ephemerality_small': 'src.ephemerality_scalar',
+    'compute_ephemerality_batch': 'src.ephemerality_batch',
+    'EphemeralityBatch': 'src.ephemerality_batch',
+    'compute_ephemerality_sweep': 'src.ephemerality_sweep',
+    'SWEEP_CORE_TYPES': 'src.ephemerality_sweep',
+    'IncrementalEphemerality': 'src.ephemerality_incremental',
+    'compute_ephemerality_rolling': 'src.ephemerality_rolling',
+    'EphemeralityCache': 'src.ephemerality_cache',
+    'compute_ephemerality_sparse': 'src.ephemerality_sparse',
+    'compute_ephemerality_from_timestamps': 'src.ephemerality_timestamps',
+    'compute_ephemerality_multiresolution': 'src.ephemerality_multiresolution',
+    'profiler': 'src.ephemerality_profiling',
+    'HotPathProfiler': 'src.ephemerality_profiling',
+    'compute_ephemerality_dataset': 'src.ephemerality_arrow',
+    'compute_record_batch_ephemerality': 'src.ephemerality_arrow',
+    'compute_ephemerality_grouped': 'src.ephemerality_grouped',
+    'group_long_format': 'src.ephemerality_grouped',
+}
+
+__all__ = ['compute_ephemerality', 'EphemeralitySet', 'EphemeralityTuple',
+           'set_backend', 'get_backend', 'available_backends',
+           'FlaggedEphemeralityTuple', 'CLAMP_FLAGS', 'count_clamped', 'warn_clamped',
+           'compute_ephemerality_small',
+           'compute_ephemerality_batch', 'EphemeralityBatch',
+           'compute_ephemerality_sweep', 'SWEEP_CORE_TYPES',
+           'IncrementalEphemerality',
+           'compute_ephemerality_rolling',
+           'EphemeralityCache',
+           'compute_ephemerality_sparse',
+           'compute_ephemerality_from_timestamps',
+           'compute_ephemerality_multiresolution',
+           'profiler', 'HotPathProfiler',
+           'compute_ephemerality_dataset', 'compute_record_batch_ephemerality',
+           'compute_ephemerality_grouped', 'group_long_format']
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module_name), name)
+    # Cached as a module attribute, so later accesses do not go through `__getattr__`
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
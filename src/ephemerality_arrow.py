@@ -0,0 +1,166 @@
+import numpy as np
+from typing import Any, Iterable, Iterator, Sequence
+
+from src.ephemerality_profiling import profiler
+
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+_CORE_TYPES = ('left', 'middle', 'right', 'sorted')
+
+
+def _pyarrow():
+    # PyArrow is an optional dependency, only needed for Parquet and Arrow IPC datasets
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError('Parquet and Arrow datasets require the pyarrow package to be installed!') from error
+    return pyarrow
+
+
+def _is_list_type(pa: Any, data_type: Any) -> bool:
+    return pa.types.is_list(data_type) or pa.types.is_large_list(data_type)
+
+
+def _list_buffers(pa: Any, column: Any) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # The offsets of a sliced list array index into its whole child array, so the values are sliced by the offsets
+    offsets = column.offsets.to_numpy()
+    values = column.values.slice(offsets[0], offsets[-1] - offsets[0])
+    if values.null_count:
+        values = values.fill_null(0)
+    if not pa.types.is_floating(values.type):
+        values = values.cast(pa.float64())
+    # Zero-copy view of the Arrow values buffer
+    values = values.to_numpy(zero_copy_only=True)
+    lengths = np.diff(offsets)
+    nulls = column.is_null().to_numpy(zero_copy_only=False) if column.null_count else None
+    return values, lengths, nulls
+
+
+def compute_record_batch_ephemerality(
+        record_batch: Any,
+        columns: Sequence[str] = None,
+        threshold: float = 0.8,
+        types: str = 'all',
+        clamp_warnings: str = 'each') -> Any:
+    """
+    Computes ephemerality of every list<float> column of an Arrow record batch, or only of `columns`, straight from the
+    Arrow list buffers. Returns the record batch extended with `{column}_{core type}_core` and
+    `{column}_{core type}_core_span` columns. Null lists get null results.
+    """
+
+    # Imported here so that the command line can check the dataset file extensions without importing pydantic
+    from src.ephemerality_batch import compute_ephemerality_batch
+
+    pa = _pyarrow()
+    if columns is None:
+        columns = [field.name for field in record_batch.schema if _is_list_type(pa, field.type)]
+
+    arrays = list(record_batch.columns)
+    names = list(record_batch.schema.names)
+    for name in columns:
+        column = record_batch.column(name)
+        if not _is_list_type(pa, column.type):
+            raise ValueError(f'Column {name} is not a list column!')
+        with profiler.section('parse'):
+            values, lengths, nulls = _list_buffers(pa, column)
+        with profiler.section('compute'):
+            batch = compute_ephemerality_batch(values, threshold=threshold, types=types, lengths=lengths,
+                                               clamp_warnings=clamp_warnings)
+        for core_type in _CORE_TYPES:
+            if types != 'all' and types != core_type:
+                continue
+            for suffix in ('core', 'core_span'):
+                names.append(f'{name}_{core_type}_{suffix}')
+                arrays.append(pa.array(getattr(batch, f'{core_type}_{suffix}'), mask=nulls))
+
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def iter_record_batches(input_path: str, batch_size: int = 65536) -> Iterator[Any]:
+    """Reads a Parquet or Arrow IPC file one record batch at a time"""
+    pa = _pyarrow()
+    if input_path.endswith(PARQUET_EXTENSIONS):
+        yield from pa.parquet.ParquetFile(input_path).iter_batches(batch_size=batch_size)
+    elif input_path.endswith(ARROW_EXTENSIONS):
+        # Memory-mapped, so only the record batch being processed is paged in
+        with pa.memory_map(input_path, 'r') as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                record_batch = reader.get_batch(i)
+                for start in range(0, max(record_batch.num_rows, 1), batch_size):
+                    yield record_batch.slice(start, batch_size)
+    else:
+        raise ValueError(f'Unrecognized dataset file extension: {input_path}!')
+
+
+def read_schema(input_path: str) -> Any:
+    """Reads the schema of a Parquet or Arrow IPC file without reading its record batches"""
+    pa = _pyarrow()
+    if input_path.endswith(PARQUET_EXTENSIONS):
+        return pa.parquet.read_schema(input_path)
+    elif input_path.endswith(ARROW_EXTENSIONS):
+        with pa.memory_map(input_path, 'r') as source:
+            return pa.ipc.open_file(source).schema
+    else:
+        raise ValueError(f'Unrecognized dataset file extension: {input_path}!')
+
+
+def _open_writer(pa: Any, output_path: str, schema: Any) -> Any:
+    if output_path.endswith(PARQUET_EXTENSIONS):
+        return pa.parquet.ParquetWriter(output_path, schema)
+    return pa.ipc.new_file(output_path, schema)
+
+
+def write_record_batches(record_batches: Iterable[Any], output_path: str, schema: Any = None) -> int:
+    """
+    Writes record batches to a Parquet or Arrow IPC file as they arrive and returns the number of rows written. Without
+    any record batches, an empty file with `schema` is written if it is given.
+    """
+    pa = _pyarrow()
+    if not output_path.endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS):
+        raise ValueError(f'Unrecognized dataset file extension: {output_path}!')
+
+    writer = None
+    n_rows = 0
+    try:
+        for record_batch in record_batches:
+            if writer is None:
+                writer = _open_writer(pa, output_path, record_batch.schema)
+            with profiler.section('serialize'):
+                writer.write_batch(record_batch)
+            n_rows += record_batch.num_rows
+        if writer is None and schema is not None:
+            writer = _open_writer(pa, output_path, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
+
+
+def compute_ephemerality_dataset(
+        input_path: str,
+        output_path: str,
+        columns: Sequence[str] = None,
+        threshold: float = 0.8,
+        types: str = 'all',
+        batch_size: int = 65536,
+        clamp_warnings: str = 'each') -> int:
+    """
+    Computes ephemerality of the list<float> columns of a Parquet or Arrow IPC file (one frequency vector per row and
+    column) and writes the input columns together with the result columns of `compute_record_batch_ephemerality` to
+    `output_path`. The dataset is scanned `batch_size` rows at a time, so memory use is bounded by the batch size
+    rather than the dataset size. Returns the number of rows processed.
+    """
+
+    if batch_size < 1:
+        raise ValueError('Batch size must be a positive integer!')
+
+    record_batches = (compute_record_batch_ephemerality(record_batch, columns, threshold, types, clamp_warnings)
+                      for record_batch in iter_record_batches(input_path, batch_size))
+    # The output schema of an empty dataset is found by computing an empty record batch
+    empty_batch = _pyarrow().RecordBatch.from_pylist([], schema=read_schema(input_path))
+    schema = compute_record_batch_ephemerality(empty_batch, columns, threshold, types, clamp_warnings).schema
+    return write_record_batches(record_batches, output_path, schema)
@@ -0,0 +1,325 @@
+import numpy as np
+from typing import Optional, Sequence, Union
+from pydantic import BaseModel
+import warnings
+
+from src.ephemerality_computation import CLAMP_FLAGS, _ATOL, _as_float_array, _check_threshold, \
+    _ephemerality_raise_error, _reach_bound, _exceed_bound, count_clamped, warn_clamped
+
+
+class EphemeralityBatch(BaseModel):
+    """Class to contain columnar ephemerality values and core spans by subtypes, one row per input vector"""
+    left_core: np.ndarray = None
+    left_core_span: np.ndarray = None
+    middle_core: np.ndarray = None
+    middle_core_span: np.ndarray = None
+    right_core: np.ndarray = None
+    right_core_span: np.ndarray = None
+    sorted_core: np.ndarray = None
+    sorted_core_span: np.ndarray = None
+    clamped: np.ndarray = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+# Ragged batches whose padding to the longest vector would take more than this many times the size of the vectors
+# themselves are computed in groups of vectors of similar lengths
+_MAX_PADDING_RATIO = 4
+
+_CLAMP_WARNINGS = {
+    'left': 'original ephemerality value(s) are less than 0 and are going to be rounded up! '
+            'This is indicative of the edge case in which ephemerality span is greater than '
+            '[threshold * input_vector_length], i.e. most of the frequency mass lies in a few vector '
+            'elements at the end of the frequency vector. Original ephemerality in this case should be '
+            'considered to be equal to 0. However, please double check the input vectors!',
+    'middle': 'filtered ephemerality value(s) are less than 0 and are going to be rounded up! '
+              'This is indicative of the edge case in which ephemerality span is greater than '
+              '[threshold * input_vector_length], i.e. most of the frequency mass lies in a few elements '
+              'at the beginning and the end of the frequency vector. Filtered ephemerality in this case should '
+              'be considered to be equal to 0. However, please double check the input vectors!',
+    'right': 'original ephemerality value(s) are less than 0 and are going to be rounded up! '
+             'This is indicative of the edge case in which ephemerality span is greater than '
+             '[threshold * input_vector_length], i.e. most of the frequency mass lies in a few vector '
+             'elements at the end of the frequency vector. Original ephemerality in this case should be '
+             'considered to be equal to 0. However, please double check the input vectors!',
+    'sorted': 'sorted ephemerality value(s) are less than 0 and are going to be rounded up! '
+              'This is indicative of the rare edge case of very short and mostly uniform frequency vector (so '
+              'that ephemerality span is greater than [threshold * input_vector_length]). '
+              'Sorted ephemerality in this case should be considered to be equal to 0. '
+              'However, please double check the input vectors!'
+}
+
+
+def _check_lengths(frequency_vectors: np.ndarray, lengths: Sequence[int]) -> np.ndarray:
+    lengths = np.asarray(lengths, dtype=np.int64)
+    if lengths.ndim != 1:
+        raise ValueError('Lengths must be a 1-D array!')
+    if np.any(lengths < 0):
+        raise ValueError('Lengths must be non-negative!')
+
+    if frequency_vectors.ndim == 1:
+        # Ragged vectors concatenated into a single flat array
+        if frequency_vectors.shape[0] != lengths.sum():
+            raise ValueError('Flat frequency vector size does not match the sum of lengths!')
+    elif frequency_vectors.ndim != 2 or frequency_vectors.shape[0] != lengths.shape[0]:
+        raise ValueError('Padded frequency matrix must be 2-D and have one row per length!')
+    elif lengths.size and lengths.max() > frequency_vectors.shape[1]:
+        raise ValueError('Lengths cannot exceed the number of columns of the padded frequency matrix!')
+    return lengths
+
+
+def _to_padded_matrix(frequency_vectors: np.ndarray, lengths: Sequence[int] = None) -> tuple[np.ndarray, np.ndarray]:
+    frequency_vectors = _as_float_array(frequency_vectors)
+
+    if lengths is None:
+        if frequency_vectors.ndim != 2:
+            raise ValueError('Frequency vectors must be a 2-D array if their lengths are not provided!')
+        lengths = np.full(frequency_vectors.shape[0], frequency_vectors.shape[1], dtype=np.int64)
+        return frequency_vectors, lengths
+
+    lengths = _check_lengths(frequency_vectors, lengths)
+    max_length = int(lengths.max()) if lengths.size else 0
+    valid = np.arange(max_length) < lengths[:, None]
+
+    if frequency_vectors.ndim == 1:
+        matrix = np.zeros((lengths.shape[0], max_length), dtype=frequency_vectors.dtype)
+        matrix[valid] = frequency_vectors
+        return matrix, lengths
+
+    # Padding may contain arbitrary values, they must not contribute to the mass
+    matrix = np.where(valid, frequency_vectors[:, :max_length], 0.)
+    return matrix, lengths
+
+
+def _length_groups(lengths: np.ndarray) -> Optional[list[np.ndarray]]:
+    # Rows of each group of vectors of similar lengths, or None if the batch can be padded as a whole
+    if lengths.shape[0] * int(lengths.max(initial=0)) <= _MAX_PADDING_RATIO * (int(lengths.sum()) + lengths.shape[0]):
+        return None
+    # Vectors are grouped by the power of 2 their length rounds up to, so padding a group at most doubles its size
+    exponents = np.ceil(np.log2(np.maximum(lengths, 1))).astype(np.int64)
+    return [np.flatnonzero(exponents == exponent) for exponent in np.unique(exponents)]
+
+
+def _first_true(mask: np.ndarray, threshold: Union[float, np.ndarray]) -> np.ndarray:
+    # `threshold` is either a scalar or a column of per-vector thresholds
+    indices = np.argmax(mask, axis=1)
+    found = mask[np.arange(mask.shape[0]), indices]
+    if not np.all(found):
+        _ephemerality_raise_error(np.broadcast_to(threshold, (mask.shape[0], 1))[np.argmin(found), 0])
+    return indices
+
+
+def compute_left_core_lengths(cumulative_sums: np.ndarray, threshold: float) -> np.ndarray:
+    return _first_true(cumulative_sums >= _reach_bound(threshold), threshold) + 1
+
+
+def _reversed_cumulative_sums(normalized_matrix: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    if np.all(lengths == normalized_matrix.shape[1]):
+        reversed_matrix = normalized_matrix[:, ::-1]
+    else:
+        indices = lengths[:, None] - 1 - np.arange(normalized_matrix.shape[1])
+        reversed_matrix = np.take_along_axis(normalized_matrix, np.maximum(indices, 0), axis=1)
+        reversed_matrix[indices < 0] = 0.
+
+    return np.cumsum(reversed_matrix, axis=1)
+
+
+def _sorted_cumulative_sums(normalized_matrix: np.ndarray) -> np.ndarray:
+    return np.cumsum(-np.sort(-normalized_matrix, axis=1), axis=1)
+
+
+def compute_right_core_lengths(reversed_sums: np.ndarray, threshold: float) -> np.ndarray:
+    return _first_true(reversed_sums >= _reach_bound(threshold), threshold) + 1
+
+
+def compute_middle_core_lengths(cumulative_sums: np.ndarray, lengths: np.ndarray, threshold: float) -> np.ndarray:
+    lower_threshold = (1. - threshold) / 2
+
+    above_lower = cumulative_sums > _exceed_bound(lower_threshold)
+    start_indices = np.argmax(above_lower, axis=1)
+    found = above_lower[np.arange(above_lower.shape[0]), start_indices]
+    # Same as the per-vector computation: if no start is found, the core is searched in the last element only
+    start_indices = np.where(found, start_indices, lengths - 1)
+
+    presums = np.where(start_indices > 0,
+                       cumulative_sums[np.arange(cumulative_sums.shape[0]), np.maximum(start_indices - 1, 0)],
+                       0.)
+    end_indices = _first_true(cumulative_sums - presums[:, None] >= _reach_bound(threshold), threshold)
+    return np.maximum(end_indices - start_indices + 1, 1)
+
+
+def compute_sorted_core_lengths(sorted_sums: np.ndarray, threshold: float) -> np.ndarray:
+    return _first_true(sorted_sums >= _reach_bound(threshold), threshold) + 1
+
+
+def _check_thresholds(thresholds: Sequence[float]) -> np.ndarray:
+    thresholds = np.asarray(thresholds, dtype=float)
+    if thresholds.ndim != 1:
+        raise ValueError('Thresholds must be a 1-D array!')
+    for threshold in thresholds:
+        _check_threshold(threshold)
+    return thresholds
+
+
+def _compute_ephemeralities_from_cores(core_lengths: np.ndarray,
+                                       lengths: np.ndarray,
+                                       zero_rows: np.ndarray,
+                                       threshold: float,
+                                       core_type: str,
+                                       warn: bool = True) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ephemeralities = 1 - (core_lengths / np.maximum(lengths, 1)) / threshold
+
+    # `ephemerality < 0 and not np.isclose(ephemerality, 0.)`
+    clamped = (ephemeralities < -_ATOL) & ~zero_rows
+    n_clamped = int(np.count_nonzero(clamped))
+    if n_clamped:
+        if warn:
+            warnings.warn(f'{n_clamped} {_CLAMP_WARNINGS[core_type]}', RuntimeWarning)
+        ephemeralities[clamped] = 0.
+
+    return np.where(zero_rows, 1., ephemeralities), np.where(zero_rows, 0, core_lengths), clamped
+
+
+def _prepare_normalized_matrix(frequency_vectors: np.ndarray,
+                               lengths: Sequence[int] = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    matrix, lengths = _to_padded_matrix(frequency_vectors, lengths)
+    if matrix.shape[1] == 0:
+        matrix = np.zeros((matrix.shape[0], 1), dtype=float)
+
+    totals = matrix.sum(axis=1)
+    zero_rows = np.isclose(totals, 0.)
+    if np.any(zero_rows):
+        # All-zero vectors get ephemerality of 1, but still need a valid row to run the searches on
+        matrix = matrix.copy()
+        matrix[zero_rows, 0] = 1.
+        totals = np.where(zero_rows, 1., totals)
+        lengths = np.where(zero_rows & (lengths == 0), 1, lengths)
+
+    return matrix / totals[:, None], lengths, zero_rows
+
+
+def compute_ephemerality_batch(
+        frequency_vectors: np.ndarray,
+        threshold: Union[float, Sequence[float]] = 0.8,
+        types: str = 'all',
+        lengths: Sequence[int] = None,
+        clamp_warnings: str = 'each',
+        clamp_flags: bool = False) -> EphemeralityBatch:
+    """
+    Vectorized counterpart of `compute_ephemerality` for many vectors at once. `frequency_vectors` is either an
+    (n_vectors x n_bins) matrix, a padded matrix together with `lengths`, or all vectors concatenated into a flat array
+    together with `lengths`. `threshold` is either shared or given per vector. Returns one array per core with one
+    entry per input vector. Values less than 0 rounded up to 0 are reported by one warning per core type ('each'), a
+    single summary warning ('summary') or not at all ('none'), depending on `clamp_warnings`. With `clamp_flags`, the
+    `clamped` column holds the bitmask of rounded up cores of every vector, as in `FlaggedEphemeralityTuple`.
+    """
+
+    if clamp_warnings not in ('each', 'summary', 'none'):
+        raise ValueError(f'Unrecognized clamp warning mode: {clamp_warnings}!')
+
+    if np.ndim(threshold) == 0:
+        _check_threshold(threshold)
+        core_threshold = threshold
+    else:
+        threshold = _check_thresholds(threshold)
+        core_threshold = threshold[:, None]
+
+    if lengths is not None:
+        frequency_vectors = _as_float_array(frequency_vectors)
+        lengths = _check_lengths(frequency_vectors, lengths)
+        if np.ndim(threshold) and len(threshold) != lengths.shape[0]:
+            raise ValueError('Number of thresholds does not match the number of frequency vectors!')
+        groups = _length_groups(lengths)
+        if groups is not None:
+            return _compute_grouped_batch(frequency_vectors, threshold, types, lengths, groups, clamp_warnings,
+                                          clamp_flags)
+
+    normalized_matrix, lengths, zero_rows = _prepare_normalized_matrix(frequency_vectors, lengths)
+    n_vectors = normalized_matrix.shape[0]
+    if np.ndim(threshold) and len(threshold) != n_vectors:
+        raise ValueError('Number of thresholds does not match the number of frequency vectors!')
+    cumulative_sums = np.cumsum(normalized_matrix, axis=1) if types in ('all', 'left', 'middle') else None
+
+    result = dict()
+    if n_vectors == 0:
+        empty = np.zeros(0, dtype=float)
+        for core_type in ('left', 'middle', 'right', 'sorted'):
+            if types == 'all' or types == core_type:
+                result[f'{core_type}_core'] = empty
+                result[f'{core_type}_core_span'] = empty.astype(np.int64)
+        if clamp_flags:
+            result['clamped'] = np.zeros(0, dtype=np.uint8)
+        return EphemeralityBatch(**result)
+
+    clamped = np.zeros(n_vectors, dtype=np.uint8)
+
+    if types == 'all' or types == 'left':
+        core_lengths = compute_left_core_lengths(cumulative_sums, core_threshold)
+        result['left_core'], result['left_core_span'], core_clamped = _compute_ephemeralities_from_cores(
+            core_lengths, lengths, zero_rows, threshold, 'left', warn=clamp_warnings == 'each')
+        clamped[core_clamped] |= CLAMP_FLAGS['left']
+
+    if types == 'all' or types == 'middle':
+        core_lengths = compute_middle_core_lengths(cumulative_sums, lengths, core_threshold)
+        result['middle_core'], result['middle_core_span'], core_clamped = _compute_ephemeralities_from_cores(
+            core_lengths, lengths, zero_rows, threshold, 'middle', warn=clamp_warnings == 'each')
+        clamped[core_clamped] |= CLAMP_FLAGS['middle']
+
+    if types == 'all' or types == 'right':
+        core_lengths = compute_right_core_lengths(_reversed_cumulative_sums(normalized_matrix, lengths), core_threshold)
+        result['right_core'], result['right_core_span'], core_clamped = _compute_ephemeralities_from_cores(
+            core_lengths, lengths, zero_rows, threshold, 'right', warn=clamp_warnings == 'each')
+        clamped[core_clamped] |= CLAMP_FLAGS['right']
+
+    if types == 'all' or types == 'sorted':
+        core_lengths = compute_sorted_core_lengths(_sorted_cumulative_sums(normalized_matrix), core_threshold)
+        result['sorted_core'], result['sorted_core_span'], core_clamped = _compute_ephemeralities_from_cores(
+            core_lengths, lengths, zero_rows, threshold, 'sorted', warn=clamp_warnings == 'each')
+        clamped[core_clamped] |= CLAMP_FLAGS['sorted']
+
+    if clamp_warnings == 'summary':
+        warn_clamped(clamped)
+    if clamp_flags:
+        result['clamped'] = clamped
+    return EphemeralityBatch(**result)
+
+
+def _compute_grouped_batch(frequency_vectors: np.ndarray,
+                           threshold: Union[float, np.ndarray],
+                           types: str,
+                           lengths: np.ndarray,
+                           groups: list[np.ndarray],
+                           clamp_warnings: str,
+                           clamp_flags: bool) -> EphemeralityBatch:
+    # Every group is padded to its own longest vector only and the results are scattered back to the input order
+    n_vectors = lengths.shape[0]
+    if frequency_vectors.ndim == 1:
+        row_groups = np.empty(n_vectors, dtype=np.int64)
+        for group, rows in enumerate(groups):
+            row_groups[rows] = group
+        element_groups = np.repeat(row_groups, lengths)
+
+    result = dict()
+    for group, rows in enumerate(groups):
+        if frequency_vectors.ndim == 1:
+            group_vectors = frequency_vectors[element_groups == group]
+        else:
+            group_vectors = frequency_vectors[rows, :int(lengths[rows].max())]
+        group_threshold = threshold[rows] if np.ndim(threshold) else threshold
+        batch = compute_ephemerality_batch(group_vectors, threshold=group_threshold, types=types, lengths=lengths[rows],
+                                           clamp_warnings='none', clamp_flags=True)
+        for field, values in batch.dict().items():
+            if values is not None:
+                result.setdefault(field, np.empty(n_vectors, dtype=values.dtype))[rows] = values
+
+    clamped = result.pop('clamped')
+    if clamp_warnings == 'each':
+        for core_type, count in count_clamped(clamped).items():
+            if count:
+                warnings.warn(f'{count} {_CLAMP_WARNINGS[core_type]}', RuntimeWarning)
+    elif clamp_warnings == 'summary':
+        warn_clamped(clamped)
+    if clamp_flags:
+        result['clamped'] = clamped
+    return EphemeralityBatch(**result)
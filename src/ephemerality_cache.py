@@ -0,0 +1,95 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Sequence, Union
+
+import numpy as np
+
+from src.ephemerality_computation import EphemeralitySet, EphemeralityTuple, _compute_ephemerality_tuple, \
+    _to_ephemerality_set
+
+
+class EphemeralityCache:
+    """
+    Thread-safe LRU cache of ephemerality results keyed by a digest of the frequency vector bytes, the threshold and
+    the core types. At most `max_entries` results are kept, and if `ttl` is set, results older than `ttl` seconds are
+    recomputed. Only the 16-byte digest of a vector is stored, so every entry takes the same small amount of memory
+    regardless of the vector length.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: Optional[float] = None):
+        if max_entries < 1:
+            raise ValueError('Maximum number of cache entries must be a positive integer!')
+        if ttl is not None and ttl <= 0:
+            raise ValueError('Cache TTL must be greater than 0!')
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(frequency_vector: Sequence[float], threshold: float, types: str = 'all') -> Hashable:
+        frequency_vector = np.ascontiguousarray(frequency_vector, dtype=float)
+        digest = hashlib.blake2b(frequency_vector.data, digest_size=16).digest()
+        return digest, float(threshold), types
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, 'ttl': self.ttl,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'expirations': self.expirations}
+
+    def compute_ephemerality(
+            self,
+            frequency_vector: Sequence[float],
+            threshold: float = 0.8,
+            types: str = 'all',
+            result_type: str = 'model') -> Union[EphemeralitySet, EphemeralityTuple]:
+        """Cached counterpart of `compute_ephemerality`, repeated queries skip normalization and core searches"""
+
+        if result_type not in ('model', 'tuple'):
+            raise ValueError(f'Unrecognized result type: {result_type}!')
+
+        key = self.key(frequency_vector, threshold, types)
+        ephemeralities = self.get(key)
+        if ephemeralities is None:
+            ephemeralities = _compute_ephemerality_tuple(frequency_vector, threshold, types)
+            self.put(key, ephemeralities)
+
+        return _to_ephemerality_set(ephemeralities) if result_type == 'model' else ephemeralities
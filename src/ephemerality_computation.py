@@ -1,174 +1,428 @@
+import time
 import numpy as np
-from typing import Sequence
-from pydantic import BaseModel
+from typing import Sequence, Union
 import warnings
 
+from src.ephemerality_profiling import profiler
+from src.ephemerality_scalar import _RTOL, _ATOL, EphemeralityTuple, FlaggedEphemeralityTuple, CLAMPED_LEFT_CORE, \
+    CLAMPED_MIDDLE_CORE, CLAMPED_RIGHT_CORE, CLAMPED_SORTED_CORE, CLAMP_FLAGS, _ZERO_VECTOR_EPHEMERALITIES, \
+    _ZERO_VECTOR_FLAGGED_EPHEMERALITIES, _reach_bound, _exceed_bound, _ephemerality_raise_error, \
+    _compute_ephemerality_from_core, _compute_clamped_ephemerality, _flag_clamped_ephemeralities, _check_threshold
 
-class EphemeralitySet(BaseModel):
-    """Class to contain ephemerality values by subtypes"""
-    left_core: float = None
-    middle_core: float = None
-    right_core: float = None
-    sorted_core: float = None
+
+def __getattr__(name: str):
+    # The pydantic model is only imported once it is used, which keeps pydantic out of the tuple result path
+    if name == 'EphemeralitySet':
+        from src.ephemerality_models import EphemeralitySet
+        return EphemeralitySet
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def _as_float_array(frequency_vector: Sequence[float], dtype: np.dtype = None) -> np.array:
+    # Floating point input keeps its precision and is not copied, anything else is converted to float64
+    frequency_vector = np.asarray(frequency_vector, dtype=dtype)
+    if not np.issubdtype(frequency_vector.dtype, np.floating):
+        frequency_vector = frequency_vector.astype(float)
+    return frequency_vector
 
 
 def _normalize_frequency_vector(frequency_vector: Sequence[float]) -> np.array:
-    frequency_vector = np.array(frequency_vector)
+    frequency_vector = _as_float_array(frequency_vector)
+
+    total = np.sum(frequency_vector)
+    if total != 1.:
+        frequency_vector = frequency_vector / total
 
-    if sum(frequency_vector) != 1.:
-        frequency_vector /= np.sum(frequency_vector)
-        
     return frequency_vector
 
 
-def _ephemerality_raise_error(threshold: float):
-    if 0. < threshold <= 1:
-        raise ValueError('Input frequency vector has not been internally normalized!')
-    else:
-        raise ValueError('Threshold value is not within (0, 1] range!')
+def _cumulative_sums(frequency_vector: np.array, cumulative_sums: np.array = None) -> np.array:
+    # Frequencies are non-negative, so the cumulative sums are non-decreasing and core boundaries can be binary searched
+    if cumulative_sums is None:
+        cumulative_sums = np.cumsum(frequency_vector)
+    return cumulative_sums
 
 
-def compute_left_core_length(frequency_vector: np.array, threshold: float) -> int:
-    current_sum = 0
-    for i, freq in enumerate(frequency_vector):
-        current_sum = current_sum + freq
-        if np.isclose(current_sum, threshold) or current_sum > threshold:
-            return i + 1
+# The core functions work on normalized vectors by default. Passing the `total` mass instead compares the unnormalized
+# cumulative sums against the bounds scaled by it, which keeps integer counts exact.
 
-    _ephemerality_raise_error(threshold)
+def compute_left_core_length(frequency_vector: np.array, threshold: float, cumulative_sums: np.array = None,
+                             total: float = 1.) -> int:
+    cumulative_sums = _cumulative_sums(frequency_vector, cumulative_sums)
 
+    end_index = int(np.searchsorted(cumulative_sums, _reach_bound(threshold) * total, side='left'))
+    if end_index == len(cumulative_sums):
+        _ephemerality_raise_error(threshold)
 
-def compute_right_core_length(frequency_vector: np.array, threshold: float) -> int:
-    current_sum = 0
-    for i, freq in enumerate(frequency_vector[::-1]):
-        current_sum = current_sum + freq
-        if np.isclose(current_sum, threshold) or current_sum > threshold:
-            return i + 1
+    return end_index + 1
 
-    _ephemerality_raise_error(threshold)
 
+def compute_right_core_length(frequency_vector: np.array, threshold: float, cumulative_sums: np.array = None,
+                              total: float = 1.) -> int:
+    cumulative_sums = _cumulative_sums(frequency_vector, cumulative_sums)
+    if len(cumulative_sums) == 0:
+        _ephemerality_raise_error(threshold)
 
-def compute_middle_core_length(frequency_vector: np.array, threshold: float) -> int:
-    lower_threshold = (1. - threshold) / 2
+    # The right core of length k sums to `total - cumulative_sums[n - k - 1]`, so it starts right after the last
+    # prefix that leaves at least `threshold` of the mass to its right
+    max_presum = cumulative_sums[-1] - _reach_bound(threshold) * total
+    if max_presum < 0:
+        _ephemerality_raise_error(threshold)
+    start_index = int(np.searchsorted(cumulative_sums, max_presum, side='right'))
 
-    current_presum = 0
-    start_index = -1
-    for i, freq in enumerate(frequency_vector):
-        current_presum += freq
-        if current_presum > lower_threshold and not np.isclose(current_presum, lower_threshold):
-            start_index = i
-            break
+    return max(len(cumulative_sums) - start_index, 1)
 
-    current_sum = 0
-    for j, freq in enumerate(frequency_vector[start_index:]):
-        current_sum += freq
-        if np.isclose(current_sum, threshold) or current_sum > threshold:
-            return j + 1
 
-    _ephemerality_raise_error(threshold)
+def compute_middle_core_length(frequency_vector: np.array, threshold: float, cumulative_sums: np.array = None,
+                               total: float = 1.) -> int:
+    cumulative_sums = _cumulative_sums(frequency_vector, cumulative_sums)
+    lower_threshold = (1. - threshold) / 2
 
+    start_index = int(np.searchsorted(cumulative_sums, _exceed_bound(lower_threshold) * total, side='right'))
+    if start_index == len(cumulative_sums):
+        start_index = len(cumulative_sums) - 1
 
-def compute_sorted_core_length(frequency_vector: np.array, threshold: float) -> int:
-    freq_descending_order = np.sort(frequency_vector)[::-1]
+    presum = cumulative_sums[start_index - 1] if start_index > 0 else 0.
+    end_index = int(np.searchsorted(cumulative_sums, presum + _reach_bound(threshold) * total, side='left'))
+    if end_index == len(cumulative_sums):
+        _ephemerality_raise_error(threshold)
 
-    current_sum = 0
-    for i, freq in enumerate(freq_descending_order):
-        current_sum += freq
-        if np.isclose(current_sum, threshold) or current_sum > threshold:
-            return i + 1
+    return max(end_index - start_index + 1, 1)
 
-    _ephemerality_raise_error(threshold)
 
+_SORTED_CORE_INITIAL_SELECTION = 64
 
-def _compute_ephemerality_from_core(core_length: int, range_length: int, threshold: float):
-    return 1 - (core_length / range_length) / threshold
 
+def compute_sorted_core_length(frequency_vector: np.array, threshold: float, total: float = 1.,
+                               workspace: np.array = None) -> int:
+    frequency_vector = np.asarray(frequency_vector)
+    range_length = len(frequency_vector)
+    reach_bound = _reach_bound(threshold) * total
+
+    # With a workspace, the elements are reordered in place there instead of in fresh copies of the vector
+    if workspace is not None:
+        workspace = workspace[:range_length]
+        workspace[:] = frequency_vector
+
+    # Only the largest elements are ordered: select the top k with a linear-time partition and grow k until they hold
+    # enough mass. Falls back to a full sort once the selection would cover most of the vector.
+    selection_size = _SORTED_CORE_INITIAL_SELECTION
+    while 4 * selection_size < range_length:
+        if workspace is None:
+            top_elements = np.partition(frequency_vector, range_length - selection_size)[range_length - selection_size:]
+        else:
+            workspace.partition(range_length - selection_size)
+            top_elements = workspace[range_length - selection_size:]
+        freq_descending_order = np.sort(top_elements)[::-1]
+        sorted_sums = np.cumsum(freq_descending_order)
+        if sorted_sums[-1] >= reach_bound:
+            return int(np.searchsorted(sorted_sums, reach_bound, side='left')) + 1
+
+        # Every remaining element is at most the smallest selected one, which bounds how many more are needed
+        smallest_selected = freq_descending_order[-1]
+        missing = int(np.ceil((reach_bound - sorted_sums[-1]) / smallest_selected)) if smallest_selected > 0 \
+            else range_length
+        selection_size = max(2 * selection_size, selection_size + missing)
+
+    if workspace is None:
+        sorted_sums = np.cumsum(np.sort(frequency_vector)[::-1])
+    else:
+        workspace.sort()
+        sorted_sums = np.cumsum(workspace[::-1], out=workspace[::-1])
+    end_index = int(np.searchsorted(sorted_sums, reach_bound, side='left'))
+    if end_index == range_length:
+        _ephemerality_raise_error(threshold)
+
+    return end_index + 1
+
+
+def count_clamped(clamped: Union[Sequence[int], np.ndarray]) -> dict[str, int]:
+    """Counts, per core type, the results whose `clamped` bitmask marks that core as rounded up to 0"""
+    clamped = np.asarray(clamped, dtype=np.uint8)
+    return {core_type: int(np.count_nonzero(clamped & flag)) for core_type, flag in CLAMP_FLAGS.items()}
+
+
+def warn_clamped(clamped: Union[Sequence[int], np.ndarray]):
+    """Emits a single warning summarizing the rounded up values of many results, if there are any"""
+    clamped = np.asarray(clamped, dtype=np.uint8)
+    n_clamped = int(np.count_nonzero(clamped))
+    if n_clamped:
+        summary = ', '.join(f'{core_type}: {count}' for core_type, count in count_clamped(clamped).items() if count)
+        warnings.warn(f'{n_clamped} of {len(clamped)} results have ephemerality values less than 0 that are rounded '
+                      f'up ({summary})! '
+                      f'This is indicative of the edge cases in which ephemerality span is greater than '
+                      f'[threshold * input_vector_length], i.e. most of the frequency mass lies in a few vector '
+                      f'elements. Ephemerality in these cases should be considered to be equal to 0. However, please '
+                      f'double check the input vectors!',
+                      RuntimeWarning)
+
+
+def _check_workspace(workspace: np.array, range_length: int, is_integer: bool):
+    if not isinstance(workspace, np.ndarray) or workspace.ndim != 1 or len(workspace) < range_length:
+        raise ValueError('Workspace must be a 1-D array at least as long as the frequency vector!')
+    if not workspace.flags.writeable:
+        raise ValueError('Workspace must be writeable!')
+    # Exact integer prefix sums would be rounded when stored in a floating point workspace
+    if is_integer and workspace.dtype != np.int64:
+        raise ValueError('Workspace for integer counts must be an int64 array!')
+
+
+def _prepare_frequency_vector(frequency_vector: Sequence[float], types: str, dtype: np.dtype = None,
+                              workspace: np.array = None) -> tuple[np.array, np.array, float]:
+    # Vectors are never normalized: the cumulative sums are compared against the bounds scaled by the total mass, so
+    # the input is only read, and with a workspace no array is allocated at all
+    frequency_vector = np.asarray(frequency_vector, dtype=dtype)
+    is_integer = np.issubdtype(frequency_vector.dtype, np.integer) or frequency_vector.dtype == bool
+    if not is_integer:
+        frequency_vector = _as_float_array(frequency_vector)
+    if workspace is not None:
+        _check_workspace(workspace, len(frequency_vector), is_integer)
+
+    if types in ('all', 'left', 'middle', 'right') or is_integer:
+        # Integer counts get exact integer prefix sums
+        out = workspace[:len(frequency_vector)] if workspace is not None else None
+        cumulative_sums = np.cumsum(frequency_vector, dtype=np.int64 if is_integer else None, out=out)
+        total = cumulative_sums[-1] if len(cumulative_sums) else 0
+    else:
+        cumulative_sums = None
+        total = np.sum(frequency_vector)
+
+    if is_integer:
+        total = int(total)
+    elif np.isclose(total, 0.):
+        total = 0.
+    if types not in ('all', 'left', 'middle', 'right'):
+        cumulative_sums = None
+    return frequency_vector, cumulative_sums, total
+
+
+_BACKENDS = ('numpy', 'numba')
+_default_backend = 'numpy'
+
+
+def set_backend(backend: str):
+    """Sets the backend used by `compute_ephemerality` calls that do not select one themselves"""
+    global _default_backend
+    _check_backend(backend)
+    _default_backend = backend
+
+
+def get_backend() -> str:
+    return _default_backend
+
+
+def available_backends() -> list[str]:
+    """Returns the backends that can be used in this environment"""
+    backends = []
+    for backend in _BACKENDS:
+        try:
+            _check_backend(backend)
+        except ImportError:
+            continue
+        backends.append(backend)
+    return backends
+
+
+def _check_backend(backend: str):
+    if backend not in _BACKENDS:
+        raise ValueError(f'Unrecognized backend: {backend}!')
+    if backend == 'numba':
+        _numba_kernels()
+
+
+def _numba_kernels():
+    # Numba is an optional dependency, its kernels are only compiled once the backend is first used
+    try:
+        from src import ephemerality_numba
+    except ImportError as error:
+        raise ImportError('The numba backend requires the numba package to be installed!') from error
+    return ephemerality_numba
+
+
+def _compute_core_lengths_numpy(frequency_vector: Sequence[float], threshold: float, types: str, dtype: np.dtype,
+                                workspace: np.array) -> tuple[int, list]:
+    # Timestamps are only taken while the profiler is enabled
+    timed = profiler.enabled
+    if timed:
+        start = time.perf_counter()
+    frequency_vector, cumulative_sums, total = _prepare_frequency_vector(frequency_vector, types, dtype, workspace)
+    if timed:
+        start = profiler.lap('preparation', start)
+    if total == 0:
+        return 0, []
+
+    core_lengths = [None] * 4
+    if types == 'all' or types == 'left':
+        core_lengths[0] = compute_left_core_length(frequency_vector, threshold, cumulative_sums, total)
+        if timed:
+            start = profiler.lap('left_core', start)
+    if types == 'all' or types == 'middle':
+        core_lengths[1] = compute_middle_core_length(frequency_vector, threshold, cumulative_sums, total)
+        if timed:
+            start = profiler.lap('middle_core', start)
+    if types == 'all' or types == 'right':
+        core_lengths[2] = compute_right_core_length(frequency_vector, threshold, cumulative_sums, total)
+        if timed:
+            start = profiler.lap('right_core', start)
+    if types == 'all' or types == 'sorted':
+        core_lengths[3] = compute_sorted_core_length(frequency_vector, threshold, total, workspace)
+        if timed:
+            profiler.lap('sorted_core', start)
+    return len(frequency_vector), core_lengths
+
+
+def _compute_core_lengths_numba(frequency_vector: Sequence[float], threshold: float, types: str, dtype: np.dtype,
+                                workspace: np.array) -> tuple[int, list]:
+    kernels = _numba_kernels()
+    timed = profiler.enabled
+    if timed:
+        start = time.perf_counter()
+    frequency_vector = np.asarray(frequency_vector, dtype=dtype)
+    is_integer = np.issubdtype(frequency_vector.dtype, np.integer) or frequency_vector.dtype == bool
+    frequency_vector = frequency_vector.astype(np.int64) if is_integer else _as_float_array(frequency_vector)
+    if workspace is not None:
+        _check_workspace(workspace, len(frequency_vector), is_integer)
+    if len(frequency_vector) == 0:
+        return 0, []
+
+    # The total is summed in the order the NumPy backend uses, so both backends compare against identical bounds
+    if types in ('all', 'left', 'middle', 'right') or is_integer:
+        total = kernels.sequential_sum(frequency_vector)
+    else:
+        total = np.sum(frequency_vector)
+    if is_integer:
+        total = int(total)
+    elif np.isclose(total, 0.):
+        total = 0.
+    if timed:
+        start = profiler.lap('preparation', start)
+    if total == 0:
+        return 0, []
+
+    core_lengths = [None] * 4
+    if types in ('all', 'left', 'middle', 'right'):
+        reach_bound = _reach_bound(threshold) * total
+        right_bound = total - reach_bound
+        if types in ('all', 'right') and right_bound < 0:
+            _ephemerality_raise_error(threshold)
+        core_lengths[:3] = kernels.fused_core_lengths(frequency_vector, reach_bound,
+                                                      _exceed_bound((1. - threshold) / 2) * total, reach_bound,
+                                                      right_bound)
+        for i, core_type in enumerate(('left', 'middle', 'right')):
+            if types != 'all' and types != core_type:
+                core_lengths[i] = None
+            elif core_lengths[i] < 0:
+                _ephemerality_raise_error(threshold)
+        if timed:
+            start = profiler.lap('fused_cores', start)
+    if types in ('all', 'sorted'):
+        core_lengths[3] = compute_sorted_core_length(frequency_vector, threshold, total, workspace)
+        if timed:
+            profiler.lap('sorted_core', start)
+    return len(frequency_vector), core_lengths
+
+
+_CORE_LENGTH_BACKENDS = {
+    'numpy': _compute_core_lengths_numpy,
+    'numba': _compute_core_lengths_numba
+}
+
+
+def _compute_core_lengths(
+        frequency_vector: Sequence[float],
+        threshold: float,
+        types: str,
+        dtype: np.dtype,
+        workspace: np.array,
+        backend: str) -> tuple[int, list]:
 
-def _check_threshold(threshold: float):
-    if threshold <= 0.:
-        raise ValueError('Threshold value must be greater than 0!')
+    _check_threshold(threshold)
+    if backend is None:
+        backend = _default_backend
+    elif backend not in _CORE_LENGTH_BACKENDS:
+        raise ValueError(f'Unrecognized backend: {backend}!')
 
-    if threshold > 1.:
-        raise ValueError('Threshold value must be less or equal to 1!')
+    return _CORE_LENGTH_BACKENDS[backend](frequency_vector, threshold, types, dtype, workspace)
 
 
-def compute_ephemerality(
+def _compute_ephemerality_tuple(
         frequency_vector: Sequence[float],
         threshold: float = 0.8,
-        types: str = 'all') -> EphemeralitySet:
+        types: str = 'all',
+        dtype: np.dtype = None,
+        workspace: np.array = None,
+        backend: str = None) -> EphemeralityTuple:
+
+    range_length, core_lengths = _compute_core_lengths(frequency_vector, threshold, types, dtype, workspace, backend)
+    if not core_lengths:
+        return _ZERO_VECTOR_EPHEMERALITIES
+
+    timed = profiler.enabled
+    if timed:
+        start = time.perf_counter()
+    ephemeralities = EphemeralityTuple(*[
+        None if core_length is None else
+        _compute_clamped_ephemerality(core_length, range_length, threshold, core_type)
+        for core_length, core_type in zip(core_lengths, ('left', 'middle', 'right', 'sorted'))
+    ])
+    if timed:
+        profiler.lap('result', start)
+    return ephemeralities
 
-    _check_threshold(threshold)
 
-    if np.isclose(np.sum(frequency_vector), 0.):
-        return EphemeralitySet(
-            left_core=1.,
-            middle_core=1.,
-            right_core=1.,
-            sorted_core=1.
-        )
-    
-    frequency_vector = _normalize_frequency_vector(frequency_vector)
-    range_length = len(frequency_vector)
+def _compute_flagged_ephemerality_tuple(
+        frequency_vector: Sequence[float],
+        threshold: float = 0.8,
+        types: str = 'all',
+        dtype: np.dtype = None,
+        workspace: np.array = None,
+        backend: str = None) -> FlaggedEphemeralityTuple:
 
-    if types == 'all' or types == 'left':
-        left_core_length = compute_left_core_length(frequency_vector, threshold)
-        ephemerality_left_core = _compute_ephemerality_from_core(left_core_length, range_length, threshold)
-        if ephemerality_left_core < 0. and not np.isclose(ephemerality_left_core, 0.):
-            warnings.warn(f'Original ephemerality value is less than 0 ({ephemerality_left_core}) and is going to be rounded up! '
-                          f'This is indicative of the edge case in which ephemerality span is greater than '
-                          f'[threshold * input_vector_length], i.e. most of the frequency mass lies in a few vector '
-                          f'elements at the end of the frequency vector. Original ephemerality in this case should be '
-                          f'considered to be equal to 0. However, please double check the input vector!',
-                          RuntimeWarning)
-            ephemerality_left_core = 0.
-    else:
-        ephemerality_left_core = None
+    range_length, core_lengths = _compute_core_lengths(frequency_vector, threshold, types, dtype, workspace, backend)
+    if not core_lengths:
+        return _ZERO_VECTOR_FLAGGED_EPHEMERALITIES
 
-    if types == 'all' or types == 'middle':
-        middle_core_length = compute_middle_core_length(frequency_vector, threshold)
-        ephemerality_middle_core = _compute_ephemerality_from_core(middle_core_length, range_length, threshold)
-        if ephemerality_middle_core < 0. and not np.isclose(ephemerality_middle_core, 0.):
-            warnings.warn(f'Filtered ephemerality value is less than 0 ({ephemerality_middle_core}) and is going to be rounded up! '
-                          f'This is indicative of the edge case in which ephemerality span is greater than '
-                          f'[threshold * input_vector_length], i.e. most of the frequency mass lies in a few elements '
-                          f'at the beginning and the end of the frequency vector. Filtered ephemerality in this case should '
-                          f'be considered to be equal to 0. However, please double check the input vector!',
-                          RuntimeWarning)
-            ephemerality_middle_core = 0.
-    else:
-        ephemerality_middle_core = None
+    if not profiler.enabled:
+        return _flag_clamped_ephemeralities(core_lengths, range_length, threshold)
+    with profiler.section('result'):
+        return _flag_clamped_ephemeralities(core_lengths, range_length, threshold)
 
-    if types == 'all' or types == 'right':
-        right_core_length = compute_right_core_length(frequency_vector, threshold)
-        ephemerality_right_core = _compute_ephemerality_from_core(right_core_length, range_length, threshold)
-        if ephemerality_right_core < 0. and not np.isclose(ephemerality_right_core, 0.):
-            warnings.warn(f'Original ephemerality value is less than 0 ({ephemerality_right_core}) and is going to be rounded up! '
-                          f'This is indicative of the edge case in which ephemerality span is greater than '
-                          f'[threshold * input_vector_length], i.e. most of the frequency mass lies in a few vector '
-                          f'elements at the end of the frequency vector. Original ephemerality in this case should be '
-                          f'considered to be equal to 0. However, please double check the input vector!',
-                          RuntimeWarning)
-            ephemerality_right_core = 0.
-    else:
-        ephemerality_right_core = None
 
-    if types == 'all' or types == 'sorted':
-        sorted_core_length = compute_sorted_core_length(frequency_vector, threshold)
-        ephemerality_sorted_core = _compute_ephemerality_from_core(sorted_core_length, range_length, threshold)
-        if ephemerality_sorted_core < 0. and not np.isclose(ephemerality_sorted_core, 0.):
-            warnings.warn(f'Sorted ephemerality value is less than 0 ({ephemerality_sorted_core}) and is going to be rounded up! '
-                          f'This is indicative of the rare edge case of very short and mostly uniform frequency vector (so '
-                          f'that ephemerality span is greater than [threshold * input_vector_length]). '
-                          f'Sorted ephemerality in this case should be considered to be equal to 0. '
-                          f'However, please double check the input vector!',
-                          RuntimeWarning)
-            ephemerality_sorted_core = 0.
-    else:
-        ephemerality_sorted_core = None
+def _to_ephemerality_set(ephemeralities: EphemeralityTuple) -> 'EphemeralitySet':
+    # Values are produced internally, so pydantic validation is skipped
+    from src.ephemerality_models import EphemeralitySet
+    return EphemeralitySet.construct(left_core=ephemeralities.left_core,
+                                     middle_core=ephemeralities.middle_core,
+                                     right_core=ephemeralities.right_core,
+                                     sorted_core=ephemeralities.sorted_core)
 
-    ephemeralities = EphemeralitySet(left_core=ephemerality_left_core,
-                                     middle_core=ephemerality_middle_core,
-                                     right_core=ephemerality_right_core,
-                                     sorted_core=ephemerality_sorted_core)
 
-    return ephemeralities
+def compute_ephemerality(
+        frequency_vector: Sequence[float],
+        threshold: float = 0.8,
+        types: str = 'all',
+        result_type: str = 'model',
+        dtype: np.dtype = None,
+        workspace: np.array = None,
+        backend: str = None) -> Union['EphemeralitySet', EphemeralityTuple, FlaggedEphemeralityTuple]:
+    """
+    Computes ephemerality of a frequency vector, without normalizing or copying it.
+
+    `dtype`: converts the input first, e.g. `np.float32` to halve the memory of float64 input.
+    `workspace`: writeable 1-D array, at least as long as the vector and int64 for integer counts, reused across calls.
+    `backend`: 'numpy' or 'numba', defaults to the one set with `set_backend`.
+    `result_type`: 'model', 'tuple' or 'flagged', which marks values rounded up to 0 instead of warning about them.
+    """
+
+    if result_type == 'model':
+        ephemeralities = _compute_ephemerality_tuple(frequency_vector, threshold, types, dtype, workspace, backend)
+        if not profiler.enabled:
+            return _to_ephemerality_set(ephemeralities)
+        with profiler.section('result_model'):
+            return _to_ephemerality_set(ephemeralities)
+    elif result_type == 'tuple':
+        return _compute_ephemerality_tuple(frequency_vector, threshold, types, dtype, workspace, backend)
+    elif result_type == 'flagged':
+        return _compute_flagged_ephemerality_tuple(frequency_vector, threshold, types, dtype, workspace, backend)
+    else:
+        raise ValueError(f'Unrecognized result type: {result_type}!')
@@ -0,0 +1,60 @@
+import numpy as np
+from typing import Any, Sequence
+
+from src.ephemerality_batch import EphemeralityBatch, compute_ephemerality_batch
+
+
+def group_long_format(topic_ids: Sequence[Any], bin_indices: Sequence[int], counts: Sequence[float],
+                      n_bins: int = None) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Groups long-format (topic, bin, count) rows into a CSR-like layout: the frequency vectors of all topics
+    concatenated into `values`, topic `i` occupying `values[offsets[i]:offsets[i] + lengths[i]]`. Counts of repeated
+    (topic, bin) rows are summed and missing bins are 0. Vectors are `n_bins` long, or reach the largest bin of their
+    topic if `n_bins` is not given. Returns the sorted unique topics, the offsets, the values and the lengths.
+    """
+
+    topic_ids = np.asarray(topic_ids)
+    bin_indices = np.asarray(bin_indices)
+    counts = np.asarray(counts, dtype=float)
+    if topic_ids.ndim != 1 or topic_ids.shape != bin_indices.shape or topic_ids.shape != counts.shape:
+        raise ValueError('Topic ids, bin indices and counts must be 1-D arrays of the same length!')
+    if not np.issubdtype(bin_indices.dtype, np.integer):
+        if bin_indices.size and np.any(bin_indices != np.floor(bin_indices)):
+            raise ValueError('Bin indices must be integers!')
+        bin_indices = bin_indices.astype(np.int64)
+    if bin_indices.size and bin_indices.min() < 0:
+        raise ValueError('Bin indices must be non-negative!')
+
+    topics, topic_codes = np.unique(topic_ids, return_inverse=True)
+    topic_codes = topic_codes.reshape(-1)
+    if n_bins is None:
+        lengths = np.zeros(len(topics), dtype=np.int64)
+        np.maximum.at(lengths, topic_codes, bin_indices + 1)
+    else:
+        if bin_indices.size and bin_indices.max() >= n_bins:
+            raise ValueError('Bin indices must be less than the number of bins!')
+        lengths = np.full(len(topics), n_bins, dtype=np.int64)
+
+    offsets = np.cumsum(lengths) - lengths
+    # Every row is scattered straight to its position in the concatenated vectors, summing repeated bins
+    values = np.bincount(offsets[topic_codes] + bin_indices, weights=counts, minlength=int(lengths.sum())).astype(float)
+    return topics, offsets, values, lengths
+
+
+def compute_ephemerality_grouped(
+        topic_ids: Sequence[Any],
+        bin_indices: Sequence[int],
+        counts: Sequence[float],
+        n_bins: int = None,
+        threshold: float = 0.8,
+        types: str = 'all',
+        clamp_warnings: str = 'each') -> tuple[np.ndarray, EphemeralityBatch]:
+    """
+    Computes ephemerality of every topic of a long-format table with one (topic, bin, count) row per nonzero bin, in
+    any order. The rows are grouped with `group_long_format` and all topics are computed in a single vectorized batch.
+    Returns the sorted unique topics together with the batch, whose rows follow the topics.
+    """
+
+    topics, _, values, lengths = group_long_format(topic_ids, bin_indices, counts, n_bins)
+    return topics, compute_ephemerality_batch(values, threshold=threshold, types=types, lengths=lengths,
+                                              clamp_warnings=clamp_warnings)
@@ -0,0 +1,259 @@
+import math
+import heapq
+import itertools
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Union
+
+from src.ephemerality_computation import EphemeralitySet, EphemeralityTuple, _ATOL, _ZERO_VECTOR_EPHEMERALITIES, \
+    _check_threshold, _compute_clamped_ephemerality, _ephemerality_raise_error, _exceed_bound, _reach_bound, \
+    _to_ephemerality_set
+
+
+# Largest ratio of the expired mass still held in the prefix sums to the mass of the window
+_REBASE_MASS_RATIO = 2 ** 10
+
+
+class _TopMassTracker:
+    """Order-statistic structure keeping the smallest set of largest frequencies that reaches a given mass"""
+
+    def __init__(self):
+        # Core elements live in a min-heap, the rest in a max-heap, with min(core) >= max(rest) at all times.
+        # Expired elements are removed lazily: they are dropped from `_locations` and skipped once they surface. A heap
+        # is rebuilt once its expired entries outnumber the live ones, so both heaps stay proportional to the window.
+        self._core = list()
+        self._rest = list()
+        self._locations = dict()
+        self._values = dict()
+        self._n_expired_core = 0
+        self._n_expired_rest = 0
+        self.core_size = 0
+        # The core sum is kept with Neumaier compensated summation and recomputed from the live core elements once it
+        # has been updated as many times as the core heap has entries, so it does not drift as elements come and go
+        self._core_sum = 0.
+        self._compensation = 0.
+        self._n_sum_updates = 0
+
+    @property
+    def core_sum(self) -> float:
+        return self._core_sum + self._compensation
+
+    def _update_core_sum(self, value: float):
+        core_sum = self._core_sum + value
+        if abs(self._core_sum) >= abs(value):
+            self._compensation += (self._core_sum - core_sum) + value
+        else:
+            self._compensation += (value - core_sum) + self._core_sum
+        self._core_sum = core_sum
+        self._n_sum_updates += 1
+
+    def _resync_core_sum(self):
+        self._core_sum = math.fsum(value for value, index in self._core if self._locations.get(index) is True)
+        self._compensation = 0.
+        self._n_sum_updates = 0
+
+    def _clean_top(self, heap: list, in_core: bool):
+        while heap and self._locations.get(heap[0][1]) is not in_core:
+            heapq.heappop(heap)
+            if in_core:
+                self._n_expired_core -= 1
+            else:
+                self._n_expired_rest -= 1
+
+    def _compact(self):
+        if self._n_expired_core > self.core_size:
+            self._core = [entry for entry in self._core if self._locations.get(entry[1]) is True]
+            heapq.heapify(self._core)
+            self._n_expired_core = 0
+        if self._n_expired_rest > len(self._rest) - self._n_expired_rest:
+            self._rest = [entry for entry in self._rest if self._locations.get(entry[1]) is False]
+            heapq.heapify(self._rest)
+            self._n_expired_rest = 0
+
+    def _core_min(self) -> float:
+        self._clean_top(self._core, True)
+        return self._core[0][0]
+
+    def _has_rest(self) -> bool:
+        self._clean_top(self._rest, False)
+        return len(self._rest) > 0
+
+    def _push_core(self, value: float, index: int):
+        heapq.heappush(self._core, (value, index))
+        self._locations[index] = True
+        self.core_size += 1
+        self._update_core_sum(value)
+
+    def _push_rest(self, value: float, index: int):
+        heapq.heappush(self._rest, (-value, index))
+        self._locations[index] = False
+
+    def add(self, value: float, index: int):
+        self._values[index] = value
+        if self.core_size and value > self._core_min():
+            self._push_core(value, index)
+        else:
+            self._push_rest(value, index)
+
+    def remove(self, index: int):
+        value = self._values.pop(index)
+        if self._locations.pop(index):
+            self.core_size -= 1
+            self._n_expired_core += 1
+            self._update_core_sum(-value)
+        else:
+            self._n_expired_rest += 1
+        self._compact()
+
+    def rebalance(self, target_mass: float):
+        if self._n_sum_updates >= len(self._core):
+            self._resync_core_sum()
+
+        while self.core_sum < target_mass and self._has_rest():
+            value, index = heapq.heappop(self._rest)
+            self._push_core(-value, index)
+
+        while self.core_size > 1 and self.core_sum - self._core_min() >= target_mass:
+            value, index = heapq.heappop(self._core)
+            self.core_size -= 1
+            self._update_core_sum(-value)
+            self._push_rest(value, index)
+
+        if self.core_size == 0:
+            self._core_sum = 0.
+            self._compensation = 0.
+
+
+class IncrementalEphemerality:
+    """
+    Stateful ephemerality calculator for frequency vectors that grow one bin at a time. If `window` is set, only the
+    last `window` bins are considered and older bins expire as new ones are appended. Every update and query costs
+    amortized O(log N), or O(log W) with a window, whose memory use is then bounded by the window rather than the
+    stream. `ephemerality()` returns the same values as `compute_ephemerality` on the current bins.
+    """
+
+    def __init__(self, threshold: float = 0.8, types: str = 'all', window: int = None):
+        _check_threshold(threshold)
+        if window is not None and window < 1:
+            raise ValueError('Window size must be a positive integer!')
+
+        self.threshold = threshold
+        self.types = types
+        self.window = window
+
+        # Prefix sums of the retained bins: `_prefix_sums[i]` is the mass of the retained bins before bin `_offset + i`.
+        # The retained frequencies are kept too, so that the prefix sums can be recomputed from the window start.
+        self._prefix_sums = [0.]
+        self._frequencies = list()
+        self._offset = 0
+        self._start = 0
+        self._n_appended = 0
+        self._top_mass = _TopMassTracker() if types in ('all', 'sorted') else None
+
+    def __len__(self) -> int:
+        return self._n_appended - self._start
+
+    @property
+    def total(self) -> float:
+        return self._prefix_sums[-1] - self._prefix_sums[self._start - self._offset]
+
+    def append(self, frequency: float):
+        frequency = float(frequency)
+        if frequency < 0:
+            raise ValueError('Frequencies must be non-negative!')
+
+        self._prefix_sums.append(self._prefix_sums[-1] + frequency)
+        self._frequencies.append(frequency)
+        if self._top_mass is not None:
+            self._top_mass.add(frequency, self._n_appended)
+        self._n_appended += 1
+
+        if self.window is not None and len(self) > self.window:
+            self._expire()
+
+    def extend(self, frequencies: Iterable[float]):
+        for frequency in frequencies:
+            self.append(frequency)
+
+    def _expire(self):
+        if self._top_mass is not None:
+            self._top_mass.remove(self._start)
+        self._start += 1
+
+        # Drop expired bins once they make up half of the buffer, or once their mass dwarfs the mass of the window, which
+        # would otherwise leave too few significant bits in the differences of the prefix sums. The prefix sums are then
+        # recomputed from the window start, so they carry no rounding error of the expired bins.
+        expired = self._start - self._offset
+        if expired > len(self._frequencies) // 2 or self._prefix_sums[expired] > _REBASE_MASS_RATIO * self.total:
+            self._frequencies = self._frequencies[expired:]
+            self._prefix_sums = list(itertools.accumulate(self._frequencies, initial=0.))
+            self._offset = self._start
+
+    def _left_core_length(self, start: int, end: int, total: float) -> int:
+        prefix_sums = self._prefix_sums
+        end_index = bisect_left(prefix_sums, prefix_sums[start] + _reach_bound(self.threshold) * total,
+                                start + 1, end + 1)
+        if end_index > end:
+            _ephemerality_raise_error(self.threshold)
+        return end_index - start
+
+    def _right_core_length(self, start: int, end: int, total: float) -> int:
+        prefix_sums = self._prefix_sums
+        max_presum = prefix_sums[end] - _reach_bound(self.threshold) * total
+        if max_presum < prefix_sums[start]:
+            _ephemerality_raise_error(self.threshold)
+        start_index = bisect_right(prefix_sums, max_presum, start, end + 1) - 1
+        return max(end - start_index, 1)
+
+    def _middle_core_length(self, start: int, end: int, total: float) -> int:
+        prefix_sums = self._prefix_sums
+        lower_threshold = (1. - self.threshold) / 2
+
+        core_start = bisect_right(prefix_sums, prefix_sums[start] + _exceed_bound(lower_threshold) * total,
+                                  start + 1, end + 1) - 1
+        core_start = min(core_start, end - 1)
+
+        end_index = bisect_left(prefix_sums, prefix_sums[core_start] + _reach_bound(self.threshold) * total,
+                                core_start + 1, end + 1)
+        if end_index > end:
+            _ephemerality_raise_error(self.threshold)
+        return max(end_index - core_start, 1)
+
+    def _sorted_core_length(self, total: float) -> int:
+        self._top_mass.rebalance(_reach_bound(self.threshold) * total)
+        if self._top_mass.core_sum < _reach_bound(self.threshold) * total:
+            _ephemerality_raise_error(self.threshold)
+        return max(self._top_mass.core_size, 1)
+
+    def ephemerality(self, result_type: str = 'model') -> Union[EphemeralitySet, EphemeralityTuple]:
+        if result_type == 'model':
+            return _to_ephemerality_set(self._ephemerality_tuple())
+        elif result_type == 'tuple':
+            return self._ephemerality_tuple()
+        else:
+            raise ValueError(f'Unrecognized result type: {result_type}!')
+
+    def _ephemerality_tuple(self) -> EphemeralityTuple:
+        total = self.total
+        if abs(total) <= _ATOL:
+            return _ZERO_VECTOR_EPHEMERALITIES
+
+        range_length = len(self)
+        start = self._start - self._offset
+        end = len(self._prefix_sums) - 1
+        types = self.types
+
+        ephemeralities = dict()
+        if types == 'all' or types == 'left':
+            ephemeralities['left_core'] = _compute_clamped_ephemerality(
+                self._left_core_length(start, end, total), range_length, self.threshold, 'left')
+        if types == 'all' or types == 'middle':
+            ephemeralities['middle_core'] = _compute_clamped_ephemerality(
+                self._middle_core_length(start, end, total), range_length, self.threshold, 'middle')
+        if types == 'all' or types == 'right':
+            ephemeralities['right_core'] = _compute_clamped_ephemerality(
+                self._right_core_length(start, end, total), range_length, self.threshold, 'right')
+        if types == 'all' or types == 'sorted':
+            ephemeralities['sorted_core'] = _compute_clamped_ephemerality(
+                self._sorted_core_length(total), range_length, self.threshold, 'sorted')
+
+        return EphemeralityTuple(**ephemeralities)
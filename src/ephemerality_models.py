@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class EphemeralitySet(BaseModel):
+    """Class to contain ephemerality values by subtypes"""
+    left_core: float = None
+    middle_core: float = None
+    right_core: float = None
+    sorted_core: float = None
@@ -0,0 +1,42 @@
+import numpy as np
+from typing import Sequence
+
+from src.ephemerality_batch import EphemeralityBatch, compute_ephemerality_batch
+
+
+def _aggregate_bins(frequency_vector: np.ndarray, factor: int) -> np.ndarray:
+    # A trailing partial group is padded with zeros and becomes the last, partial bin
+    padding = -len(frequency_vector) % factor
+    if padding:
+        frequency_vector = np.concatenate((frequency_vector, np.zeros(padding)))
+    return frequency_vector.reshape(-1, factor).sum(axis=1)
+
+
+def compute_ephemerality_multiresolution(
+        frequency_vector: Sequence[float],
+        factors: Sequence[int],
+        threshold: float = 0.8,
+        types: str = 'all') -> EphemeralityBatch:
+    """
+    Computes ephemerality of one finest-grained frequency vector at several coarser resolutions, where a factor of k
+    sums every k consecutive bins. Each resolution is aggregated from the coarsest already aggregated one that divides
+    it (e.g. days from hours rather than from minutes), and all resolutions are computed in a single batch. Row i of the
+    result corresponds to `factors[i]`.
+    """
+
+    frequency_vector = np.asarray(frequency_vector, dtype=float)
+    if frequency_vector.ndim != 1:
+        raise ValueError('Frequency vector must be a 1-D array!')
+    if any(int(factor) != factor or factor < 1 for factor in factors):
+        raise ValueError('Aggregation factors must be positive integers!')
+
+    aggregated = {1: frequency_vector}
+    for factor in sorted(set(int(factor) for factor in factors)):
+        if factor not in aggregated:
+            base = max(computed for computed in aggregated if factor % computed == 0)
+            aggregated[factor] = _aggregate_bins(aggregated[base], factor // base)
+
+    vectors = [aggregated[int(factor)] for factor in factors]
+    lengths = [len(vector) for vector in vectors]
+    frequency_vectors = np.concatenate(vectors) if vectors else np.empty(0)
+    return compute_ephemerality_batch(frequency_vectors, threshold=threshold, types=types, lengths=lengths)
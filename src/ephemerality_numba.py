@@ -0,0 +1,56 @@
+import numpy as np
+from numba import njit
+
+
+# Compiled kernels of the 'numba' backend. They mirror the searches of the NumPy core functions on the running prefix
+# sums instead of a materialized cumulative sum array, so the left, middle and right cores take a single pass over the
+# vector. The sorted core keeps the NumPy selection, whose sort is considerably faster than the compiled one.
+
+
+@njit(cache=True)
+def sequential_sum(frequency_vector: np.ndarray):
+    # Same summation order as the last element of `np.cumsum`, unlike the pairwise summation of `np.sum`
+    total = frequency_vector[0] - frequency_vector[0]
+    for i in range(len(frequency_vector)):
+        total += frequency_vector[i]
+    return total
+
+
+@njit(cache=True)
+def fused_core_lengths(frequency_vector: np.ndarray, left_bound: float, middle_lower_bound: float,
+                       middle_span_bound: float, right_bound: float) -> tuple[int, int, int]:
+    # Returns the left, middle and right core lengths, -1 for a core whose bound is never reached
+    range_length = len(frequency_vector)
+    presum = frequency_vector[0] - frequency_vector[0]
+    previous_presum = presum
+
+    left_end = -1
+    middle_start = -1
+    middle_end = -1
+    middle_end_bound = 0.
+    right_start = range_length
+    for i in range(range_length):
+        previous_presum = presum
+        presum += frequency_vector[i]
+
+        if left_end < 0 and presum >= left_bound:
+            left_end = i
+        if middle_start < 0 and presum > middle_lower_bound:
+            middle_start = i
+            middle_end_bound = previous_presum + middle_span_bound
+        if middle_start >= 0 and middle_end < 0 and presum >= middle_end_bound:
+            middle_end = i
+        if right_start == range_length and presum > right_bound:
+            right_start = i
+
+    if middle_start < 0:
+        # Every prefix stays within the lower tail, the middle core is then the last element alone
+        middle_start = range_length - 1
+        if presum >= previous_presum + middle_span_bound:
+            middle_end = range_length - 1
+
+    left_core_length = left_end + 1 if left_end >= 0 else -1
+    middle_core_length = max(middle_end - middle_start + 1, 1) if middle_end >= 0 else -1
+    right_core_length = max(range_length - right_start, 1)
+
+    return left_core_length, middle_core_length, right_core_length
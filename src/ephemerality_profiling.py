@@ -0,0 +1,82 @@
+import time
+import threading
+
+
+class _NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _Section:
+    def __init__(self, profiler: 'HotPathProfiler', name: str):
+        self._profiler = profiler
+        self._name = name
+        self._start = 0.
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profiler.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class HotPathProfiler:
+    """
+    Accumulates the number of calls and the wall time spent in named sections of the hot paths. While disabled, which
+    is the default, instrumented code only checks the `enabled` attribute and takes no timestamps. Timings of all
+    threads are aggregated, timings of worker processes are not collected.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._sections = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._sections.clear()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            calls, total = self._sections.get(name, (0, 0.))
+            self._sections[name] = (calls + 1, total + seconds)
+
+    def lap(self, name: str, start: float) -> float:
+        """Records the time elapsed since `start` and returns the current time as the start of the next section"""
+        now = time.perf_counter()
+        self.record(name, now - start)
+        return now
+
+    def section(self, name: str):
+        """Context manager timing its body, or doing nothing if the profiler is disabled"""
+        return _Section(self, name) if self.enabled else _NULL_SECTION
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: {'calls': calls, 'total_seconds': total, 'mean_seconds': total / calls}
+                    for name, (calls, total) in self._sections.items()}
+
+    def report(self) -> str:
+        stats = self.stats()
+        lines = [f'{"section":<16} {"calls":>10} {"total, s":>12} {"mean, us":>12}']
+        for name, section in sorted(stats.items(), key=lambda item: -item[1]['total_seconds']):
+            lines.append(f'{name:<16} {section["calls"]:>10} {section["total_seconds"]:>12.6f} '
+                         f'{section["mean_seconds"] * 1e6:>12.3f}')
+        return '\n'.join(lines)
+
+
+profiler = HotPathProfiler()
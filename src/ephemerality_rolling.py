@@ -0,0 +1,144 @@
+import numpy as np
+from typing import Sequence
+
+from src.ephemerality_computation import _ATOL, _check_threshold, _ephemerality_raise_error, _exceed_bound, \
+    _reach_bound
+from src.ephemerality_batch import EphemeralityBatch, _compute_ephemeralities_from_cores
+from src.ephemerality_incremental import _TopMassTracker
+
+
+def _check_found(found: np.ndarray, threshold: float):
+    if not np.all(found):
+        _ephemerality_raise_error(threshold)
+
+
+def _centered_block_sums(frequency_vector: np.ndarray, window: int, n_windows: int) -> np.ndarray:
+    # Row k holds the cumulative sums over bins [k * window, (k + 2) * window) centred on bin (k + 1) * window: negated
+    # sums of the bins from each position up to the centre, then sums of the bins from the centre. Every window starting
+    # in block k contains the centre, so differences within its row are as precise as the cumulative sums of the window
+    # alone, unlike differences of the cumulative sums of the whole series.
+    n_blocks = -(-n_windows // window)
+    blocks = np.zeros((n_blocks + 1) * window)
+    blocks[:len(frequency_vector)] = frequency_vector
+    blocks = blocks.reshape(n_blocks + 1, window)
+    before_centre = -np.cumsum(blocks[:-1, ::-1], axis=1)[:, ::-1]
+    after_centre = np.cumsum(blocks[1:, :-1], axis=1)
+    return np.concatenate((before_centre, np.zeros((n_blocks, 1)), after_centre), axis=1)
+
+
+def _row_keys(block_sums: np.ndarray) -> np.ndarray:
+    # NumPy orders complex numbers lexicographically, so the flattened block sums keyed by their row are sorted
+    return (np.arange(len(block_sums))[:, None] + 1j * block_sums).ravel()
+
+
+def _search_rows(block_sums: np.ndarray, row_keys: np.ndarray, rows: np.ndarray, values: np.ndarray,
+                 lo: np.ndarray, hi: np.ndarray, side: str) -> np.ndarray:
+    # Like `np.searchsorted(block_sums[row][lo:hi], value, side) + lo` for every row and value at once. The rows are
+    # non-decreasing, so searching the whole row and clipping to [lo, hi] is the same as searching the slice.
+    positions = np.searchsorted(row_keys, rows + 1j * values, side=side) - rows * block_sums.shape[1]
+    return np.clip(positions, lo, hi)
+
+
+def _rolling_left_core_lengths(block_sums: np.ndarray, row_keys: np.ndarray, rows: np.ndarray, starts: np.ndarray,
+                               ends: np.ndarray, target_masses: np.ndarray, threshold: float) -> np.ndarray:
+    end_indices = _search_rows(block_sums, row_keys, rows, block_sums[rows, starts] + target_masses, starts, ends + 1,
+                               'left')
+    _check_found(end_indices <= ends, threshold)
+    return np.maximum(end_indices - starts, 1)
+
+
+def _rolling_right_core_lengths(block_sums: np.ndarray, row_keys: np.ndarray, rows: np.ndarray, starts: np.ndarray,
+                                ends: np.ndarray, target_masses: np.ndarray) -> np.ndarray:
+    start_indices = _search_rows(block_sums, row_keys, rows, block_sums[rows, ends] - target_masses, starts, ends + 1,
+                                 'right') - 1
+    start_indices = np.clip(start_indices, starts, ends - 1)
+    return np.maximum(ends - start_indices, 1)
+
+
+def _rolling_middle_core_lengths(block_sums: np.ndarray, row_keys: np.ndarray, rows: np.ndarray, starts: np.ndarray,
+                                 ends: np.ndarray, totals: np.ndarray, target_masses: np.ndarray,
+                                 threshold: float) -> np.ndarray:
+    lower_masses = _exceed_bound((1. - threshold) / 2) * totals
+    core_starts = _search_rows(block_sums, row_keys, rows, block_sums[rows, starts] + lower_masses, starts, ends + 1,
+                               'right') - 1
+    core_starts = np.clip(core_starts, starts, ends - 1)
+
+    end_indices = _search_rows(block_sums, row_keys, rows, block_sums[rows, core_starts] + target_masses, core_starts,
+                               ends + 1, 'left')
+    _check_found(end_indices <= ends, threshold)
+    return np.maximum(end_indices - core_starts, 1)
+
+
+def _rolling_sorted_core_lengths(frequency_vector: np.ndarray, window: int, target_masses: np.ndarray,
+                                 zero_windows: np.ndarray, threshold: float) -> np.ndarray:
+    tracker = _TopMassTracker()
+    core_lengths = np.ones(len(target_masses), dtype=np.int64)
+    for i, frequency in enumerate(frequency_vector.tolist()):
+        tracker.add(frequency, i)
+        if i >= window:
+            tracker.remove(i - window)
+        if i >= window - 1 and not zero_windows[i - window + 1]:
+            target_mass = target_masses[i - window + 1]
+            tracker.rebalance(target_mass)
+            _check_found(tracker.core_sum >= target_mass, threshold)
+            core_lengths[i - window + 1] = max(tracker.core_size, 1)
+    return core_lengths
+
+
+def compute_ephemerality_rolling(
+        frequency_vector: Sequence[float],
+        window: int,
+        threshold: float = 0.8,
+        types: str = 'all') -> EphemeralityBatch:
+    """
+    Computes ephemerality of every window of `window` consecutive bins. Row i of the result corresponds to the window
+    ending at bin `i + window - 1`. Left, middle and right cores are binary searched on cumulative sums centred on every
+    `window`-th bin in O(N log W), the sorted core is resolved with an order-statistic structure in O(N log W).
+    """
+
+    _check_threshold(threshold)
+    if window < 1:
+        raise ValueError('Window size must be a positive integer!')
+
+    frequency_vector = np.asarray(frequency_vector, dtype=float)
+    if frequency_vector.ndim != 1:
+        raise ValueError('Frequency vector must be a 1-D array!')
+    if np.any(frequency_vector < 0):
+        raise ValueError('Frequencies must be non-negative!')
+
+    n_windows = max(len(frequency_vector) - window + 1, 0)
+    block_sums = _centered_block_sums(frequency_vector, window, n_windows)
+    # Window i covers positions [starts[i], ends[i]] of row `rows[i]` of the block sums
+    rows, starts = np.divmod(np.arange(n_windows), window)
+    row_keys = _row_keys(block_sums)
+    ends = starts + window
+
+    totals = block_sums[rows, ends] - block_sums[rows, starts]
+    zero_windows = np.abs(totals) <= _ATOL
+    # Zero-mass windows get ephemerality of 1 without a search, any positive target keeps the searches in range
+    target_masses = np.where(zero_windows, 0., _reach_bound(threshold) * totals)
+    lengths = np.full(n_windows, window, dtype=np.int64)
+
+    result = dict()
+    if types == 'all' or types == 'left':
+        core_lengths = _rolling_left_core_lengths(block_sums, row_keys, rows, starts, ends, target_masses, threshold)
+        result['left_core'], result['left_core_span'], _ = _compute_ephemeralities_from_cores(
+            core_lengths, lengths, zero_windows, threshold, 'left')
+
+    if types == 'all' or types == 'middle':
+        core_lengths = _rolling_middle_core_lengths(block_sums, row_keys, rows, starts, ends, totals, target_masses,
+                                                    threshold)
+        result['middle_core'], result['middle_core_span'], _ = _compute_ephemeralities_from_cores(
+            core_lengths, lengths, zero_windows, threshold, 'middle')
+
+    if types == 'all' or types == 'right':
+        core_lengths = _rolling_right_core_lengths(block_sums, row_keys, rows, starts, ends, target_masses)
+        result['right_core'], result['right_core_span'], _ = _compute_ephemeralities_from_cores(
+            core_lengths, lengths, zero_windows, threshold, 'right')
+
+    if types == 'all' or types == 'sorted':
+        core_lengths = _rolling_sorted_core_lengths(frequency_vector, window, target_masses, zero_windows, threshold)
+        result['sorted_core'], result['sorted_core_span'], _ = _compute_ephemeralities_from_cores(
+            core_lengths, lengths, zero_windows, threshold, 'sorted')
+
+    return EphemeralityBatch(**result)
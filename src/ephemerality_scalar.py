@@ -0,0 +1,168 @@
+import bisect
+import warnings
+import itertools
+from typing import NamedTuple, Sequence
+
+
+# Ephemerality primitives that need neither NumPy nor pydantic, so that short command line invocations can be computed
+# before either of them is imported.
+
+_RTOL = 1e-05
+_ATOL = 1e-08
+
+
+class EphemeralityTuple(NamedTuple):
+    """Lightweight, validation-free counterpart of `EphemeralitySet`"""
+    left_core: float = None
+    middle_core: float = None
+    right_core: float = None
+    sorted_core: float = None
+
+
+class FlaggedEphemeralityTuple(NamedTuple):
+    """`EphemeralityTuple` with a bitmask of the cores whose negative ephemerality was rounded up to 0"""
+    left_core: float = None
+    middle_core: float = None
+    right_core: float = None
+    sorted_core: float = None
+    clamped: int = 0
+
+
+CLAMPED_LEFT_CORE = 1
+CLAMPED_MIDDLE_CORE = 2
+CLAMPED_RIGHT_CORE = 4
+CLAMPED_SORTED_CORE = 8
+CLAMP_FLAGS = {'left': CLAMPED_LEFT_CORE, 'middle': CLAMPED_MIDDLE_CORE, 'right': CLAMPED_RIGHT_CORE,
+               'sorted': CLAMPED_SORTED_CORE}
+
+_ZERO_VECTOR_EPHEMERALITIES = EphemeralityTuple(left_core=1., middle_core=1., right_core=1., sorted_core=1.)
+_ZERO_VECTOR_FLAGGED_EPHEMERALITIES = FlaggedEphemeralityTuple(left_core=1., middle_core=1., right_core=1.,
+                                                               sorted_core=1.)
+
+
+def _reach_bound(value: float) -> float:
+    # Smallest cumulative sum that counts as reaching `value`, i.e. `np.isclose(sum, value) or sum > value`
+    return value - (_ATOL + _RTOL * abs(value))
+
+
+def _exceed_bound(value: float) -> float:
+    # Largest cumulative sum that does not count as exceeding `value`, i.e. `sum > value and not np.isclose(sum, value)`
+    return value + (_ATOL + _RTOL * abs(value))
+
+
+def _ephemerality_raise_error(threshold: float):
+    if 0. < threshold <= 1:
+        raise ValueError('Input frequency vector has not been internally normalized!')
+    else:
+        raise ValueError('Threshold value is not within (0, 1] range!')
+
+
+def _check_threshold(threshold: float):
+    if threshold <= 0.:
+        raise ValueError('Threshold value must be greater than 0!')
+
+    if threshold > 1.:
+        raise ValueError('Threshold value must be less or equal to 1!')
+
+
+def _compute_ephemerality_from_core(core_length: int, range_length: int, threshold: float):
+    return 1 - (core_length / range_length) / threshold
+
+
+def _compute_clamped_ephemerality(core_length: int, range_length: int, threshold: float, core_type: str) -> float:
+    ephemerality = _compute_ephemerality_from_core(core_length, range_length, threshold)
+    # `np.isclose(ephemerality, 0.)` reduces to `abs(ephemerality) <= atol`
+    if ephemerality < -_ATOL:
+        if core_type == 'left' or core_type == 'right':
+            warnings.warn(f'Original ephemerality value is less than 0 ({ephemerality}) and is going to be rounded up! '
+                          f'This is indicative of the edge case in which ephemerality span is greater than '
+                          f'[threshold * input_vector_length], i.e. most of the frequency mass lies in a few vector '
+                          f'elements at the end of the frequency vector. Original ephemerality in this case should be '
+                          f'considered to be equal to 0. However, please double check the input vector!',
+                          RuntimeWarning)
+        elif core_type == 'middle':
+            warnings.warn(f'Filtered ephemerality value is less than 0 ({ephemerality}) and is going to be rounded up! '
+                          f'This is indicative of the edge case in which ephemerality span is greater than '
+                          f'[threshold * input_vector_length], i.e. most of the frequency mass lies in a few elements '
+                          f'at the beginning and the end of the frequency vector. Filtered ephemerality in this case should '
+                          f'be considered to be equal to 0. However, please double check the input vector!',
+                          RuntimeWarning)
+        else:
+            warnings.warn(f'Sorted ephemerality value is less than 0 ({ephemerality}) and is going to be rounded up! '
+                          f'This is indicative of the rare edge case of very short and mostly uniform frequency vector (so '
+                          f'that ephemerality span is greater than [threshold * input_vector_length]). '
+                          f'Sorted ephemerality in this case should be considered to be equal to 0. '
+                          f'However, please double check the input vector!',
+                          RuntimeWarning)
+        ephemerality = 0.
+    return ephemerality
+
+
+def _flag_clamped_ephemeralities(core_lengths: Sequence[int], range_length: int,
+                                 threshold: float) -> FlaggedEphemeralityTuple:
+    # Same rounding as `_compute_clamped_ephemerality`, reported in the bitmask instead of warnings
+    ephemeralities = []
+    clamped = 0
+    for core_length, core_type in zip(core_lengths, ('left', 'middle', 'right', 'sorted')):
+        if core_length is None:
+            ephemeralities.append(None)
+            continue
+        ephemerality = _compute_ephemerality_from_core(core_length, range_length, threshold)
+        if ephemerality < -_ATOL:
+            ephemerality = 0.
+            clamped |= CLAMP_FLAGS[core_type]
+        ephemeralities.append(ephemerality)
+    return FlaggedEphemeralityTuple(*ephemeralities, clamped=clamped)
+
+
+SMALL_VECTOR_MAX_LENGTH = 256
+
+
+def compute_ephemerality_small(frequency_vector: Sequence[float], threshold: float = 0.8) -> EphemeralityTuple:
+    """
+    Pure-Python counterpart of `compute_ephemerality(frequency_vector, threshold, result_type='tuple')`, returning the
+    same values and warnings. The cumulative sums are accumulated in the same order as by NumPy, so the results match
+    exactly. Meant for vectors of up to `SMALL_VECTOR_MAX_LENGTH` elements, for which importing and calling NumPy takes
+    longer than the computation itself.
+    """
+
+    _check_threshold(threshold)
+    frequency_vector = [float(frequency) for frequency in frequency_vector]
+    range_length = len(frequency_vector)
+    cumulative_sums = list(itertools.accumulate(frequency_vector))
+    total = cumulative_sums[-1] if range_length else 0.
+    # `np.isclose(total, 0.)`
+    if abs(total) <= _ATOL:
+        return _ZERO_VECTOR_EPHEMERALITIES
+    reach_bound = _reach_bound(threshold) * total
+
+    left_end = bisect.bisect_left(cumulative_sums, reach_bound)
+    if left_end == range_length:
+        _ephemerality_raise_error(threshold)
+    left_core_length = left_end + 1
+
+    middle_start = bisect.bisect_right(cumulative_sums, _exceed_bound((1. - threshold) / 2) * total)
+    if middle_start == range_length:
+        middle_start = range_length - 1
+    presum = cumulative_sums[middle_start - 1] if middle_start > 0 else 0.
+    middle_end = bisect.bisect_left(cumulative_sums, presum + reach_bound)
+    if middle_end == range_length:
+        _ephemerality_raise_error(threshold)
+    middle_core_length = max(middle_end - middle_start + 1, 1)
+
+    max_presum = cumulative_sums[-1] - reach_bound
+    if max_presum < 0:
+        _ephemerality_raise_error(threshold)
+    right_core_length = max(range_length - bisect.bisect_right(cumulative_sums, max_presum), 1)
+
+    sorted_sums = list(itertools.accumulate(sorted(frequency_vector, reverse=True)))
+    sorted_end = bisect.bisect_left(sorted_sums, reach_bound)
+    if sorted_end == range_length:
+        _ephemerality_raise_error(threshold)
+    sorted_core_length = sorted_end + 1
+
+    return EphemeralityTuple(
+        left_core=_compute_clamped_ephemerality(left_core_length, range_length, threshold, 'left'),
+        middle_core=_compute_clamped_ephemerality(middle_core_length, range_length, threshold, 'middle'),
+        right_core=_compute_clamped_ephemerality(right_core_length, range_length, threshold, 'right'),
+        sorted_core=_compute_clamped_ephemerality(sorted_core_length, range_length, threshold, 'sorted'))
@@ -0,0 +1,156 @@
+import numpy as np
+from typing import Any, Sequence, Union
+
+from src.ephemerality_computation import EphemeralitySet, EphemeralityTuple, FlaggedEphemeralityTuple, \
+    _ZERO_VECTOR_EPHEMERALITIES, _ZERO_VECTOR_FLAGGED_EPHEMERALITIES, _check_threshold, _compute_clamped_ephemerality, \
+    _ephemerality_raise_error, _exceed_bound, _flag_clamped_ephemeralities, _reach_bound, _to_ephemerality_set
+
+
+# The cumulative sums of a sparse vector form a step function that only changes at the nonzero bins. Positions in the
+# dense vector are recovered from the nonzero indices, extended with the vector length as a sentinel, so every search
+# below returns exactly what the corresponding search over the dense cumulative sums would.
+
+def _count_below(indices: np.ndarray, cumulative_sums: np.ndarray, value: float) -> int:
+    # Number of dense prefix sums smaller than `value`
+    if value <= 0:
+        return 0
+    return int(indices[np.searchsorted(cumulative_sums, value, side='left')])
+
+
+def _count_not_above(indices: np.ndarray, cumulative_sums: np.ndarray, value: float) -> int:
+    # Number of dense prefix sums smaller than or equal to `value`
+    if value < 0:
+        return 0
+    return int(indices[np.searchsorted(cumulative_sums, value, side='right')])
+
+
+def _dense_cumulative_sum(indices: np.ndarray, cumulative_sums: np.ndarray, position: int) -> float:
+    nonzero_index = int(np.searchsorted(indices[:-1], position, side='right')) - 1
+    return cumulative_sums[nonzero_index] if nonzero_index >= 0 else 0.
+
+
+def _sparse_left_core_length(indices: np.ndarray, cumulative_sums: np.ndarray, length: int, threshold: float) -> int:
+    end_index = _count_below(indices, cumulative_sums, _reach_bound(threshold))
+    if end_index == length:
+        _ephemerality_raise_error(threshold)
+    return end_index + 1
+
+
+def _sparse_right_core_length(indices: np.ndarray, cumulative_sums: np.ndarray, length: int, threshold: float) -> int:
+    max_presum = cumulative_sums[-1] - _reach_bound(threshold)
+    if max_presum < 0:
+        _ephemerality_raise_error(threshold)
+    return max(length - _count_not_above(indices, cumulative_sums, max_presum), 1)
+
+
+def _sparse_middle_core_length(indices: np.ndarray, cumulative_sums: np.ndarray, length: int,
+                               threshold: float) -> int:
+    lower_threshold = (1. - threshold) / 2
+
+    start_index = min(_count_not_above(indices, cumulative_sums, _exceed_bound(lower_threshold)), length - 1)
+    presum = _dense_cumulative_sum(indices, cumulative_sums, start_index - 1) if start_index > 0 else 0.
+    end_index = _count_below(indices, cumulative_sums, presum + _reach_bound(threshold))
+    if end_index == length:
+        _ephemerality_raise_error(threshold)
+
+    return max(end_index - start_index + 1, 1)
+
+
+def _sparse_sorted_core_length(values: np.ndarray, threshold: float) -> int:
+    # Zero bins come last in descending order and add no mass, so only the nonzero values need to be sorted
+    sorted_sums = np.cumsum(np.sort(values)[::-1])
+    end_index = int(np.searchsorted(sorted_sums, _reach_bound(threshold), side='left'))
+    if end_index == len(sorted_sums):
+        _ephemerality_raise_error(threshold)
+    return end_index + 1
+
+
+def _unpack_sparse_vector(frequency_vector: Any) -> tuple[int, np.ndarray, np.ndarray]:
+    # scipy.sparse rows are recognized by their interface, so scipy is never imported here
+    if hasattr(frequency_vector, 'tocoo'):
+        coo_vector = frequency_vector.tocoo()
+        if coo_vector.shape[0] != 1:
+            raise ValueError('Sparse frequency vector must be a single row!')
+        length, indices, values = coo_vector.shape[1], coo_vector.col, coo_vector.data
+    else:
+        length, indices, values = frequency_vector
+
+    length = int(length)
+    indices = np.asarray(indices, dtype=np.int64)
+    values = np.asarray(values, dtype=float)
+    if indices.ndim != 1 or indices.shape != values.shape:
+        raise ValueError('Sparse frequency vector must have one index per value!')
+    if len(indices) and (indices.min() < 0 or indices.max() >= length):
+        raise ValueError('Sparse frequency vector indices must lie within the vector length!')
+    if np.any(values < 0):
+        raise ValueError('Frequencies must be non-negative!')
+
+    if np.any(np.diff(indices) <= 0):
+        order = np.argsort(indices, kind='stable')
+        indices, values = indices[order], values[order]
+        indices, starts = np.unique(indices, return_index=True)
+        values = np.add.reduceat(values, starts) if len(values) else values
+    return length, indices, values
+
+
+def _compute_sparse_core_lengths(frequency_vector: Any, threshold: float, types: str) -> tuple[int, list]:
+    _check_threshold(threshold)
+    length, indices, values = _unpack_sparse_vector(frequency_vector)
+
+    if np.isclose(np.sum(values), 0.):
+        return length, []
+
+    values = values / np.sum(values)
+    cumulative_sums = np.cumsum(values)
+    indices = np.append(indices, length)
+
+    core_lengths = [None] * 4
+    if types == 'all' or types == 'left':
+        core_lengths[0] = _sparse_left_core_length(indices, cumulative_sums, length, threshold)
+    if types == 'all' or types == 'middle':
+        core_lengths[1] = _sparse_middle_core_length(indices, cumulative_sums, length, threshold)
+    if types == 'all' or types == 'right':
+        core_lengths[2] = _sparse_right_core_length(indices, cumulative_sums, length, threshold)
+    if types == 'all' or types == 'sorted':
+        core_lengths[3] = _sparse_sorted_core_length(values, threshold)
+    return length, core_lengths
+
+
+def _compute_sparse_ephemerality_tuple(
+        frequency_vector: Any,
+        threshold: float = 0.8,
+        types: str = 'all') -> EphemeralityTuple:
+
+    length, core_lengths = _compute_sparse_core_lengths(frequency_vector, threshold, types)
+    if not core_lengths:
+        return _ZERO_VECTOR_EPHEMERALITIES
+
+    return EphemeralityTuple(*[
+        None if core_length is None else _compute_clamped_ephemerality(core_length, length, threshold, core_type)
+        for core_length, core_type in zip(core_lengths, ('left', 'middle', 'right', 'sorted'))
+    ])
+
+
+def compute_ephemerality_sparse(
+        frequency_vector: Union[tuple[int, Sequence[int], Sequence[float]], Any],
+        threshold: float = 0.8,
+        types: str = 'all',
+        result_type: str = 'model') -> Union[EphemeralitySet, EphemeralityTuple, FlaggedEphemeralityTuple]:
+    """
+    Computes ephemerality of a sparse frequency vector, given either as a `(length, indices, values)` tuple or as a
+    single-row scipy.sparse matrix. Zero bins never change the cumulative mass, so all cores are found in time
+    proportional to the number of nonzero bins, without building the dense vector. Result types are the same as in
+    `compute_ephemerality`.
+    """
+
+    if result_type == 'model':
+        return _to_ephemerality_set(_compute_sparse_ephemerality_tuple(frequency_vector, threshold, types))
+    elif result_type == 'tuple':
+        return _compute_sparse_ephemerality_tuple(frequency_vector, threshold, types)
+    elif result_type == 'flagged':
+        length, core_lengths = _compute_sparse_core_lengths(frequency_vector, threshold, types)
+        if not core_lengths:
+            return _ZERO_VECTOR_FLAGGED_EPHEMERALITIES
+        return _flag_clamped_ephemeralities(core_lengths, length, threshold)
+    else:
+        raise ValueError(f'Unrecognized result type: {result_type}!')
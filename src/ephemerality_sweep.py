@@ -0,0 +1,118 @@
+import numpy as np
+from typing import Sequence
+
+from src.ephemerality_computation import _ephemerality_raise_error, _reach_bound, _exceed_bound, \
+    _normalize_frequency_vector
+from src.ephemerality_batch import _check_thresholds, _prepare_normalized_matrix, _reversed_cumulative_sums, \
+    _sorted_cumulative_sums, _compute_ephemeralities_from_cores, compute_left_core_lengths, \
+    compute_middle_core_lengths, compute_right_core_lengths, compute_sorted_core_lengths
+
+
+SWEEP_CORE_TYPES = ('left', 'middle', 'right', 'sorted')
+
+
+def _searchsorted_or_raise(sorted_sums: np.ndarray, bounds: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    indices = np.searchsorted(sorted_sums, bounds, side='left')
+    not_found = indices == len(sorted_sums)
+    if np.any(not_found):
+        _ephemerality_raise_error(thresholds[np.argmax(not_found)])
+    return indices
+
+
+def _sweep_core_lengths(frequency_vector: np.ndarray, thresholds: np.ndarray, core_type: str,
+                        cumulative_sums: np.ndarray) -> np.ndarray:
+    reach_bounds = _reach_bound(thresholds)
+    range_length = len(frequency_vector)
+
+    if core_type == 'left':
+        return _searchsorted_or_raise(cumulative_sums, reach_bounds, thresholds) + 1
+
+    if core_type == 'right':
+        max_presums = cumulative_sums[-1] - reach_bounds
+        if np.any(max_presums < 0):
+            _ephemerality_raise_error(thresholds[np.argmax(max_presums < 0)])
+        start_indices = np.searchsorted(cumulative_sums, max_presums, side='right')
+        return np.maximum(range_length - start_indices, 1)
+
+    if core_type == 'middle':
+        start_indices = np.searchsorted(cumulative_sums, _exceed_bound((1. - thresholds) / 2), side='right')
+        start_indices = np.minimum(start_indices, range_length - 1)
+        presums = np.where(start_indices > 0, cumulative_sums[np.maximum(start_indices - 1, 0)], 0.)
+        end_indices = _searchsorted_or_raise(cumulative_sums, presums + reach_bounds, thresholds)
+        return np.maximum(end_indices - start_indices + 1, 1)
+
+    sorted_sums = np.cumsum(np.sort(frequency_vector)[::-1])
+    return _searchsorted_or_raise(sorted_sums, reach_bounds, thresholds) + 1
+
+
+def _compute_vector_sweep(frequency_vector: Sequence[float], thresholds: np.ndarray, types: str) -> np.ndarray:
+    ephemeralities = np.full((len(thresholds), len(SWEEP_CORE_TYPES)), np.nan)
+
+    if np.isclose(np.sum(frequency_vector), 0.):
+        ephemeralities[:] = 1.
+        return ephemeralities
+
+    frequency_vector = _normalize_frequency_vector(frequency_vector)
+    range_length = np.array(len(frequency_vector))
+    cumulative_sums = np.cumsum(frequency_vector)
+
+    for i, core_type in enumerate(SWEEP_CORE_TYPES):
+        if types == 'all' or types == core_type:
+            core_lengths = _sweep_core_lengths(frequency_vector, thresholds, core_type, cumulative_sums)
+            ephemeralities[:, i], _, _ = _compute_ephemeralities_from_cores(
+                core_lengths, range_length, np.array(False), thresholds, core_type)
+
+    return ephemeralities
+
+
+def _compute_batch_sweep(frequency_vectors: np.ndarray, thresholds: np.ndarray, types: str,
+                         lengths: Sequence[int] = None) -> np.ndarray:
+    normalized_matrix, lengths, zero_rows = _prepare_normalized_matrix(frequency_vectors, lengths)
+    ephemeralities = np.full((normalized_matrix.shape[0], len(thresholds), len(SWEEP_CORE_TYPES)), np.nan)
+    if normalized_matrix.shape[0] == 0:
+        return ephemeralities
+
+    # Every prefix sum and the sorted order are computed once and shared by all thresholds
+    cumulative_sums = np.cumsum(normalized_matrix, axis=1) if types in ('all', 'left', 'middle') else None
+    reversed_sums = _reversed_cumulative_sums(normalized_matrix, lengths) if types in ('all', 'right') else None
+    sorted_sums = _sorted_cumulative_sums(normalized_matrix) if types in ('all', 'sorted') else None
+
+    for i, core_type in enumerate(SWEEP_CORE_TYPES):
+        if types != 'all' and types != core_type:
+            continue
+
+        core_lengths = np.empty((normalized_matrix.shape[0], len(thresholds)), dtype=np.int64)
+        for j, threshold in enumerate(thresholds):
+            if core_type == 'left':
+                core_lengths[:, j] = compute_left_core_lengths(cumulative_sums, threshold)
+            elif core_type == 'middle':
+                core_lengths[:, j] = compute_middle_core_lengths(cumulative_sums, lengths, threshold)
+            elif core_type == 'right':
+                core_lengths[:, j] = compute_right_core_lengths(reversed_sums, threshold)
+            else:
+                core_lengths[:, j] = compute_sorted_core_lengths(sorted_sums, threshold)
+
+        ephemeralities[:, :, i], _, _ = _compute_ephemeralities_from_cores(
+            core_lengths, lengths[:, None], zero_rows[:, None], thresholds[None, :], core_type)
+
+    return ephemeralities
+
+
+def compute_ephemerality_sweep(
+        frequency_vectors: np.ndarray,
+        thresholds: Sequence[float],
+        types: str = 'all',
+        lengths: Sequence[int] = None) -> np.ndarray:
+    """
+    Computes ephemerality for many thresholds at once, reusing the same prefix sums and sorted order. A single vector
+    gives an (n_thresholds x 4) array, a matrix or ragged input (as in `compute_ephemerality_batch`) gives an
+    (n_vectors x n_thresholds x 4) array. Columns follow `SWEEP_CORE_TYPES`, cores not requested in `types` are NaN.
+    """
+
+    thresholds = _check_thresholds(thresholds)
+
+    frequency_vectors = np.asarray(frequency_vectors, dtype=float)
+    if frequency_vectors.ndim == 1 and lengths is None:
+        return _compute_vector_sweep(frequency_vectors, thresholds, types)
+
+    return _compute_batch_sweep(frequency_vectors, thresholds, types, lengths)
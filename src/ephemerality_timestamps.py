@@ -0,0 +1,59 @@
+import numpy as np
+from typing import Any, Sequence, Union
+
+from src.ephemerality_batch import EphemeralityBatch, compute_ephemerality_batch
+
+
+def _bin_timestamps(timestamps: np.ndarray, topic_codes: np.ndarray, n_topics: int, start: Any, end: Any,
+                    bin_width: Any) -> np.ndarray:
+    # Floor division works alike for numbers and for datetime64 timestamps with timedelta64 bin widths
+    n_bins = int(-((start - end) // bin_width))
+    if n_bins < 1:
+        raise ValueError('Time range must span at least one bin!')
+
+    in_range = (timestamps >= start) & (timestamps < end)
+    bins = ((timestamps[in_range] - start) // bin_width).astype(np.int64)
+    flat_bins = topic_codes[in_range] * n_bins + bins if n_topics > 1 else bins
+    return np.bincount(flat_bins, minlength=n_topics * n_bins).astype(float).reshape(n_topics, n_bins)
+
+
+def compute_ephemerality_from_timestamps(
+        timestamps: Sequence[Any],
+        start: Any,
+        end: Any,
+        bin_width: Union[Any, Sequence[Any]],
+        topic_ids: Sequence[Any] = None,
+        threshold: float = 0.8,
+        types: str = 'all') -> Union[EphemeralityBatch, dict[Any, EphemeralityBatch]]:
+    """
+    Computes ephemerality straight from raw event timestamps. Events within [start, end) are counted into bins of
+    `bin_width` in one vectorized pass, events outside the range are ignored. Timestamps may be numbers, or datetime64
+    values with timedelta64 bin widths. If `topic_ids` is given, events are grouped by topic and the rows of the result
+    follow `np.unique(topic_ids)`, otherwise the result has a single row. If several bin widths are given, a dictionary
+    with a result per bin width is returned.
+    """
+
+    timestamps = np.asarray(timestamps)
+    if timestamps.ndim != 1:
+        raise ValueError('Timestamps must be a 1-D array!')
+
+    if topic_ids is None:
+        topic_codes, n_topics = None, 1
+    else:
+        topic_ids = np.asarray(topic_ids)
+        if topic_ids.shape != timestamps.shape:
+            raise ValueError('Number of topic ids does not match the number of timestamps!')
+        topics, topic_codes = np.unique(topic_ids, return_inverse=True)
+        n_topics = len(topics)
+
+    several_widths = isinstance(bin_width, (list, tuple, np.ndarray))
+    bin_widths = list(bin_width) if several_widths else [bin_width]
+    if any(width <= np.zeros_like(width) for width in bin_widths):
+        raise ValueError('Bin width must be positive!')
+
+    results = dict()
+    for width in bin_widths:
+        frequency_vectors = _bin_timestamps(timestamps, topic_codes, n_topics, start, end, width)
+        results[width] = compute_ephemerality_batch(frequency_vectors, threshold=threshold, types=types)
+
+    return results if several_widths else results[bin_width]
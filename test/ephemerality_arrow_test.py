@@ -0,0 +1,98 @@
+import os
+import tempfile
+import warnings
+from unittest import TestCase, skipUnless
+
+import numpy as np
+
+from src import compute_ephemerality, compute_ephemerality_dataset, compute_record_batch_ephemerality
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+
+@skipUnless(pa is not None, 'pyarrow is not installed')
+class TestArrowEphemerality(TestCase):
+    @staticmethod
+    def _table() -> 'pa.Table':
+        rng = np.random.default_rng(3)
+        vectors = [list(rng.random(length) * (rng.random(length) < 0.5)) for length in rng.integers(1, 30, 100)]
+        counts = [list(rng.integers(0, 4, length)) for length in rng.integers(1, 10, 100)]
+        vectors[7] = None
+        return pa.table({'topic': np.arange(100),
+                         'frequencies': pa.array(vectors, type=pa.list_(pa.float64())),
+                         'counts': pa.array(counts, type=pa.large_list(pa.int64()))})
+
+    def assert_matches_per_vector(self, table: 'pa.Table', column: str):
+        for row in table.to_pylist():
+            if row[column] is None:
+                self.assertIsNone(row[f'{column}_left_core'])
+                continue
+            expected = compute_ephemerality(row[column], result_type='flagged')
+            for core_type in ('left', 'middle', 'right', 'sorted'):
+                self.assertAlmostEqual(getattr(expected, f'{core_type}_core'), row[f'{column}_{core_type}_core'])
+
+    def test_record_batch(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            record_batch = self._table().to_batches()[0].slice(10, 50)
+            result = pa.Table.from_batches([compute_record_batch_ephemerality(record_batch)])
+        self.assertEqual(50, result.num_rows)
+        self.assert_matches_per_vector(result, 'frequencies')
+        self.assert_matches_per_vector(result, 'counts')
+
+        result = compute_record_batch_ephemerality(record_batch, columns=['counts'], types='sorted',
+                                                   clamp_warnings='none')
+        self.assertEqual(['topic', 'frequencies', 'counts', 'counts_sorted_core', 'counts_sorted_core_span'],
+                         result.schema.names)
+        with self.assertRaises(ValueError):
+            compute_record_batch_ephemerality(record_batch, columns=['topic'])
+
+    def test_dataset_files(self):
+        table = self._table()
+        with tempfile.TemporaryDirectory() as directory, warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            parquet_path = os.path.join(directory, 'input.parquet')
+            arrow_path = os.path.join(directory, 'input.arrow')
+            pa.parquet.write_table(table, parquet_path)
+            with pa.ipc.new_file(arrow_path, table.schema) as writer:
+                writer.write_table(table)
+
+            for input_path, output_name in ((parquet_path, 'output.parquet'), (arrow_path, 'output.arrow')):
+                output_path = os.path.join(directory, output_name)
+                self.assertEqual(100, compute_ephemerality_dataset(input_path, output_path, columns=['frequencies'],
+                                                                   batch_size=16))
+                if output_path.endswith('.parquet'):
+                    result = pa.parquet.read_table(output_path)
+                else:
+                    result = pa.ipc.open_file(output_path).read_all()
+                self.assertEqual(table.column('topic').to_pylist(), result.column('topic').to_pylist())
+                self.assert_matches_per_vector(result, 'frequencies')
+
+            with self.assertRaises(ValueError):
+                compute_ephemerality_dataset(parquet_path, os.path.join(directory, 'output.csv'))
+
+    def test_empty_dataset(self):
+        table = self._table().slice(0, 0)
+        with tempfile.TemporaryDirectory() as directory:
+            parquet_path = os.path.join(directory, 'input.parquet')
+            arrow_path = os.path.join(directory, 'input.arrow')
+            pa.parquet.write_table(table, parquet_path)
+            # An Arrow IPC file without any record batches
+            pa.ipc.new_file(arrow_path, table.schema).close()
+
+            for input_path, output_name in ((parquet_path, 'output.arrow'), (arrow_path, 'output.parquet')):
+                output_path = os.path.join(directory, output_name)
+                self.assertEqual(0, compute_ephemerality_dataset(input_path, output_path, columns=['counts'],
+                                                                 types='left'))
+                if output_path.endswith('.parquet'):
+                    result = pa.parquet.read_table(output_path)
+                else:
+                    result = pa.ipc.open_file(output_path).read_all()
+                self.assertEqual(0, result.num_rows)
+                self.assertEqual(['topic', 'frequencies', 'counts', 'counts_left_core', 'counts_left_core_span'],
+                                 result.schema.names)
@@ -0,0 +1,54 @@
+import warnings
+from unittest import TestCase, skipUnless
+
+import numpy as np
+
+from src import compute_ephemerality, set_backend, get_backend, available_backends
+from test.vectors import random_vectors
+
+
+@skipUnless('numba' in available_backends(), 'numba is not installed')
+class TestEphemeralityBackends(TestCase):
+    _thresholds = (0.1, 0.5, 0.8, 1.)
+    _types = ('all', 'left', 'middle', 'right', 'sorted')
+
+    _vectors = random_vectors(
+        5, (2, 7, 100, 1000, 10000),
+        (lambda rng, length: rng.random(length) * (rng.random(length) < 0.2),
+         lambda rng, length: rng.pareto(1., length),
+         lambda rng, length: rng.integers(0, 5, length)),
+        fixed=(np.array([1.]), np.array([0., 0., 1.]), np.array([1., 0., 0., 1.]), np.zeros(4),
+               np.array([0, 3, 0, 0, 1]), np.array([0.3, 0.2, 0.5], dtype=np.float32)))
+
+    def test_backends_match(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for vector in self._vectors:
+                for threshold in self._thresholds:
+                    for types in self._types:
+                        self.assertEqual(
+                            compute_ephemerality(vector, threshold, types, result_type='tuple', backend='numpy'),
+                            compute_ephemerality(vector, threshold, types, result_type='tuple', backend='numba'))
+
+    def test_clamp_warnings_match(self):
+        for backend in ('numpy', 'numba'):
+            with warnings.catch_warnings(record=True) as warns:
+                warnings.simplefilter('always', category=RuntimeWarning)
+                compute_ephemerality([0., 0., 0., 1.], 0.5, backend=backend)
+            self.assertEqual(1, len(warns))
+
+    def test_set_backend(self):
+        self.assertEqual('numpy', get_backend())
+        set_backend('numba')
+        try:
+            self.assertEqual('numba', get_backend())
+            self.assertEqual(compute_ephemerality([0., 1., 1., 0.], backend='numpy'),
+                             compute_ephemerality([0., 1., 1., 0.]))
+        finally:
+            set_backend('numpy')
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            set_backend('cuda')
+        with self.assertRaises(ValueError):
+            compute_ephemerality([1.], backend='cuda')
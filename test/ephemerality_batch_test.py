@@ -0,0 +1,158 @@
+import warnings
+import tracemalloc
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, compute_ephemerality_batch, EphemeralityBatch
+
+
+CORE_TYPES = ('left', 'middle', 'right', 'sorted')
+
+
+def _random_vectors(seed: int, n_vectors: int, max_length: int) -> list[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    vectors = list()
+    for i in range(n_vectors):
+        length = rng.integers(1, max_length + 1)
+        if i % 3 == 0:
+            vectors.append(rng.random(length))
+        elif i % 3 == 1:
+            vectors.append((rng.random(length) < 0.2) * rng.integers(1, 10, length).astype(float))
+        else:
+            vectors.append(np.round(rng.random(length), 1))
+    return vectors
+
+
+class TestComputeEphemeralityBatch(TestCase):
+    _thresholds = (0.3, 0.5, 0.8, 1.)
+
+    def assert_matches_per_vector(self, vectors: list[np.ndarray], batch, threshold: float, types: str = 'all'):
+        for i, vector in enumerate(vectors):
+            expected = compute_ephemerality(frequency_vector=vector, threshold=threshold, types=types)
+            for core_type in CORE_TYPES:
+                actual_values = getattr(batch, f'{core_type}_core')
+                if types != 'all' and types != core_type:
+                    self.assertIsNone(actual_values)
+                else:
+                    self.assertAlmostEqual(getattr(expected, f'{core_type}_core'), actual_values[i], places=8,
+                                           msg=f'{core_type} core of {vector} with threshold {threshold}')
+
+    def test_matrix_input(self):
+        rng = np.random.default_rng(0)
+        matrix = rng.random((50, 20)) * (rng.random((50, 20)) < 0.3)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for threshold in self._thresholds:
+                batch = compute_ephemerality_batch(matrix, threshold=threshold)
+                self.assert_matches_per_vector(list(matrix), batch, threshold)
+
+    def test_ragged_input(self):
+        vectors = _random_vectors(seed=1, n_vectors=60, max_length=25)
+        lengths = [len(vector) for vector in vectors]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for threshold in self._thresholds:
+                batch = compute_ephemerality_batch(np.concatenate(vectors), threshold=threshold, lengths=lengths)
+                self.assert_matches_per_vector(vectors, batch, threshold)
+
+    def test_padded_input_ignores_padding(self):
+        vectors = _random_vectors(seed=2, n_vectors=20, max_length=15)
+        lengths = [len(vector) for vector in vectors]
+        padded = np.full((len(vectors), 15), 100.)
+        for i, vector in enumerate(vectors):
+            padded[i, :len(vector)] = vector
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            batch = compute_ephemerality_batch(padded, threshold=0.8, lengths=lengths)
+            self.assert_matches_per_vector(vectors, batch, 0.8)
+
+    def test_single_type(self):
+        vectors = _random_vectors(seed=3, n_vectors=10, max_length=10)
+        lengths = [len(vector) for vector in vectors]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for core_type in CORE_TYPES:
+                batch = compute_ephemerality_batch(np.concatenate(vectors), threshold=0.8, types=core_type,
+                                                   lengths=lengths)
+                self.assert_matches_per_vector(vectors, batch, 0.8, types=core_type)
+
+    def test_spans(self):
+        batch = compute_ephemerality_batch(np.array([[0., 0., 0., .2, .55, 0., .15, .1, 0., 0.]]), threshold=0.8)
+        self.assertEqual(7, batch.left_core_span[0])
+        self.assertEqual(4, batch.middle_core_span[0])
+        self.assertEqual(6, batch.right_core_span[0])
+        self.assertEqual(3, batch.sorted_core_span[0])
+
+    def test_zero_vectors(self):
+        batch = compute_ephemerality_batch(np.zeros(3), threshold=0.8, lengths=[0, 3])
+        for core_type in CORE_TYPES:
+            np.testing.assert_array_equal([1., 1.], getattr(batch, f'{core_type}_core'))
+
+    def test_clamping_warning(self):
+        with warnings.catch_warnings(record=True) as warns:
+            warnings.simplefilter('always', category=RuntimeWarning)
+            batch = compute_ephemerality_batch(np.array([[0., 0., 0., 1.], [1., 0., 0., 0.]]), threshold=0.8)
+
+        np.testing.assert_array_equal([0., 0.6875], batch.left_core)
+        np.testing.assert_array_equal([0.6875, 0.], batch.right_core)
+        self.assertEqual(2, len(warns))
+        for warn in warns:
+            self.assertTrue(str(warn.message).startswith('1 original ephemerality value(s)'))
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            compute_ephemerality_batch(np.ones((2, 3)), threshold=0.)
+        with self.assertRaises(ValueError):
+            compute_ephemerality_batch(np.ones(5), threshold=0.8)
+        with self.assertRaises(ValueError):
+            compute_ephemerality_batch(np.ones(5), threshold=0.8, lengths=[2, 2])
+
+    def test_per_vector_thresholds(self):
+        vectors = _random_vectors(seed=4, n_vectors=30, max_length=20)
+        lengths = [len(vector) for vector in vectors]
+        thresholds = np.random.default_rng(4).choice([0.3, 0.5, 0.8, 1.], size=len(vectors))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            batch = compute_ephemerality_batch(np.concatenate(vectors), threshold=thresholds, lengths=lengths)
+            for i, (vector, threshold) in enumerate(zip(vectors, thresholds)):
+                self.assert_matches_per_vector([vector], EphemeralityBatch(
+                    **{field: values[i:i + 1] for field, values in batch.dict().items() if values is not None}),
+                    threshold)
+
+        with self.assertRaises(ValueError):
+            compute_ephemerality_batch(np.ones((2, 3)), threshold=[0.8])
+        with self.assertRaises(ValueError):
+            compute_ephemerality_batch(np.ones((2, 3)), threshold=[0.8, 1.2])
+
+    def test_long_vector_among_short_ones(self):
+        vectors = _random_vectors(seed=5, n_vectors=200, max_length=10)
+        vectors.insert(100, np.random.default_rng(5).random(50000))
+        vectors.append(np.zeros(0))
+        lengths = [len(vector) for vector in vectors]
+        thresholds = np.random.default_rng(6).choice([0.3, 0.5, 0.8, 1.], size=len(vectors))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            tracemalloc.start()
+            batch = compute_ephemerality_batch(np.concatenate(vectors), threshold=thresholds, lengths=lengths,
+                                               clamp_flags=True)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            for i, (vector, threshold) in enumerate(zip(vectors, thresholds)):
+                expected = compute_ephemerality(vector, threshold, result_type='flagged')
+                self.assertEqual(expected.clamped, batch.clamped[i])
+                for core_type in CORE_TYPES:
+                    self.assertAlmostEqual(getattr(expected, f'{core_type}_core'),
+                                           getattr(batch, f'{core_type}_core')[i], places=8)
+        # Padding every vector to the longest one would take 80 MB per matrix
+        self.assertLess(peak, 20 * 2 ** 20)
+
+    def test_grouped_clamping_warnings(self):
+        vectors = [np.array([0., 0., 0., 1.])] * 3 + [np.ones(1000)]
+        with warnings.catch_warnings(record=True) as warns:
+            warnings.simplefilter('always', category=RuntimeWarning)
+            compute_ephemerality_batch(np.concatenate(vectors), threshold=0.8, lengths=[len(v) for v in vectors])
+        # One warning per core type for the whole batch, not one per group of lengths
+        self.assertEqual(1, len(warns))
+        self.assertTrue(str(warns[0].message).startswith('3 original ephemerality value(s)'))
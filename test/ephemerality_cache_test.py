@@ -0,0 +1,57 @@
+from unittest import TestCase, mock
+
+import numpy as np
+
+from src import compute_ephemerality, EphemeralityCache, EphemeralitySet, EphemeralityTuple
+
+
+class TestEphemeralityCache(TestCase):
+    def test_matches_uncached(self):
+        cache = EphemeralityCache()
+        vector = np.array([0., 3., 1., 0., 2., 0., 0., 1.])
+        for types in ('all', 'left', 'middle', 'right', 'sorted'):
+            for _ in range(2):
+                self.assertEqual(compute_ephemerality(vector, 0.8, types),
+                                 cache.compute_ephemerality(vector, 0.8, types))
+        self.assertEqual(cache.stats()['hits'], 5)
+        self.assertEqual(cache.stats()['misses'], 5)
+        self.assertIsInstance(cache.compute_ephemerality(vector, result_type='tuple'), EphemeralityTuple)
+        self.assertIsInstance(cache.compute_ephemerality(vector, result_type='model'), EphemeralitySet)
+
+    def test_key_depends_on_vector_threshold_and_types(self):
+        key = EphemeralityCache.key([1., 0., 1.], 0.8, 'all')
+        self.assertEqual(key, EphemeralityCache.key(np.array([1, 0, 1]), 0.8, 'all'))
+        self.assertNotEqual(key, EphemeralityCache.key([1., 1., 0.], 0.8, 'all'))
+        self.assertNotEqual(key, EphemeralityCache.key([1., 0., 1.], 0.5, 'all'))
+        self.assertNotEqual(key, EphemeralityCache.key([1., 0., 1.], 0.8, 'left'))
+
+    def test_lru_eviction(self):
+        cache = EphemeralityCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_ttl_expiration(self):
+        cache = EphemeralityCache(ttl=10.)
+        with mock.patch('src.ephemerality_cache.time.monotonic', return_value=100.):
+            cache.put('a', 1)
+        with mock.patch('src.ephemerality_cache.time.monotonic', return_value=105.):
+            self.assertEqual(cache.get('a'), 1)
+        with mock.patch('src.ephemerality_cache.time.monotonic', return_value=111.):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['expirations'], 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            EphemeralityCache(max_entries=0)
+        with self.assertRaises(ValueError):
+            EphemeralityCache(ttl=0.)
+        with self.assertRaises(ValueError):
+            EphemeralityCache().compute_ephemerality([1.], result_type='dict')
@@ -0,0 +1,63 @@
+import warnings
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, compute_ephemerality_batch, compute_ephemerality_sparse, CLAMP_FLAGS, \
+    count_clamped, warn_clamped
+from test.vectors import random_vectors
+
+
+class TestClampFlags(TestCase):
+    _vectors = random_vectors(
+        9, (5,), (lambda rng, length: rng.random(length) * (rng.random(length) < 0.5),), repeats=40,
+        fixed=(np.array([0., 0., 0., 1.]), np.array([1., 0., 0., 1.]), np.array([1., 1.]), np.zeros(3)))
+
+    def test_flagged_matches_tuple(self):
+        for vector in self._vectors:
+            for threshold in (0.3, 0.8, 1.):
+                with warnings.catch_warnings(record=True) as warns:
+                    warnings.simplefilter('always', category=RuntimeWarning)
+                    expected = compute_ephemerality(vector, threshold, result_type='tuple')
+                with warnings.catch_warnings():
+                    warnings.simplefilter('error', category=RuntimeWarning)
+                    flagged = compute_ephemerality(vector, threshold, result_type='flagged')
+                self.assertEqual(tuple(expected), tuple(flagged)[:4])
+                self.assertEqual(len(warns), bin(flagged.clamped).count('1'))
+
+    def test_flags(self):
+        flagged = compute_ephemerality([0., 0., 0., 1.], 0.5, result_type='flagged')
+        self.assertEqual(CLAMP_FLAGS['left'], flagged.clamped)
+        flagged = compute_ephemerality([1., 0., 0., 1.], 0.8, types='middle', result_type='flagged')
+        self.assertEqual(CLAMP_FLAGS['middle'], flagged.clamped)
+        self.assertEqual(0, compute_ephemerality([0., 0., 0.], result_type='flagged').clamped)
+        flagged = compute_ephemerality_sparse((4, [3], [1.]), 0.5, result_type='flagged')
+        self.assertEqual(compute_ephemerality([0., 0., 0., 1.], 0.5, result_type='flagged'), flagged)
+
+    def test_batch_flags_match_per_vector(self):
+        vectors = self._vectors
+        lengths = [len(vector) for vector in vectors]
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', category=RuntimeWarning)
+            batch = compute_ephemerality_batch(np.concatenate(vectors), threshold=0.8, lengths=lengths,
+                                               clamp_warnings='none', clamp_flags=True)
+        expected = [compute_ephemerality(vector, 0.8, result_type='flagged').clamped for vector in vectors]
+        np.testing.assert_array_equal(expected, batch.clamped)
+        self.assertEqual(count_clamped(expected), count_clamped(batch.clamped))
+
+    def test_summary_warning(self):
+        vectors = self._vectors
+        with warnings.catch_warnings(record=True) as warns:
+            warnings.simplefilter('always', category=RuntimeWarning)
+            compute_ephemerality_batch(np.concatenate(vectors), lengths=[len(vector) for vector in vectors],
+                                       clamp_warnings='summary')
+            warn_clamped([0, 0])
+        self.assertEqual(1, len(warns))
+        self.assertIn(f' of {len(vectors)} results ', str(warns[0].message))
+
+        with self.assertRaises(ValueError):
+            compute_ephemerality_batch(np.ones((2, 3)), clamp_warnings='once')
+
+    def test_count_clamped(self):
+        clamped = np.array([0, CLAMP_FLAGS['left'] | CLAMP_FLAGS['sorted'], CLAMP_FLAGS['left']], dtype=np.uint8)
+        self.assertEqual({'left': 2, 'middle': 0, 'right': 0, 'sorted': 1}, count_clamped(clamped))
@@ -0,0 +1,223 @@
+import sys
+import json
+import tempfile
+import subprocess
+from pathlib import Path
+from unittest import TestCase, skipUnless
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _run_cli(*arguments: str) -> str:
+    return subprocess.run([sys.executable, 'ephemerality.py', *arguments, '--clamp-warnings', 'none'], cwd=REPO_ROOT,
+                          check=True, capture_output=True, text=True).stdout
+
+
+def _run_cli_error(*arguments: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, 'ephemerality.py', *arguments], cwd=REPO_ROOT, capture_output=True,
+                          text=True)
+
+
+class CliTestCase(TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+
+        rng = np.random.default_rng(17)
+        self.vectors = [(rng.random(length) * (rng.random(length) < 0.5)).round(2)
+                        for length in rng.integers(1, 30, 40)]
+        self.csv_path = self.temp_dir / 'input.csv'
+        with open(self.csv_path, 'w') as f:
+            for vector in self.vectors:
+                f.write(','.join(map(str, vector)) + '\n')
+        self.serial_output = _run_cli('-i', str(self.csv_path))
+
+
+class TestWorkers(CliTestCase):
+    def test_output_order(self):
+        self.assertEqual(len(self.vectors), len(self.serial_output.splitlines()))
+        for workers in ('2', '3'):
+            self.assertEqual(self.serial_output, _run_cli('-i', str(self.csv_path), '-w', workers, '--chunk-size', '3'))
+
+    def test_json_output_order(self):
+        serial_path, parallel_path = self.temp_dir / 'serial.json', self.temp_dir / 'parallel.json'
+        _run_cli('-i', str(self.csv_path), '-o', str(serial_path))
+        _run_cli('-i', str(self.csv_path), '-o', str(parallel_path), '-w', '3', '--chunk-size', '4')
+        with open(serial_path) as serial_file, open(parallel_path) as parallel_file:
+            self.assertEqual(json.load(serial_file), json.load(parallel_file))
+
+
+class TestStream(CliTestCase):
+    def test_ndjson_output(self):
+        json_path, ndjson_path = self.temp_dir / 'output.json', self.temp_dir / 'output.ndjson'
+        _run_cli('-i', str(self.csv_path), '-o', str(json_path))
+        _run_cli('-i', str(self.csv_path), '-o', str(ndjson_path), '-s', '--chunk-size', '6')
+        with open(json_path) as json_file, open(ndjson_path) as ndjson_file:
+            self.assertEqual(json.load(json_file), [json.loads(line) for line in ndjson_file])
+
+    def test_printed_output(self):
+        self.assertEqual(self.serial_output, _run_cli('-i', str(self.csv_path), '-s', '--chunk-size', '6'))
+        self.assertEqual(self.serial_output, _run_cli('-i', str(self.csv_path), '-s', '-w', '2', '--chunk-size', '6'))
+
+
+class TestBinaryInput(CliTestCase):
+    def csv_results(self) -> list[dict]:
+        json_path = self.temp_dir / 'expected.json'
+        _run_cli('-i', str(self.csv_path), '-o', str(json_path))
+        with open(json_path) as f:
+            return json.load(f)
+
+    def assert_printed_close(self, expected: str, actual: str):
+        np.testing.assert_allclose(np.loadtxt(expected.splitlines(), ndmin=2), np.loadtxt(actual.splitlines(), ndmin=2))
+
+    def test_npy_matrix(self):
+        matrix = np.random.default_rng(18).poisson(1., (25, 12)).astype(float)
+        npy_path = self.temp_dir / 'matrix.npy'
+        np.save(npy_path, matrix)
+        with open(self.csv_path, 'w') as f:
+            for vector in matrix:
+                f.write(','.join(map(str, vector)) + '\n')
+        self.assert_printed_close(_run_cli('-i', str(self.csv_path)),
+                                  _run_cli('-i', str(npy_path), '--chunk-size', '7'))
+
+    def test_npz_ragged_vectors(self):
+        npz_path = self.temp_dir / 'vectors.npz'
+        np.savez(npz_path, frequency_vectors=np.concatenate(self.vectors),
+                 lengths=np.array([len(vector) for vector in self.vectors]))
+        self.assert_printed_close(self.serial_output, _run_cli('-i', str(npz_path), '--chunk-size', '7'))
+
+    def test_structured_npy_output(self):
+        npz_path, output_path = self.temp_dir / 'vectors.npz', self.temp_dir / 'output.npy'
+        np.savez(npz_path, frequency_vectors=np.concatenate(self.vectors),
+                 lengths=np.array([len(vector) for vector in self.vectors]))
+        self.assertEqual('', _run_cli('-i', str(npz_path), '-o', str(output_path), '--chunk-size', '7'))
+
+        records = np.load(output_path)
+        self.assertEqual(len(self.vectors), len(records))
+        self.assertEqual(tuple(f'{core_type}_core{suffix}' for core_type in ('left', 'middle', 'right', 'sorted')
+                               for suffix in ('', '_span')), records.dtype.names)
+        for field, values in zip(('left_core', 'middle_core', 'right_core', 'sorted_core'),
+                                 np.array([list(result.values()) for result in self.csv_results()]).T):
+            np.testing.assert_allclose(values, records[field])
+        lengths = np.array([len(vector) for vector in self.vectors])
+        for core_type in ('left', 'middle', 'right', 'sorted'):
+            spans = records[f'{core_type}_core_span']
+            self.assertTrue(np.all((spans >= 0) & (spans <= lengths)))
+
+    def test_npy_output_requires_binary_input(self):
+        result = _run_cli_error('-i', str(self.csv_path), '-o', str(self.temp_dir / 'output.npy'))
+        self.assertNotEqual(0, result.returncode)
+
+
+class TestSparse(CliTestCase):
+    def test_csv_input(self):
+        sparse_path = self.temp_dir / 'sparse.csv'
+        with open(sparse_path, 'w') as f:
+            for vector in self.vectors:
+                indices = np.nonzero(vector)[0]
+                f.write(','.join([str(len(vector))] + [f'{i}:{vector[i]}' for i in indices]) + '\n')
+        self.assertEqual(self.serial_output, _run_cli('-i', str(sparse_path), '--sparse'))
+        self.assertEqual(self.serial_output, _run_cli('-i', str(sparse_path), '--sparse', '-w', '2',
+                                                      '--chunk-size', '7'))
+
+    def test_command_line_input(self):
+        self.assertEqual(_run_cli('0,0,0,0.2,0.55,0,0.15,0.1,0,0'),
+                         _run_cli('--sparse', '10,3:0.2,4:0.55,6:0.15,7:0.1'))
+
+
+class TestLongFormat(CliTestCase):
+    def setUp(self):
+        super().setUp()
+        self.long_path = self.temp_dir / 'long.csv'
+        rows = [('b', 3, 2.), ('a', 0, 1.), ('b', 1, 1.), ('a', 4, 3.), ('b', 3, 1.), ('c', 2, 5.)]
+        with open(self.long_path, 'w') as f:
+            for row in rows:
+                f.write(','.join(map(str, row)) + '\n')
+        self.topic_vectors = {'a': [1., 0., 0., 0., 3.], 'b': [0., 1., 0., 3.], 'c': [0., 0., 5.]}
+
+    def expected_output(self, n_bins: int = None) -> str:
+        return ''.join(f'{topic} ' + _run_cli(*map(str, vector + [0.] * (n_bins - len(vector) if n_bins else 0)))
+                       for topic, vector in self.topic_vectors.items())
+
+    def test_printed_output(self):
+        self.assertEqual(self.expected_output(), _run_cli('-i', str(self.long_path), '--long-format'))
+
+    def test_json_output(self):
+        json_path = self.temp_dir / 'output.json'
+        _run_cli('-i', str(self.long_path), '--long-format', '-o', str(json_path))
+        with open(json_path) as f:
+            results = json.load(f)
+        self.assertEqual(list(self.topic_vectors), [result['topic_id'] for result in results])
+        self.assertEqual(self.expected_output(), ''.join(
+            f"{result['topic_id']} {result['left_core']} {result['middle_core']} {result['right_core']} "
+            f"{result['sorted_core']}\n" for result in results))
+
+    def test_n_bins(self):
+        self.assertEqual(self.expected_output(n_bins=8),
+                         _run_cli('-i', str(self.long_path), '--long-format', '--n-bins', '8'))
+        for n_bins in ('0', '4'):
+            result = subprocess.run([sys.executable, 'ephemerality.py', '-i', str(self.long_path), '--long-format',
+                                     '--n-bins', n_bins], cwd=REPO_ROOT, capture_output=True, text=True)
+            self.assertNotEqual(0, result.returncode)
+
+
+@skipUnless(pa is not None, 'pyarrow is not installed')
+class TestDatasetInput(CliTestCase):
+    def test_parquet_columns(self):
+        input_path, output_path = self.temp_dir / 'input.parquet', self.temp_dir / 'output.arrow'
+        pa.parquet.write_table(pa.table({'frequencies': [vector.tolist() for vector in self.vectors],
+                                         'counts': [[1, 0, 2]] * len(self.vectors)}), input_path)
+        self.assertEqual('', _run_cli('-i', str(input_path), '-o', str(output_path), '--columns', 'frequencies',
+                                      '--chunk-size', '7'))
+
+        with pa.memory_map(str(output_path), 'r') as source:
+            result = pa.ipc.open_file(source).read_all()
+        self.assertEqual(len(self.vectors), result.num_rows)
+        self.assertNotIn('counts_left_core', result.schema.names)
+        expected = np.loadtxt(self.serial_output.splitlines(), ndmin=2)
+        for i, core_type in enumerate(('left', 'middle', 'right', 'sorted')):
+            np.testing.assert_allclose(expected[:, i], result.column(f'frequencies_{core_type}_core').to_numpy())
+
+    def test_requires_dataset_output(self):
+        input_path = self.temp_dir / 'input.parquet'
+        pa.parquet.write_table(pa.table({'frequencies': [[1., 0.]]}), input_path)
+        result = subprocess.run([sys.executable, 'ephemerality.py', '-i', str(input_path), '-o',
+                                 str(self.temp_dir / 'output.json')], cwd=REPO_ROOT, capture_output=True, text=True)
+        self.assertNotEqual(0, result.returncode)
+
+
+class TestInvalidArguments(CliTestCase):
+    def assert_rejected(self, *arguments: str):
+        result = _run_cli_error(*arguments)
+        self.assertNotEqual(0, result.returncode, msg=str(arguments))
+        self.assertTrue(result.stderr.strip().endswith('!'), msg=result.stderr)
+
+    def test_workers(self):
+        npy_path = self.temp_dir / 'matrix.npy'
+        np.save(npy_path, np.ones((3, 4)))
+        long_path = self.temp_dir / 'long.csv'
+        with open(long_path, 'w') as f:
+            f.write('a,0,1\n')
+        self.assert_rejected('-i', str(npy_path), '-w', '2')
+        self.assert_rejected('-i', str(long_path), '--long-format', '-w', '2')
+        self.assert_rejected('0,1,0', '-w', '2')
+
+    def test_chunks_without_input_file(self):
+        self.assert_rejected('0,1,0', '--chunk-size', '5')
+        self.assert_rejected('0,1,0', '-s')
+
+    def test_npz_output(self):
+        npy_path = self.temp_dir / 'matrix.npy'
+        np.save(npy_path, np.ones((3, 4)))
+        self.assert_rejected('-i', str(npy_path), '-o', str(self.temp_dir / 'output.npz'))
+        self.assertFalse((self.temp_dir / 'output.npz').exists())
@@ -0,0 +1,80 @@
+from unittest import TestCase
+
+import numpy as np
+
+from src.ephemerality_computation import compute_left_core_length, compute_middle_core_length, \
+    compute_right_core_length, compute_sorted_core_length
+from test.vectors import random_vectors
+
+
+def _scan_core_length(frequency_vector: np.array, threshold: float) -> int:
+    current_sum = 0
+    for i, freq in enumerate(frequency_vector):
+        current_sum += freq
+        if np.isclose(current_sum, threshold) or current_sum > threshold:
+            return i + 1
+
+
+def _scan_middle_core_length(frequency_vector: np.array, threshold: float) -> int:
+    lower_threshold = (1. - threshold) / 2
+    current_presum = 0
+    start_index = -1
+    for i, freq in enumerate(frequency_vector):
+        current_presum += freq
+        if current_presum > lower_threshold and not np.isclose(current_presum, lower_threshold):
+            start_index = i
+            break
+    return _scan_core_length(frequency_vector[start_index:], threshold)
+
+
+class TestCoreLengths(TestCase):
+    _thresholds = (0.1, 0.3, 0.5, 0.8, 0.95, 1.)
+
+    _test_vectors = [vector / np.sum(vector) for vector in random_vectors(
+        42, (2, 5, 17, 100, 1000, 5000),
+        (lambda rng, length: rng.random(length),
+         lambda rng, length: (rng.random(length) < 0.1) * rng.random(length),
+         lambda rng, length: rng.pareto(1., length)),
+        fixed=(np.array([1.]), np.array([0., 1.]), np.full(10, .1),
+               np.array([0., 0., 0., .2, .55, 0., .15, .1, 0., 0.]), np.eye(1, 1000, k=500).flatten(),
+               np.eye(1, 5000, k=4999).flatten() + np.eye(1, 5000, k=3).flatten())) if np.sum(vector) > 0]
+
+    def test_left_core_length(self):
+        for vector in self._test_vectors:
+            for threshold in self._thresholds:
+                self.assertEqual(_scan_core_length(vector, threshold), compute_left_core_length(vector, threshold))
+
+    def test_right_core_length(self):
+        for vector in self._test_vectors:
+            for threshold in self._thresholds:
+                self.assertEqual(_scan_core_length(vector[::-1], threshold),
+                                 compute_right_core_length(vector, threshold))
+
+    def test_middle_core_length(self):
+        for vector in self._test_vectors:
+            for threshold in self._thresholds:
+                self.assertEqual(_scan_middle_core_length(vector, threshold),
+                                 compute_middle_core_length(vector, threshold))
+
+    def test_sorted_core_length(self):
+        for vector in self._test_vectors:
+            for threshold in self._thresholds:
+                self.assertEqual(_scan_core_length(np.sort(vector)[::-1], threshold),
+                                 compute_sorted_core_length(vector, threshold))
+
+    def test_shared_cumulative_sums(self):
+        vector = self._test_vectors[3]
+        cumulative_sums = np.cumsum(vector)
+        self.assertEqual(compute_left_core_length(vector, 0.8), compute_left_core_length(vector, 0.8, cumulative_sums))
+        self.assertEqual(compute_right_core_length(vector, 0.8),
+                         compute_right_core_length(vector, 0.8, cumulative_sums))
+        self.assertEqual(compute_middle_core_length(vector, 0.8),
+                         compute_middle_core_length(vector, 0.8, cumulative_sums))
+
+    def test_unreachable_threshold(self):
+        with self.assertRaises(ValueError):
+            compute_left_core_length(np.array([.1, .1]), 0.8)
+        with self.assertRaises(ValueError):
+            compute_right_core_length(np.array([.1, .1]), 0.8)
+        with self.assertRaises(ValueError):
+            compute_middle_core_length(np.array([.1, .1]), 0.8)
@@ -0,0 +1,50 @@
+import warnings
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, compute_ephemerality_batch
+from test.vectors import random_vectors
+
+
+class TestEphemeralityDtypes(TestCase):
+    _thresholds = (0.1, 0.5, 0.8, 1.)
+
+    _count_vectors = random_vectors(
+        11, (2, 10, 100, 1000), (lambda rng, length: (rng.random(length) < 0.3) * rng.integers(1, 50, length),),
+        fixed=(np.array([0, 1, 0, 0, 0, 0, 0]), np.zeros(5, dtype=np.int64), np.array([3])))
+
+    def test_integer_counts_match_float(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for vector in self._count_vectors:
+                for threshold in self._thresholds:
+                    self.assertEqual(compute_ephemerality(vector.astype(float), threshold),
+                                     compute_ephemerality(vector, threshold))
+                    self.assertEqual(compute_ephemerality(vector.astype(float), threshold),
+                                     compute_ephemerality(vector.astype(np.int32).tolist(), threshold))
+
+    def test_float32(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for vector in self._count_vectors:
+                for threshold in self._thresholds:
+                    expected = compute_ephemerality(vector.astype(float), threshold, result_type='tuple')
+                    np.testing.assert_allclose(
+                        expected, compute_ephemerality(vector.astype(np.float32), threshold, result_type='tuple'),
+                        atol=1e-6)
+                    np.testing.assert_allclose(
+                        expected, compute_ephemerality(vector.astype(float), threshold, result_type='tuple',
+                                                       dtype=np.float32), atol=1e-6)
+
+    def test_input_is_not_modified(self):
+        vector = np.array([1., 3., 0., 4.], dtype=np.float32)
+        compute_ephemerality(vector)
+        np.testing.assert_array_equal(vector, np.array([1., 3., 0., 4.], dtype=np.float32))
+
+    def test_batch_accepts_counts_and_float32(self):
+        matrix = np.array([[0, 1, 0, 0], [2, 2, 0, 1]])
+        expected = compute_ephemerality_batch(matrix.astype(float))
+        for actual in (compute_ephemerality_batch(matrix), compute_ephemerality_batch(matrix.astype(np.float32))):
+            np.testing.assert_allclose(expected.sorted_core, actual.sorted_core, atol=1e-6)
+            np.testing.assert_array_equal(expected.left_core_span, actual.left_core_span)
@@ -0,0 +1,60 @@
+import warnings
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, compute_ephemerality_grouped, group_long_format
+
+
+class TestGroupedEphemerality(TestCase):
+    @staticmethod
+    def _long_format(seed: int, n_topics: int, n_bins: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        rng = np.random.default_rng(seed)
+        # Rows come in random order and may repeat a (topic, bin) pair
+        n_rows = n_topics * n_bins // 3
+        return rng.integers(0, n_topics, n_rows), rng.integers(0, n_bins, n_rows), \
+            rng.integers(1, 10, n_rows).astype(float)
+
+    @staticmethod
+    def _dense_vector(topic_ids, bin_indices, counts, topic, length: int) -> np.ndarray:
+        vector = np.zeros(length)
+        np.add.at(vector, bin_indices[topic_ids == topic], counts[topic_ids == topic])
+        return vector
+
+    def test_group_long_format(self):
+        topics, offsets, values, lengths = group_long_format(['b', 'a', 'b', 'b'], [2, 0, 0, 2], [1, 2, 3, 4])
+        np.testing.assert_array_equal(['a', 'b'], topics)
+        np.testing.assert_array_equal([0, 1], offsets)
+        np.testing.assert_array_equal([2., 3., 0., 5.], values)
+        np.testing.assert_array_equal([1, 3], lengths)
+
+        _, offsets, values, lengths = group_long_format(['b', 'a'], [2, 0], [1, 2], n_bins=4)
+        np.testing.assert_array_equal([0, 4], offsets)
+        np.testing.assert_array_equal([2., 0., 0., 0., 0., 0., 1., 0.], values)
+
+        with self.assertRaises(ValueError):
+            group_long_format(['a'], [4], [1.], n_bins=4)
+        with self.assertRaises(ValueError):
+            group_long_format(['a'], [-1], [1.])
+        with self.assertRaises(ValueError):
+            group_long_format(['a', 'b'], [0], [1.])
+
+    def test_matches_per_topic(self):
+        topic_ids, bin_indices, counts = self._long_format(seed=2, n_topics=50, n_bins=40)
+        for n_bins in (None, 40):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                topics, batch = compute_ephemerality_grouped(topic_ids, bin_indices, counts, n_bins=n_bins)
+            np.testing.assert_array_equal(np.unique(topic_ids), topics)
+            for i, topic in enumerate(topics):
+                length = n_bins if n_bins else bin_indices[topic_ids == topic].max() + 1
+                expected = compute_ephemerality(self._dense_vector(topic_ids, bin_indices, counts, topic, length),
+                                                result_type='flagged')
+                for core_type in ('left', 'middle', 'right', 'sorted'):
+                    self.assertAlmostEqual(getattr(expected, f'{core_type}_core'),
+                                           getattr(batch, f'{core_type}_core')[i])
+
+    def test_empty(self):
+        topics, batch = compute_ephemerality_grouped([], [], [])
+        self.assertEqual(0, len(topics))
+        self.assertEqual(0, len(batch.left_core))
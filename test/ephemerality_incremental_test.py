@@ -0,0 +1,93 @@
+import warnings
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, IncrementalEphemerality
+
+
+CORE_FIELDS = ('left_core', 'middle_core', 'right_core', 'sorted_core')
+
+
+class TestIncrementalEphemerality(TestCase):
+    @staticmethod
+    def _streams() -> list[np.ndarray]:
+        rng = np.random.default_rng(5)
+        return [
+            np.array([0., 0., 0., .2, .55, 0., .15, .1, 0., 0.]),
+            np.ones(20),
+            rng.random(60),
+            (rng.random(80) < 0.3) * rng.integers(1, 6, 80).astype(float)
+        ]
+
+    def assert_same_as_batch(self, frequency_vector: np.ndarray, calculator: IncrementalEphemerality):
+        expected = compute_ephemerality(frequency_vector=frequency_vector, threshold=calculator.threshold,
+                                        types=calculator.types)
+        actual = calculator.ephemerality()
+        for field in CORE_FIELDS:
+            if getattr(expected, field) is None:
+                self.assertIsNone(getattr(actual, field))
+            else:
+                self.assertAlmostEqual(getattr(expected, field), getattr(actual, field), places=8,
+                                       msg=f'{field} of {frequency_vector}')
+
+    def test_growing_vector(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for stream in self._streams():
+                for threshold in (0.3, 0.8, 1.):
+                    calculator = IncrementalEphemerality(threshold=threshold)
+                    for i, frequency in enumerate(stream):
+                        calculator.append(frequency)
+                        self.assert_same_as_batch(stream[:i + 1], calculator)
+
+    def test_sliding_window(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for stream in self._streams():
+                for window in (1, 3, 10):
+                    calculator = IncrementalEphemerality(threshold=0.8, window=window)
+                    for i, frequency in enumerate(stream):
+                        calculator.append(frequency)
+                        self.assertEqual(min(i + 1, window), len(calculator))
+                        self.assert_same_as_batch(stream[max(0, i + 1 - window):i + 1], calculator)
+
+    def test_single_type(self):
+        stream = self._streams()[3]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for types in ('left', 'middle', 'right', 'sorted'):
+                calculator = IncrementalEphemerality(threshold=0.8, types=types, window=20)
+                calculator.extend(stream)
+                self.assert_same_as_batch(stream[-20:], calculator)
+
+    def test_magnitude_change(self):
+        rng = np.random.default_rng(6)
+        stream = np.concatenate((rng.random(50) * 1e12 + 1e12, rng.random(50) * 1e-3 + 1e-3))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for window in (5, 10):
+                calculator = IncrementalEphemerality(threshold=0.8, window=window)
+                for i, frequency in enumerate(stream):
+                    calculator.append(frequency)
+                    self.assert_same_as_batch(stream[max(0, i + 1 - window):i + 1], calculator)
+
+    def test_window_bounds_memory(self):
+        calculator = IncrementalEphemerality(window=10)
+        calculator.extend(np.random.default_rng(7).random(20000))
+        calculator.ephemerality()
+        self.assertLessEqual(len(calculator._top_mass._core) + len(calculator._top_mass._rest), 40)
+        self.assertLessEqual(len(calculator._prefix_sums), 21)
+
+    def test_zero_mass(self):
+        calculator = IncrementalEphemerality(window=2)
+        calculator.extend([5., 0., 0.])
+        self.assertEqual(1., calculator.ephemerality().sorted_core)
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            IncrementalEphemerality(threshold=1.5)
+        with self.assertRaises(ValueError):
+            IncrementalEphemerality(window=0)
+        with self.assertRaises(ValueError):
+            IncrementalEphemerality().append(-1.)
@@ -0,0 +1,36 @@
+import warnings
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, compute_ephemerality_multiresolution
+
+
+CORE_TYPES = ('left', 'middle', 'right', 'sorted')
+
+
+def _aggregate(frequency_vector: np.ndarray, factor: int) -> np.ndarray:
+    return np.array([np.sum(frequency_vector[i:i + factor]) for i in range(0, len(frequency_vector), factor)])
+
+
+class TestComputeEphemeralityMultiresolution(TestCase):
+    def test_matches_separate_aggregation(self):
+        rng = np.random.default_rng(3)
+        frequency_vector = (rng.random(10080) < 0.05) * rng.integers(1, 20, 10080).astype(float)
+        factors = [1, 60, 1440, 10080, 7, 100]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for threshold in (0.5, 0.8):
+                batch = compute_ephemerality_multiresolution(frequency_vector, factors, threshold=threshold)
+                for row, factor in enumerate(factors):
+                    expected = compute_ephemerality(_aggregate(frequency_vector, factor), threshold=threshold)
+                    for core_type in CORE_TYPES:
+                        self.assertAlmostEqual(getattr(expected, f'{core_type}_core'),
+                                               getattr(batch, f'{core_type}_core')[row], places=10,
+                                               msg=f'{core_type} core with factor {factor}')
+
+    def test_invalid_factors(self):
+        with self.assertRaises(ValueError):
+            compute_ephemerality_multiresolution([1., 2.], [0])
+        with self.assertRaises(ValueError):
+            compute_ephemerality_multiresolution([1., 2.], [1.5])
@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from src import compute_ephemerality, profiler, HotPathProfiler
+
+
+class TestHotPathProfiler(TestCase):
+    def tearDown(self):
+        profiler.disable()
+        profiler.reset()
+
+    def test_disabled_records_nothing(self):
+        profiler.reset()
+        compute_ephemerality([0., 1., 1., 0.])
+        with profiler.section('serialize'):
+            pass
+        self.assertEqual({}, profiler.stats())
+
+    def test_compute_sections(self):
+        profiler.reset()
+        profiler.enable()
+        compute_ephemerality([0., 1., 1., 0.])
+        compute_ephemerality([0., 1., 1., 0.], types='sorted', result_type='tuple')
+        stats = profiler.stats()
+        self.assertEqual(2, stats['preparation']['calls'])
+        self.assertEqual(2, stats['sorted_core']['calls'])
+        self.assertEqual(2, stats['result']['calls'])
+        self.assertEqual(1, stats['result_model']['calls'])
+        for core_type in ('left', 'middle', 'right'):
+            self.assertEqual(1, stats[f'{core_type}_core']['calls'])
+
+    def test_section_and_report(self):
+        local_profiler = HotPathProfiler()
+        local_profiler.enable()
+        for _ in range(3):
+            with local_profiler.section('parse'):
+                pass
+        local_profiler.record('compute', 0.5)
+        stats = local_profiler.stats()
+        self.assertEqual(3, stats['parse']['calls'])
+        self.assertEqual(0.5, stats['compute']['total_seconds'])
+        report = local_profiler.report().splitlines()
+        self.assertEqual(3, len(report))
+        self.assertTrue(report[1].startswith('compute'))
@@ -0,0 +1,217 @@
+import os
+import warnings
+import threading
+import importlib
+from unittest import TestCase, mock
+
+from fastapi.testclient import TestClient
+
+import rest.api
+from src import compute_ephemerality, CLAMP_FLAGS
+
+
+CORE_FIELDS = ('left_core', 'middle_core', 'right_core', 'sorted_core')
+
+
+def _reload_api(**environment: str):
+    # The REST API reads its configuration from the environment when it is imported
+    with mock.patch.dict(os.environ, environment):
+        return importlib.reload(rest.api)
+
+
+class RestTestCase(TestCase):
+    environment = dict()
+
+    def setUp(self):
+        self.api = _reload_api(**self.environment)
+        self.client = TestClient(self.api.app)
+        # Entering the client runs the startup and shutdown events, which shut the executors down
+        self.client.__enter__()
+        self.addCleanup(self.client.__exit__, None, None, None)
+
+
+class TestBatchEndpoint(RestTestCase):
+    environment = {'EPHEMERALITY_MAX_BATCH_SIZE': '3'}
+    vectors = [[0., 0., 0., .2, .55, 0., .15, .1, 0., 0.], [0., 1., 1., 0., 0.], [3., 0., 1.]]
+
+    def test_columnar_output(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            response = self.client.post('/ephemerality/1.1/batch', json={'input_vectors': self.vectors,
+                                                                         'threshold': 0.8})
+            expected = [compute_ephemerality(vector, 0.8, result_type='tuple') for vector in self.vectors]
+        self.assertEqual(200, response.status_code)
+        columns = response.json()
+        self.assertEqual({f'{field}{suffix}' for field in CORE_FIELDS for suffix in ('', '_span')}, set(columns))
+        for field in CORE_FIELDS:
+            self.assertEqual(len(self.vectors), len(columns[f'{field}_span']))
+            for value, ephemeralities in zip(columns[field], expected):
+                self.assertAlmostEqual(getattr(ephemeralities, field), value)
+
+    def test_per_vector_thresholds(self):
+        thresholds = [0.5, 0.8, 0.3]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            response = self.client.post('/ephemerality/1.1/batch', json={'input_vectors': self.vectors,
+                                                                         'threshold': thresholds})
+            expected = [compute_ephemerality(vector, threshold, result_type='tuple')
+                        for vector, threshold in zip(self.vectors, thresholds)]
+        self.assertEqual(200, response.status_code)
+        for field in CORE_FIELDS:
+            for value, ephemeralities in zip(response.json()[field], expected):
+                self.assertAlmostEqual(getattr(ephemeralities, field), value)
+
+    def test_types(self):
+        response = self.client.post('/ephemerality/1.1/batch', json={'input_vectors': self.vectors[:2],
+                                                                     'types': 'sorted'})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'sorted_core', 'sorted_core_span'}, set(response.json()))
+
+    def test_invalid_input(self):
+        for input_data in ({'input_vectors': self.vectors, 'threshold': [0.8, 0.5]},
+                           {'input_vectors': self.vectors, 'threshold': 1.5},
+                           {'input_vectors': self.vectors, 'threshold': [0.8, 0., 0.5]},
+                           {'input_vectors': self.vectors, 'types': 'bogus'}):
+            response = self.client.post('/ephemerality/1.1/batch', json=input_data)
+            self.assertEqual(422, response.status_code, msg=str(input_data))
+
+    def test_batch_size_limit(self):
+        response = self.client.post('/ephemerality/1.1/batch', json={'input_vectors': self.vectors + [[1.]]})
+        self.assertEqual(413, response.status_code)
+
+
+class TestSparseEndpoint(RestTestCase):
+    def test_matches_dense(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            response = self.client.post('/ephemerality/1.1/sparse', json={'length': 10, 'indices': [3, 4, 6, 7],
+                                                                          'values': [.2, .55, .15, .1]})
+            expected = compute_ephemerality([0., 0., 0., .2, .55, 0., .15, .1, 0., 0.], 0.8, result_type='tuple')
+        self.assertEqual(200, response.status_code)
+        for field in CORE_FIELDS:
+            self.assertAlmostEqual(getattr(expected, field), response.json()[field])
+
+    def test_types(self):
+        response = self.client.post('/ephemerality/1.1/sparse', json={'length': 4, 'indices': [1], 'values': [1.],
+                                                                      'threshold': 0.5, 'types': 'sorted'})
+        self.assertEqual(200, response.status_code)
+        self.assertIsNone(response.json()['left_core'])
+        self.assertAlmostEqual(0.5, response.json()['sorted_core'])
+
+    def test_invalid_input(self):
+        for input_data in ({'length': 5, 'indices': [5], 'values': [1.]},
+                           {'length': 5, 'indices': [1, 2], 'values': [1.]},
+                           {'length': 5, 'indices': [1, 2], 'values': [1., -1.]},
+                           {'length': 5, 'indices': [1], 'values': [1.], 'threshold': 1.5}):
+            response = self.client.post('/ephemerality/1.1/sparse', json=input_data)
+            self.assertEqual(422, response.status_code, msg=str(input_data))
+
+
+class TestExecutors(RestTestCase):
+    environment = {'EPHEMERALITY_PROCESS_POOL_MIN_SIZE': '8', 'EPHEMERALITY_PROCESS_POOL_WORKERS': '1'}
+
+    def test_small_inputs_use_threads(self):
+        response = self.client.post('/ephemerality/1.1/all', json={'input_vector': [0., 1., 1., 0.], 'threshold': 0.8})
+        self.assertEqual(200, response.status_code)
+        self.assertIsNone(self.api._process_pool)
+
+    def test_large_inputs_use_processes(self):
+        vector = [0., 0., 0., .2, .55, 0., .15, .1, 0., 0.]
+        response = self.client.post('/ephemerality/1.1/all', json={'input_vector': vector, 'threshold': 0.8})
+        self.assertEqual(200, response.status_code)
+        self.assertIsNotNone(self.api._process_pool)
+        expected = compute_ephemerality(vector, 0.8, result_type='tuple')
+        for field in CORE_FIELDS:
+            self.assertAlmostEqual(getattr(expected, field), response.json()[field])
+        self.assertEqual({'thread': 0, 'process': 0}, self.api._pending_computations)
+
+
+class TestThreadPoolBackpressure(RestTestCase):
+    environment = {'EPHEMERALITY_PROCESS_POOL_MIN_SIZE': '8', 'EPHEMERALITY_MAX_PENDING_COMPUTATIONS': '0'}
+
+    def test_busy_thread_pool(self):
+        response = self.client.post('/ephemerality/1.1/all', json={'input_vector': [0., 1., 1., 0.], 'threshold': 0.8})
+        self.assertEqual(503, response.status_code)
+        self.assertEqual({'thread': 0, 'process': 0}, self.api._pending_computations)
+
+
+class TestProcessPoolBackpressure(RestTestCase):
+    environment = {'EPHEMERALITY_PROCESS_POOL_MIN_SIZE': '8', 'EPHEMERALITY_MAX_PENDING_PROCESS_COMPUTATIONS': '0'}
+
+    def test_busy_process_pool(self):
+        response = self.client.post('/ephemerality/1.1/all', json={'input_vector': [1.] * 10, 'threshold': 0.8})
+        self.assertEqual(503, response.status_code)
+        self.assertIsNone(self.api._process_pool)
+
+    def test_thread_pool_unaffected(self):
+        response = self.client.post('/ephemerality/1.1/all', json={'input_vector': [1.] * 4, 'threshold': 0.8})
+        self.assertEqual(200, response.status_code)
+
+
+class TestCache(RestTestCase):
+    environment = {'EPHEMERALITY_CACHE_SIZE': '8', 'EPHEMERALITY_PROCESS_POOL_MIN_SIZE': '8'}
+
+    def test_repeated_vector(self):
+        for _ in range(2):
+            response = self.client.post('/ephemerality/1.1/all', json={'input_vector': [0., 1., 1., 0.],
+                                                                       'threshold': 0.8})
+            self.assertEqual(200, response.status_code)
+        stats = self.client.get('/ephemerality/cache').json()
+        self.assertEqual((1, 1), (stats['hits'], stats['misses']))
+
+    def test_key_computed_off_event_loop(self):
+        key_threads = list()
+        key = self.api._cache.key
+
+        def recording_key(*args, **kwargs):
+            key_threads.append(threading.current_thread().name)
+            return key(*args, **kwargs)
+
+        with mock.patch.object(self.api._cache, 'key', recording_key):
+            self.client.post('/ephemerality/1.1/all', json={'input_vector': [0., 1., 1., 0.], 'threshold': 0.8})
+        self.assertEqual(1, len(key_threads))
+        self.assertTrue(key_threads[0].startswith('ThreadPoolExecutor'))
+
+    def test_process_pool_inputs_not_cached(self):
+        response = self.client.post('/ephemerality/1.1/all', json={'input_vector': [1.] * 10, 'threshold': 0.8})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(0, len(self.api._cache))
+
+
+class TestMetrics(RestTestCase):
+    environment = {'EPHEMERALITY_METRICS': '1'}
+
+    def test_failed_request_latency(self):
+        client = TestClient(self.api.app, raise_server_exceptions=False)
+        response = client.post('/ephemerality/0.9/all', json={'input_vector': [0., 1.], 'threshold': 0.8})
+        self.assertEqual(500, response.status_code)
+        self.client.post('/ephemerality/1.1/all', json={'input_vector': [0., 1.], 'threshold': 0.8})
+        metrics = self.client.get('/metrics').text
+        self.assertIn('ephemerality_request_duration_seconds_count{endpoint="get_all_ephemeralities",status="500"} 1',
+                      metrics)
+        self.assertIn('ephemerality_request_duration_seconds_count{endpoint="get_all_ephemeralities",status="200"} 1',
+                      metrics)
+
+    def test_endpoint_labels(self):
+        self.client.post('/ephemerality/1.1/left', json={'input_vector': [0., 1.], 'threshold': 0.8})
+        self.client.post('/ephemerality/1.1/batch', json={'input_vectors': [[0., 1.], [1.]]})
+        metrics = self.client.get('/metrics').text
+        for endpoint, count in (('get_left_core_ephemeralities', 1), ('get_batch_ephemeralities', 2)):
+            self.assertIn(f'ephemerality_vector_length_count{{endpoint="{endpoint}"}} {count}', metrics)
+            self.assertIn(f'ephemerality_request_duration_seconds_count{{endpoint="{endpoint}",status="200"}} 1',
+                          metrics)
+        self.assertNotIn('endpoint="left"', metrics)
+
+    def test_clamped_counts(self):
+        # Only the left core of this vector is rounded up, once per request and once per vector of the batch
+        flagged = compute_ephemerality([0., 0., 0., 1.], 0.5, result_type='flagged')
+        self.assertEqual(CLAMP_FLAGS['left'], flagged.clamped)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for _ in range(5):
+                self.client.post('/ephemerality/1.1/all', json={'input_vector': [0., 0., 0., 1.], 'threshold': 0.5})
+            self.client.post('/ephemerality/1.1/batch', json={'input_vectors': [[0., 0., 0., 1.]] * 3,
+                                                              'threshold': 0.5})
+        metrics = self.client.get('/metrics').text
+        self.assertIn('ephemerality_clamped_total{core="left"} 8', metrics)
+        self.assertNotIn('ephemerality_clamped_total{core="middle"}', metrics)
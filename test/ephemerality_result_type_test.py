@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, EphemeralitySet, EphemeralityTuple, IncrementalEphemerality
+
+
+class TestResultType(TestCase):
+    _vector = np.array([0., 0., 0., .2, .55, 0., .15, .1, 0., 0.])
+
+    def test_model_and_tuple_agree(self):
+        model = compute_ephemerality(frequency_vector=self._vector, threshold=0.8)
+        values = compute_ephemerality(frequency_vector=self._vector, threshold=0.8, result_type='tuple')
+
+        self.assertIsInstance(model, EphemeralitySet)
+        self.assertIsInstance(values, EphemeralityTuple)
+        self.assertEqual(model.dict(), values._asdict())
+
+    def test_partial_types(self):
+        values = compute_ephemerality(frequency_vector=self._vector, threshold=0.8, types='sorted',
+                                      result_type='tuple')
+        self.assertEqual((None, None, None, 0.625), values)
+
+    def test_zero_vector(self):
+        values = compute_ephemerality(frequency_vector=np.zeros(4), result_type='tuple')
+        self.assertEqual(EphemeralityTuple(1., 1., 1., 1.), values)
+
+    def test_incremental_result_type(self):
+        calculator = IncrementalEphemerality(threshold=0.8)
+        calculator.extend(self._vector)
+        self.assertEqual(calculator.ephemerality().dict(), calculator.ephemerality(result_type='tuple')._asdict())
+
+    def test_unknown_result_type(self):
+        with self.assertRaises(ValueError):
+            compute_ephemerality(frequency_vector=self._vector, result_type='dict')
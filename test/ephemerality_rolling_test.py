@@ -0,0 +1,70 @@
+import warnings
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, compute_ephemerality_rolling
+
+
+class TestComputeEphemeralityRolling(TestCase):
+    def assert_matches_slices(self, frequency_vector: np.ndarray, window: int, threshold: float, types: str = 'all'):
+        rolling = compute_ephemerality_rolling(frequency_vector, window=window, threshold=threshold, types=types)
+        n_windows = max(len(frequency_vector) - window + 1, 0)
+        for core_type in ('left', 'middle', 'right', 'sorted'):
+            values = getattr(rolling, f'{core_type}_core')
+            if types != 'all' and types != core_type:
+                self.assertIsNone(values)
+                continue
+
+            self.assertEqual(n_windows, len(values))
+            for i in range(n_windows):
+                expected = compute_ephemerality(frequency_vector=frequency_vector[i:i + window], threshold=threshold)
+                self.assertAlmostEqual(getattr(expected, f'{core_type}_core'), values[i], places=8,
+                                       msg=f'{core_type} core of window {i} of {frequency_vector}')
+
+    def test_rolling_windows(self):
+        rng = np.random.default_rng(11)
+        series = [
+            rng.random(50),
+            (rng.random(80) < 0.2) * rng.integers(1, 20, 80).astype(float),
+            np.array([0., 0., 0., .2, .55, 0., .15, .1, 0., 0.])
+        ]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for frequency_vector in series:
+                for window in (1, 4, 10, 24):
+                    for threshold in (0.3, 0.8):
+                        self.assert_matches_slices(frequency_vector, window, threshold)
+
+    def test_single_type(self):
+        frequency_vector = np.random.default_rng(12).poisson(2., 40).astype(float)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for types in ('left', 'middle', 'right', 'sorted'):
+                self.assert_matches_slices(frequency_vector, 7, 0.8, types)
+
+    def test_zero_windows(self):
+        rolling = compute_ephemerality_rolling(np.array([1., 0., 0., 0., 1.]), window=3)
+        np.testing.assert_allclose([1 - (1 / 3) / 0.8, 1., 1 - (1 / 3) / 0.8], rolling.sorted_core)
+
+    def test_zero_window_after_mass(self):
+        rolling = compute_ephemerality_rolling(np.array([0.13, 1., 0.]), window=1)
+        np.testing.assert_allclose([0., 0., 1.], rolling.sorted_core)
+
+    def test_magnitude_change(self):
+        rng = np.random.default_rng(13)
+        frequency_vector = np.concatenate((rng.random(50) * 1e12 + 1e12, rng.random(50) * 1e-3 + 1e-3))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for window in (5, 7):
+                self.assert_matches_slices(frequency_vector, window, 0.8)
+
+    def test_window_longer_than_series(self):
+        rolling = compute_ephemerality_rolling(np.ones(3), window=5)
+        self.assertEqual(0, len(rolling.left_core))
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            compute_ephemerality_rolling(np.ones(3), window=0)
+        with self.assertRaises(ValueError):
+            compute_ephemerality_rolling(np.array([1., -1.]), window=1)
@@ -0,0 +1,57 @@
+import sys
+import warnings
+import subprocess
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, compute_ephemerality_small
+from src.ephemerality_scalar import SMALL_VECTOR_MAX_LENGTH
+from test.vectors import random_vectors
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestEphemeralitySmall(TestCase):
+    _thresholds = (0.1, 1 / 3, 0.5, 0.8, 1.)
+
+    _vectors = random_vectors(
+        11, (2, 3, 7, 10, 50, SMALL_VECTOR_MAX_LENGTH),
+        (lambda rng, length: (rng.random(length) * (rng.random(length) < 0.3)).round(rng.integers(0, 3)),
+         lambda rng, length: rng.integers(0, 4, length).astype(float)), repeats=20,
+        fixed=(np.array([]), np.array([1.]), np.array([0., 0., 1.]), np.array([1., 0., 0., 1.]), np.zeros(4),
+               np.array([0.0, 0.0, 0.0, 0.2, 0.55, 0.0, 0.15, 0.1, 0.0, 0.0])))
+
+    def test_matches_compute_ephemerality(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for vector in self._vectors:
+                for threshold in self._thresholds:
+                    self.assertEqual(compute_ephemerality(vector, threshold, result_type='tuple'),
+                                     compute_ephemerality_small(vector.tolist(), threshold))
+
+    def test_clamp_warnings_match(self):
+        for function in (compute_ephemerality, compute_ephemerality_small):
+            with warnings.catch_warnings(record=True) as warns:
+                warnings.simplefilter('always', category=RuntimeWarning)
+                function([0., 0., 0., 1.], 0.5)
+            self.assertEqual(1, len(warns))
+
+    def test_invalid_threshold(self):
+        with self.assertRaises(ValueError):
+            compute_ephemerality_small([1., 2.], 1.5)
+
+    def test_package_import_is_lazy(self):
+        code = "import sys, src; print('numpy' in sys.modules, 'pydantic' in sys.modules)"
+        output = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, check=True, capture_output=True, text=True)
+        self.assertEqual('False False', output.stdout.strip())
+
+    def test_cli_small_vector(self):
+        vector = ['0.0', '0.0', '0.0', '0.2', '0.55', '0.0', '0.15', '0.1', '0.0', '0.0']
+        expected = ' '.join(map(str, compute_ephemerality(np.array(vector, dtype=float), 0.5, result_type='tuple')))
+        for arguments in (vector, [' '.join(vector)], [','.join(vector)]):
+            output = subprocess.run([sys.executable, 'ephemerality.py', *arguments, '-t', '0.5'], cwd=REPO_ROOT,
+                                    check=True, capture_output=True, text=True)
+            self.assertEqual(expected, output.stdout.strip())
@@ -0,0 +1,57 @@
+import warnings
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, compute_ephemerality_sparse
+from test.vectors import random_vectors
+
+
+class _SparseRow:
+    """Minimal stand-in for a single-row scipy.sparse matrix"""
+
+    def __init__(self, dense_vector: np.ndarray):
+        self.shape = (1, len(dense_vector))
+        self.col = np.nonzero(dense_vector)[0]
+        self.data = dense_vector[self.col]
+
+    def tocoo(self):
+        return self
+
+
+class TestComputeEphemeralitySparse(TestCase):
+    _thresholds = (0.1, 0.3, 0.5, 0.8, 0.95, 1.)
+
+    _test_vectors = random_vectors(
+        7, (2, 5, 17, 100, 1000),
+        (lambda rng, length: (rng.random(length) < 0.1) * rng.integers(1, 10, length).astype(float),
+         lambda rng, length: (rng.random(length) < 0.5) * rng.random(length)),
+        fixed=(np.array([1.]), np.array([0., 0., 0.]), np.eye(1, 1000, k=500).flatten()))
+
+    def test_matches_dense(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for vector in self._test_vectors:
+                indices = np.nonzero(vector)[0]
+                for threshold in self._thresholds:
+                    expected = compute_ephemerality(vector, threshold, result_type='tuple')
+                    actual = compute_ephemerality_sparse((len(vector), indices, vector[indices]), threshold,
+                                                         result_type='tuple')
+                    np.testing.assert_allclose(expected, actual, atol=1e-12,
+                                               err_msg=f'{vector} with threshold {threshold}')
+                    self.assertEqual(expected, compute_ephemerality_sparse(_SparseRow(vector), threshold,
+                                                                           result_type='tuple'))
+
+    def test_unsorted_and_duplicate_indices(self):
+        self.assertEqual(compute_ephemerality([0., 0., 1., 0., 0., 2., 0., 0., 0., 0.], types='middle'),
+                         compute_ephemerality_sparse((10, [5, 2, 5], [1., 1., 1.]), types='middle'))
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            compute_ephemerality_sparse((5, [5], [1.]))
+        with self.assertRaises(ValueError):
+            compute_ephemerality_sparse((5, [1, 2], [1.]))
+        with self.assertRaises(ValueError):
+            compute_ephemerality_sparse((5, [1], [1.]), threshold=0.)
+        with self.assertRaises(ValueError):
+            compute_ephemerality_sparse((5, [1, 2], [1., -1.]))
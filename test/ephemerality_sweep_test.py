@@ -0,0 +1,64 @@
+import warnings
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, compute_ephemerality_sweep
+
+
+class TestComputeEphemeralitySweep(TestCase):
+    _thresholds = np.round(np.arange(0.5, 0.96, 0.01), 2)
+
+    @staticmethod
+    def _expected_sweep(frequency_vector: np.ndarray, thresholds: np.ndarray, types: str = 'all') -> np.ndarray:
+        expected = np.full((len(thresholds), 4), np.nan)
+        for i, threshold in enumerate(thresholds):
+            ephemeralities = compute_ephemerality(frequency_vector=frequency_vector, threshold=threshold, types=types)
+            for j, core_type in enumerate(('left', 'middle', 'right', 'sorted')):
+                value = getattr(ephemeralities, f'{core_type}_core')
+                if value is not None:
+                    expected[i, j] = value
+        return expected
+
+    def _vectors(self) -> list[np.ndarray]:
+        rng = np.random.default_rng(7)
+        return [
+            np.array([0., 0., 0., .2, .55, 0., .15, .1, 0., 0.]),
+            np.full(10, .1),
+            np.array([1., 0., 0., 0.]),
+            np.zeros(5),
+            rng.random(100),
+            (rng.random(300) < 0.05) * rng.random(300)
+        ]
+
+    def test_single_vector(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for vector in self._vectors():
+                np.testing.assert_allclose(self._expected_sweep(vector, self._thresholds),
+                                           compute_ephemerality_sweep(vector, self._thresholds), atol=1e-12)
+
+    def test_single_type(self):
+        vector = self._vectors()[0]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for core_type in ('left', 'middle', 'right', 'sorted'):
+                np.testing.assert_allclose(self._expected_sweep(vector, self._thresholds, core_type),
+                                           compute_ephemerality_sweep(vector, self._thresholds, core_type),
+                                           atol=1e-12)
+
+    def test_batch(self):
+        vectors = self._vectors()
+        lengths = [len(vector) for vector in vectors]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            actual = compute_ephemerality_sweep(np.concatenate(vectors), self._thresholds, lengths=lengths)
+            self.assertEqual((len(vectors), len(self._thresholds), 4), actual.shape)
+            for i, vector in enumerate(vectors):
+                np.testing.assert_allclose(self._expected_sweep(vector, self._thresholds), actual[i], atol=1e-12)
+
+    def test_invalid_thresholds(self):
+        with self.assertRaises(ValueError):
+            compute_ephemerality_sweep(np.ones(4), [0.5, 1.5])
+        with self.assertRaises(ValueError):
+            compute_ephemerality_sweep(np.ones(4), [0., 0.5])
@@ -0,0 +1,58 @@
+import warnings
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality, compute_ephemerality_from_timestamps
+
+
+CORE_TYPES = ('left', 'middle', 'right', 'sorted')
+
+
+class TestComputeEphemeralityFromTimestamps(TestCase):
+    def assert_matches_histogram(self, batch, row: int, timestamps: np.ndarray, start: float, n_bins: int,
+                                 bin_width: float):
+        histogram = np.histogram(timestamps, bins=n_bins, range=(start, start + n_bins * bin_width))[0]
+        expected = compute_ephemerality(histogram.astype(float))
+        for core_type in CORE_TYPES:
+            self.assertAlmostEqual(getattr(expected, f'{core_type}_core'), getattr(batch, f'{core_type}_core')[row],
+                                   places=10)
+
+    def test_single_topic(self):
+        timestamps = np.random.default_rng(0).random(500) * 100
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            batch = compute_ephemerality_from_timestamps(timestamps, start=20., end=80., bin_width=4.)
+            self.assertEqual(len(batch.left_core), 1)
+            self.assert_matches_histogram(batch, 0, timestamps[(timestamps >= 20.) & (timestamps < 80.)], 20., 15, 4.)
+
+    def test_topics_and_several_bin_widths(self):
+        rng = np.random.default_rng(1)
+        timestamps = rng.random(1000) * 100
+        topic_ids = rng.choice(['a', 'b', 'c'], size=1000)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            results = compute_ephemerality_from_timestamps(timestamps, start=0., end=100., bin_width=[1., 7.5],
+                                                           topic_ids=topic_ids)
+            self.assertEqual(sorted(results), [1., 7.5])
+            for bin_width, batch in results.items():
+                for row, topic in enumerate(('a', 'b', 'c')):
+                    self.assert_matches_histogram(batch, row, timestamps[topic_ids == topic], 0.,
+                                                  int(np.ceil(100. / bin_width)), bin_width)
+
+    def test_datetime_timestamps(self):
+        start = np.datetime64('2023-01-01T00:00')
+        timestamps = start + np.array([0, 5, 65, 70, 75, 190], dtype='timedelta64[m]')
+        batch = compute_ephemerality_from_timestamps(timestamps, start=start, end=start + np.timedelta64(4, 'h'),
+                                                     bin_width=np.timedelta64(1, 'h'))
+        expected = compute_ephemerality([2., 3., 0., 1.])
+        self.assertAlmostEqual(expected.left_core, batch.left_core[0])
+        self.assertAlmostEqual(expected.sorted_core, batch.sorted_core[0])
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            compute_ephemerality_from_timestamps([1., 2.], start=0., end=10., bin_width=0.)
+        with self.assertRaises(ValueError):
+            compute_ephemerality_from_timestamps([1., 2.], start=10., end=0., bin_width=1.)
+        with self.assertRaises(ValueError):
+            compute_ephemerality_from_timestamps([1., 2.], start=0., end=10., bin_width=1., topic_ids=[1])
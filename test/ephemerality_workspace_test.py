@@ -0,0 +1,53 @@
+import warnings
+from unittest import TestCase
+
+import numpy as np
+
+from src import compute_ephemerality
+from test.vectors import random_vectors
+
+
+class TestCallerOwnedBuffers(TestCase):
+    _test_vectors = random_vectors(
+        5, (10, 300, 5000),
+        (lambda rng, length: (rng.random(length) < 0.2) * rng.random(length),
+         lambda rng, length: rng.integers(0, 10, length)),
+        fixed=(np.array([0., 1., 0., 0.]), np.zeros(3), np.array([2, 0, 5])))
+
+    def test_workspace_matches_default(self):
+        workspaces = {True: np.empty(5000, dtype=np.int64), False: np.empty(5000)}
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for vector in self._test_vectors:
+                workspace = workspaces[np.issubdtype(vector.dtype, np.integer)]
+                for threshold in (0.1, 0.5, 0.8, 1.):
+                    for types in ('all', 'left', 'sorted'):
+                        self.assertEqual(compute_ephemerality(vector, threshold, types),
+                                         compute_ephemerality(vector, threshold, types, workspace=workspace))
+
+    def test_read_only_buffers(self):
+        vector = np.random.default_rng(6).random(1000)
+        read_only = vector.copy()
+        read_only.setflags(write=False)
+        expected = compute_ephemerality(vector)
+        self.assertEqual(expected, compute_ephemerality(read_only))
+        self.assertEqual(expected, compute_ephemerality(memoryview(read_only)))
+        self.assertEqual(expected, compute_ephemerality(read_only, workspace=np.empty(1000)))
+
+    def test_invalid_workspace(self):
+        with self.assertRaises(ValueError):
+            compute_ephemerality(np.ones(10), workspace=np.empty(5))
+        read_only = np.empty(10)
+        read_only.setflags(write=False)
+        with self.assertRaises(ValueError):
+            compute_ephemerality(np.ones(10), workspace=read_only)
+
+    def test_large_integer_counts(self):
+        # Prefix sums beyond 2 ** 53 are only exact in an int64 workspace
+        vector = np.array([2 ** 53, 1, 1, 1, 0, 3, 2 ** 52, 1], dtype=np.int64)
+        for threshold in (0.5, 0.8, 1.):
+            for types in ('all', 'sorted'):
+                self.assertEqual(compute_ephemerality(vector, threshold, types),
+                                 compute_ephemerality(vector, threshold, types, workspace=np.empty(8, dtype=np.int64)))
+        with self.assertRaises(ValueError):
+            compute_ephemerality(vector, workspace=np.empty(8))
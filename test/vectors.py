@@ -0,0 +1,20 @@
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+
+
+VectorGenerator = Callable[[np.random.Generator, int], np.ndarray]
+
+
+def random_vectors(seed: int, lengths: Iterable[int], generators: Sequence[VectorGenerator],
+                   fixed: Iterable[np.ndarray] = (), repeats: int = 1) -> list[np.ndarray]:
+    """
+    Returns the `fixed` vectors followed by `repeats` vectors of every length from each generator, all drawn from one
+    generator seeded with `seed` so that every run tests the same vectors.
+    """
+    rng = np.random.default_rng(seed)
+    vectors = list(fixed)
+    for length in lengths:
+        for _ in range(repeats):
+            vectors.extend(generator(rng, length) for generator in generators)
+    return vectors